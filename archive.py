@@ -0,0 +1,358 @@
+"""Indexed archive of past analyses.
+
+Reports are written as markdown and never read back. ``ReportArchive``
+also stores every finished analysis in SQLite: one row per report with the
+ticker, time, rating and run metrics, one row per section, and an FTS5
+index over the section texts. Questions like "latest recommendation for
+every ticker", "how has NVDA's rating changed" or "which reports mention
+buybacks" become indexed queries instead of globbing markdown:
+
+    python -m archive latest
+    python -m archive history NVDA
+    python -m archive search "share buyback" --ticker MSFT
+    python -m archive backfill              # index reports written before
+
+The module only needs the standard library, so the CLI starts fast.
+"""
+import argparse
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from config import ANALYSIS_DIR, ARCHIVE_PATH
+from report import (
+    RECOMMENDATION_KEY, RECORD_KEY, SECTION_TITLES, UNAVAILABLE_KEY, extract_rating, list_reports,
+)
+
+_TITLE_KEYS = {title: key for key, title in SECTION_TITLES.items()}
+_RECOMMENDATION_HEADING = "## 📋 Investment Recommendation"
+_DETAILS_HEADING = "## 🔍 Detailed Research Data"
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS reports (
+        id INTEGER PRIMARY KEY,
+        ticker TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        path TEXT UNIQUE,
+        rating TEXT,
+        latency REAL,
+        first_section_latency REAL,
+        total_tokens INTEGER,
+        model_calls INTEGER,
+        sections INTEGER NOT NULL,
+        unavailable INTEGER NOT NULL DEFAULT 0
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_reports_ticker ON reports(ticker, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_reports_created ON reports(created_at)",
+    """CREATE TABLE IF NOT EXISTS sections (
+        id INTEGER PRIMARY KEY,
+        report_id INTEGER NOT NULL REFERENCES reports(id),
+        ticker TEXT NOT NULL,
+        key TEXT NOT NULL,
+        text TEXT NOT NULL,
+        UNIQUE (report_id, key)
+    )""",
+    # External-content index: the text is stored once, in ``sections``. The
+    # ticker is indexed too so a per-ticker search is an index intersection
+    # instead of ranking every match and filtering afterwards.
+    """CREATE VIRTUAL TABLE IF NOT EXISTS sections_fts USING fts5(
+        text, ticker, content='sections', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS sections_ai AFTER INSERT ON sections BEGIN
+        INSERT INTO sections_fts(rowid, text, ticker) VALUES (new.id, new.text, new.ticker);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS sections_ad AFTER DELETE ON sections BEGIN
+        INSERT INTO sections_fts(sections_fts, rowid, text, ticker)
+        VALUES ('delete', old.id, old.text, old.ticker);
+    END""",
+)
+
+
+@dataclass
+class ArchivedReport:
+    """One row of a history or latest-per-ticker query."""
+
+    ticker: str
+    created_at: float
+    rating: Optional[str]
+    path: Optional[str]
+    latency: Optional[float] = None
+    total_tokens: Optional[int] = None
+    unavailable: int = 0
+
+    @property
+    def created(self) -> datetime:
+        return datetime.fromtimestamp(self.created_at)
+
+
+@dataclass
+class SearchHit:
+    """One section matching a full-text search."""
+
+    ticker: str
+    created_at: float
+    key: str
+    snippet: str
+    path: Optional[str]
+
+    @property
+    def created(self) -> datetime:
+        return datetime.fromtimestamp(self.created_at)
+
+
+def parse_report(text: str) -> dict[str, str]:
+    """Split a rendered report back into its recommendation and sections.
+
+    Returns:
+        dict[str, str]: Output key to text, like the session state it was
+        rendered from.
+    """
+    state = {}
+    recommendation, _, details = text.partition(_DETAILS_HEADING)
+    if _RECOMMENDATION_HEADING in recommendation:
+        body = recommendation.split(_RECOMMENDATION_HEADING, 1)[1]
+        # The recommendation ends at the rule before the cut-off list
+        body = re.split(r"\n---\n", body, maxsplit=1)[0]
+        state[RECOMMENDATION_KEY] = body.strip()
+    elif not details:
+        # Early reports hold only the recommendation, below a header and a rule
+        body = re.split(r"\n---\n", text, maxsplit=1)[-1]
+        state[RECOMMENDATION_KEY] = body.strip()
+    for chunk in re.split(r"^### ", details, flags=re.M)[1:]:
+        title, _, body = chunk.partition("\n")
+        key = _TITLE_KEYS.get(title.strip())
+        if key is not None:
+            state[key] = body.strip()
+    return state
+
+
+class ReportArchive:
+    """SQLite archive of finished analyses with full-text search.
+
+    Args:
+        path: Database file.
+    """
+
+    def __init__(self, path: str = ARCHIVE_PATH):
+        self.path = path
+        self.added = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def _insert(
+        self, ticker: str, created_at: float, path: Optional[str], state: dict,
+        metrics: dict,
+    ) -> None:
+        ticker = ticker.strip().upper()
+        sections = [
+            (key, value) for key, value in state.items()
+            if (key in SECTION_TITLES or key == RECOMMENDATION_KEY)
+            and isinstance(value, str) and value
+        ]
+        cursor = self._conn.execute(
+            "INSERT INTO reports (ticker, created_at, path, rating, latency, "
+            "first_section_latency, total_tokens, model_calls, sections, unavailable) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                ticker, created_at, path,
+                # The rating is the report's verdict; the scorecard's fills in
+                # only when the prose doesn't state one
+                extract_rating(state.get(RECOMMENDATION_KEY, ""))
+                or (state.get(RECORD_KEY) or {}).get("verdict"),
+                metrics.get("latency"), metrics.get("first_section_latency"),
+                metrics.get("total_tokens"), metrics.get("model_calls"),
+                len(sections), len(state.get(UNAVAILABLE_KEY) or {}),
+            ),
+        )
+        self._conn.executemany(
+            "INSERT INTO sections (report_id, ticker, key, text) VALUES (?, ?, ?, ?)",
+            [(cursor.lastrowid, ticker, key, value) for key, value in sections],
+        )
+        self.added += 1
+
+    def add(
+        self,
+        ticker: str,
+        state: dict,
+        path: Optional[str] = None,
+        created_at: Optional[float] = None,
+        metrics: Optional[dict] = None,
+    ) -> None:
+        """Archive one finished analysis.
+
+        Args:
+            ticker: The analyzed stock.
+            state: Final session state holding the sections.
+            path: The markdown report, if one was written.
+            created_at: Unix time of the analysis; defaults to now.
+            metrics: Run metrics: ``latency``, ``first_section_latency``,
+                ``total_tokens``, ``model_calls``.
+        """
+        with self._lock, self._conn:
+            if path is not None:
+                # Re-archiving a report replaces it; sections go first so the
+                # delete trigger keeps the search index in sync
+                self._conn.execute(
+                    "DELETE FROM sections WHERE report_id IN "
+                    "(SELECT id FROM reports WHERE path = ?)", (path,)
+                )
+                self._conn.execute("DELETE FROM reports WHERE path = ?", (path,))
+            self._insert(ticker, created_at or time.time(), path, state, metrics or {})
+
+    def backfill(self, directory: str = ANALYSIS_DIR) -> int:
+        """Index the reports in ``directory`` that aren't archived yet.
+
+        Returns:
+            int: Number of reports added.
+        """
+        with self._lock:
+            known = {row[0] for row in self._conn.execute("SELECT path FROM reports")}
+        added = 0
+        with self._lock, self._conn:
+            for ticker, created, path in list_reports(directory):
+                if path in known:
+                    continue
+                with open(path, encoding="utf-8") as f:
+                    state = parse_report(f.read())
+                self._insert(ticker, created.timestamp(), path, state, {})
+                added += 1
+        return added
+
+    def latest(self, limit: Optional[int] = None) -> list[ArchivedReport]:
+        """The most recent report of every ticker, newest first."""
+        # SQLite returns the other columns from the row holding the MAX()
+        query = (
+            "SELECT ticker, MAX(created_at), rating, path, latency, total_tokens, unavailable "
+            "FROM reports GROUP BY ticker ORDER BY MAX(created_at) DESC"
+        )
+        params: tuple = ()
+        if limit:
+            query += " LIMIT ?"
+            params = (limit,)
+        with self._lock:
+            return [ArchivedReport(*row) for row in self._conn.execute(query, params)]
+
+    def history(self, ticker: str, limit: int = 50) -> list[ArchivedReport]:
+        """Reports of one ticker, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ticker, created_at, rating, path, latency, total_tokens, unavailable "
+                "FROM reports WHERE ticker = ? ORDER BY created_at DESC LIMIT ?",
+                (ticker.strip().upper(), limit),
+            ).fetchall()
+        return [ArchivedReport(*row) for row in rows]
+
+    def search(
+        self, query: str, ticker: Optional[str] = None, limit: int = 20
+    ) -> list[SearchHit]:
+        """Sections matching an FTS5 query, best match first.
+
+        Args:
+            query: FTS5 query, e.g. ``buyback``, ``"share buyback"`` or
+                ``dilution NOT convertible``.
+            ticker: Only search this ticker's reports.
+            limit: Maximum number of hits.
+        """
+        if ticker:
+            # Quoted, so tickers like BRK.B are matched as a phrase
+            query = f'ticker:"{ticker.strip().upper()}" AND text:({query})'
+        else:
+            query = f"text:({query})"
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT r.ticker, r.created_at, s.key, "
+                "snippet(sections_fts, 0, '[', ']', '…', 12), r.path "
+                "FROM sections_fts JOIN sections s ON s.id = sections_fts.rowid "
+                "JOIN reports r ON r.id = s.report_id "
+                "WHERE sections_fts MATCH ? ORDER BY rank LIMIT ?",
+                (query, limit),
+            ).fetchall()
+        return [SearchHit(*row) for row in rows]
+
+    def optimize(self) -> None:
+        """Merge the search index into one b-tree; worth it after a backfill."""
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO sections_fts(sections_fts) VALUES ('optimize')")
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+    def summary(self) -> str:
+        """One-line summary for run reports."""
+        return f"{self.added} reports archived in {self.path} (query with python -m archive)"
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _print_reports(reports: list[ArchivedReport]) -> None:
+    for report in reports:
+        line = f"  {report.created:%Y-%m-%d %H:%M}  {report.ticker:<8}{report.rating or '—':<12}"
+        if report.latency is not None:
+            line += f"{report.latency:>7.1f}s"
+        if report.unavailable:
+            line += f"  ({report.unavailable} cut off)"
+        print(f"{line}  {report.path or ''}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the archive of past analyses.")
+    parser.add_argument("--db", default=ARCHIVE_PATH, help=f"Archive database (default: {ARCHIVE_PATH}).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    latest = commands.add_parser("latest", help="Latest recommendation for every ticker.")
+    latest.add_argument("-n", "--limit", type=int)
+    history = commands.add_parser("history", help="Recommendations of one ticker over time.")
+    history.add_argument("ticker")
+    history.add_argument("-n", "--limit", type=int, default=50)
+    search = commands.add_parser("search", help="Full-text search over every section.")
+    search.add_argument("query", help='FTS5 query, e.g. buyback or "share buyback".')
+    search.add_argument("-t", "--ticker")
+    search.add_argument("-n", "--limit", type=int, default=20)
+    backfill = commands.add_parser("backfill", help="Index reports written before the archive.")
+    backfill.add_argument("directory", nargs="?", default=ANALYSIS_DIR)
+    args = parser.parse_args(argv)
+
+    archive = ReportArchive(args.db)
+    try:
+        if args.command == "backfill":
+            started = time.perf_counter()
+            added = archive.backfill(args.directory)
+            if added:
+                archive.optimize()
+            print(f"🗃️  Indexed {added} reports from {args.directory}/ in "
+                  f"{time.perf_counter() - started:.2f}s ({archive.count()} archived)")
+        elif args.command == "latest":
+            reports = archive.latest(args.limit)
+            print(f"📈 Latest recommendation for {len(reports)} tickers:")
+            _print_reports(reports)
+        elif args.command == "history":
+            reports = archive.history(args.ticker, args.limit)
+            print(f"🕰️  {args.ticker.upper()}: {len(reports)} reports")
+            _print_reports(reports)
+        else:
+            try:
+                hits = archive.search(args.query, args.ticker, args.limit)
+            except sqlite3.OperationalError as e:
+                parser.error(f"invalid search query: {e}")
+            print(f"🔎 {len(hits)} sections match {args.query!r}:")
+            for hit in hits:
+                title = SECTION_TITLES.get(hit.key, "Investment Recommendation")
+                print(f"  {hit.created:%Y-%m-%d %H:%M}  {hit.ticker:<8}{title}")
+                print(f"      {' '.join(hit.snippet.split())}")
+    finally:
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,473 @@
+"""Concurrent batch analysis of many tickers in a single process."""
+import asyncio
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from archive import ReportArchive
+from cache import SectionCache, SectionCachePlugin
+from checkpoint import CheckpointPlugin, CheckpointStore
+from compaction import COMPACTION_KEY
+from config import APP_NAME, BATCH_CONCURRENCY, HEDGING_ENABLED, SEARCH_MODE, TRACE_ENABLED
+from fundamentals import FundamentalsPlugin, FundamentalsStore
+from hedging import get_hedger
+from indicators import IndicatorsPlugin, PriceStore
+from macro import MacroContext
+from models import get_limiter
+from report import (
+    GATE_KEY, RECOMMENDATION_KEY, RECORD_KEY, SECTION_TITLES, UNAVAILABLE_KEY,
+    StreamingReportWriter,
+)
+from routing import get_tier_usage
+from screening import RecordStore
+from search import get_search_broker
+from sensitivity import SensitivityEngine, SensitivityPlugin
+from tracing import RunTrace, TracingPlugin
+from workflow import get_research_workflow
+
+USER_ID = "batch_user"
+
+
+@dataclass
+class TickerResult:
+    """Outcome of analyzing a single ticker."""
+
+    ticker: str
+    latency: float
+    first_section_latency: Optional[float] = None
+    report_path: Optional[str] = None
+    state: Optional[dict] = None
+    trace: Optional[RunTrace] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def build_analysis_prompt(stock_query: str) -> str:
+    """Build the user message that kicks off an analysis."""
+    return (
+        f"Conduct a comprehensive investment analysis of {stock_query}. "
+        f"Provide factual, unbiased information across all research areas. "
+        f"Focus on delivering pure data and objective insights without speculation or bias."
+    )
+
+
+def load_watchlist(path: str) -> list[str]:
+    """Read tickers from a watchlist file.
+
+    Tickers may be separated by newlines, commas or whitespace. Blank lines
+    and anything after a ``#`` are ignored.
+
+    Args:
+        path: Path of the watchlist file.
+
+    Returns:
+        list[str]: The tickers in file order, without duplicates.
+    """
+    tickers = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0]
+            tickers.extend(line.replace(",", " ").split())
+    return dedupe_tickers(tickers)
+
+
+def dedupe_tickers(tickers: list[str]) -> list[str]:
+    """Normalize tickers to upper case and drop duplicates, keeping order."""
+    seen = set()
+    unique = []
+    for ticker in tickers:
+        ticker = ticker.strip().upper()
+        if ticker and ticker not in seen:
+            seen.add(ticker)
+            unique.append(ticker)
+    return unique
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values`` (``pct`` in 0-100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def create_runner(
+    cache: Optional[SectionCache] = None,
+    trace: bool = TRACE_ENABLED,
+    fundamentals: Optional[FundamentalsStore] = None,
+    sections: Optional[tuple[str, ...]] = None,
+    checkpoints: Optional[CheckpointStore] = None,
+    prices: Optional[PriceStore] = None,
+    sensitivity: Optional[SensitivityEngine] = None,
+    batch: bool = False,
+) -> Runner:
+    """Create a runner for the shared workflow.
+
+    One runner serves any number of tickers; each analysis gets its own
+    session in the runner's session service.
+
+    Args:
+        cache: Optional section cache; fresh sections skip their LLM calls.
+        trace: Record per-agent spans and write a trace next to each report.
+        fundamentals: Optional local fundamentals store for the debt,
+            dilution and short interest agents.
+        sections: Output keys of the sections to research; defaults to all.
+        checkpoints: Optional store that checkpoints finished sections so
+            interrupted runs can be resumed.
+        prices: Optional local price store the technical analysis agent
+            gets its indicators from.
+        sensitivity: Optional rate and market sensitivity engine for the
+            bond agent.
+        batch: The runner serves a batch, which the ``"auto"`` research
+            schedule gates on the screening agents.
+
+    Returns:
+        Runner: The runner for the process-wide workflow.
+    """
+    # Tracing goes first so it still sees agents other plugins short-circuit
+    plugins = []
+    if trace:
+        plugins.append(TracingPlugin())
+    if checkpoints is not None:
+        plugins.append(CheckpointPlugin(checkpoints))
+    if fundamentals is not None:
+        plugins.append(FundamentalsPlugin(fundamentals))
+    if prices is not None:
+        plugins.append(IndicatorsPlugin(prices))
+    if sensitivity is not None:
+        plugins.append(SensitivityPlugin(sensitivity))
+    if cache:
+        plugins.append(SectionCachePlugin(cache))
+    return Runner(
+        app_name=APP_NAME,
+        agent=get_research_workflow(sections, batch=batch),
+        session_service=InMemorySessionService(),
+        plugins=plugins,
+    )
+
+
+async def analyze_ticker(
+    stock_query: str,
+    runner: Runner,
+    echo: bool = False,
+    live_tokens: bool = False,
+    resume: bool = False,
+    on_section: Optional[Callable[[str, str], None]] = None,
+    archive: Optional[ReportArchive] = None,
+    records: Optional[RecordStore] = None,
+    shared_state: Optional[dict] = None,
+) -> TickerResult:
+    """Run the full workflow for one ticker in its own session.
+
+    The runner's event stream is consumed as it arrives: each section is
+    appended to the report as soon as its ``output_key`` is set, and the
+    report is rewritten in its final layout when the ticker finishes.
+
+    Args:
+        stock_query: The stock ticker or company name to analyze.
+        runner: Runner shared by every ticker in the batch.
+        echo: Print each section to the console as it arrives.
+        live_tokens: Stream the aggregator's recommendation token by token.
+        resume: Continue the ticker's last interrupted run, reusing its
+            checkpointed sections (needs a runner with checkpoints).
+        on_section: Called with the output key and text of each section
+            (and the recommendation) as soon as it is written.
+        archive: Optional archive the finished report is indexed in.
+        records: Optional store the run's scorecard is appended to.
+        shared_state: Extra initial session state shared with other runs,
+            e.g. the batch's macro context.
+
+    Returns:
+        TickerResult: Latency, time to first section, report path, final
+        state and trace of the run.
+    """
+    started = time.perf_counter()
+    first_section_latency = None
+    session_service = runner.session_service
+    tracer = runner.plugin_manager.get_plugin("tracing")
+    checkpoints = runner.plugin_manager.get_plugin("checkpoint")
+    session_id = f"{stock_query}-{uuid.uuid4().hex[:8]}"
+    state = {"stock_query": stock_query, **(shared_state or {})}
+    if resume and checkpoints is not None:
+        previous = checkpoints.store.load_latest(stock_query)
+        if previous is not None:
+            session_id, restored = previous
+            state.update(restored)
+            print(f"♻️  {stock_query}: resuming with {len(restored)} checkpointed sections")
+    run_config = RunConfig(
+        streaming_mode=StreamingMode.SSE if live_tokens else StreamingMode.NONE
+    )
+    try:
+        await session_service.create_session(
+            app_name=APP_NAME,
+            user_id=USER_ID,
+            session_id=session_id,
+            state=state,
+        )
+        message = types.UserContent(
+            parts=[types.Part(text=build_analysis_prompt(stock_query))]
+        )
+        writer = StreamingReportWriter(stock_query, echo=echo)
+        streamed_tokens = False
+        async for event in runner.run_async(
+            user_id=USER_ID,
+            session_id=session_id,
+            new_message=message,
+            run_config=run_config,
+        ):
+            if event.partial:
+                if live_tokens and event.author == "InvestmentAggregator" and event.content:
+                    if not streamed_tokens:
+                        print("\n📋 Investment Recommendation (live):\n")
+                        streamed_tokens = True
+                    for part in event.content.parts or []:
+                        if part.text:
+                            print(part.text, end="", flush=True)
+                continue
+            for key, value in event.actions.state_delta.items():
+                if key in SECTION_TITLES or key == RECOMMENDATION_KEY:
+                    if first_section_latency is None:
+                        first_section_latency = time.perf_counter() - started
+                    writer.add_section(
+                        key, value, echo=echo and not streamed_tokens
+                    )
+                    if on_section is not None:
+                        on_section(key, value)
+        if streamed_tokens:
+            print()
+
+        session = await session_service.get_session(
+            app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+        )
+        state = dict(session.state) if session else {}
+        report_path = writer.finalize(state)
+        trace = tracer.pop_trace(session_id) if tracer else None
+        if trace is not None:
+            trace.write(report_path)
+        latency = time.perf_counter() - started
+        if archive is not None:
+            totals = trace.totals() if trace is not None else {}
+            # Indexing takes a few ms; keep it off the event loop
+            await asyncio.to_thread(archive.add, stock_query, state, path=report_path, metrics={
+                "latency": latency,
+                "first_section_latency": first_section_latency,
+                "total_tokens": totals.get("total_tokens"),
+                "model_calls": totals.get("model_calls"),
+            })
+        if records is not None and state.get(RECORD_KEY):
+            await asyncio.to_thread(records.add, stock_query, state[RECORD_KEY], report_path)
+        return TickerResult(
+            ticker=stock_query,
+            latency=latency,
+            first_section_latency=first_section_latency,
+            report_path=report_path,
+            state=state,
+            trace=trace,
+        )
+    except Exception as e:
+        return TickerResult(
+            ticker=stock_query,
+            latency=time.perf_counter() - started,
+            trace=tracer.pop_trace(session_id) if tracer else None,
+            error=f"{type(e).__name__}: {e}",
+        )
+    finally:
+        # Drop the finished session so long batches don't accumulate state
+        await session_service.delete_session(
+            app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+        )
+
+
+async def run_batch(
+    tickers: list[str],
+    concurrency: int = BATCH_CONCURRENCY,
+    cache: Optional[SectionCache] = None,
+    echo: bool = False,
+    fundamentals: Optional[FundamentalsStore] = None,
+    sections: Optional[tuple[str, ...]] = None,
+    checkpoints: Optional[CheckpointStore] = None,
+    resume: bool = False,
+    archive: Optional[ReportArchive] = None,
+    records: Optional[RecordStore] = None,
+    macro: Optional[MacroContext] = None,
+    prices: Optional[PriceStore] = None,
+    sensitivity: Optional[SensitivityEngine] = None,
+) -> list[TickerResult]:
+    """Analyze many tickers concurrently on one event loop.
+
+    Args:
+        tickers: The tickers to analyze.
+        concurrency: Maximum number of tickers analyzed at the same time.
+        cache: Optional section cache shared by every ticker.
+        echo: Print each section to the console as it arrives.
+        fundamentals: Optional local fundamentals store shared by every ticker.
+        sections: Output keys of the sections to research; defaults to all.
+        checkpoints: Optional checkpoint store shared by every ticker.
+        resume: Continue each ticker's last interrupted run.
+        archive: Optional archive every finished report is indexed in.
+        records: Optional store every run's scorecard is appended to.
+        macro: Optional macro context researched once before the tickers
+            run and shared with each of them.
+        prices: Optional local price store shared by every ticker.
+        sensitivity: Optional sensitivity engine shared by every ticker.
+
+    Returns:
+        list[TickerResult]: One result per ticker, in completion order.
+    """
+    runner = create_runner(
+        cache, fundamentals=fundamentals, sections=sections, checkpoints=checkpoints,
+        prices=prices, sensitivity=sensitivity, batch=len(tickers) > 1,
+    )
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    if macro is not None and macro.topics:
+        print(f"🌐 Researching shared macro context ({', '.join(macro.topics)})...")
+        await macro.prepare(tickers)
+
+    async def _run_one(ticker: str) -> TickerResult:
+        async with semaphore:
+            return await analyze_ticker(
+                ticker, runner, echo=echo, resume=resume, archive=archive,
+                records=records,
+                shared_state=macro.state_for(ticker, sections) if macro else None,
+            )
+
+    results = []
+    tasks = [asyncio.create_task(_run_one(ticker)) for ticker in tickers]
+    for done, future in enumerate(asyncio.as_completed(tasks), start=1):
+        result = await future
+        results.append(result)
+        if result.ok:
+            print(f"✅ [{done}/{len(tickers)}] {result.ticker} "
+                  f"({result.latency:.1f}s) → {result.report_path}")
+        else:
+            print(f"❌ [{done}/{len(tickers)}] {result.ticker} "
+                  f"({result.latency:.1f}s): {result.error}")
+    return results
+
+
+def print_batch_summary(
+    results: list[TickerResult],
+    wall_time: float,
+    cache: Optional[SectionCache] = None,
+    fundamentals: Optional[FundamentalsStore] = None,
+    checkpoints: Optional[CheckpointStore] = None,
+    archive: Optional[ReportArchive] = None,
+    records: Optional[RecordStore] = None,
+    macro: Optional[MacroContext] = None,
+    prices: Optional[PriceStore] = None,
+    sensitivity: Optional[SensitivityEngine] = None,
+) -> None:
+    """Print throughput and per-ticker latency statistics for a batch."""
+    latencies = [r.latency for r in results if r.ok]
+    first_sections = [
+        r.first_section_latency for r in results
+        if r.ok and r.first_section_latency is not None
+    ]
+    failed = sum(1 for r in results if not r.ok)
+    throughput = len(latencies) / wall_time * 60 if wall_time > 0 else 0.0
+
+    print("\n" + "=" * 50)
+    print("📈 Batch Summary")
+    print("=" * 50)
+    print(f"Tickers:      {len(results)} ({len(latencies)} ok, {failed} failed)")
+    print(f"Wall time:    {wall_time:.1f}s")
+    print(f"Throughput:   {throughput:.2f} tickers/min")
+    print(f"Latency p50:  {percentile(latencies, 50):.1f}s")
+    print(f"Latency p95:  {percentile(latencies, 95):.1f}s")
+    print(f"1st section:  {percentile(first_sections, 50):.1f}s p50, "
+          f"{percentile(first_sections, 95):.1f}s p95")
+    cut_off = [
+        r.state[UNAVAILABLE_KEY] for r in results
+        if r.ok and r.state and r.state.get(UNAVAILABLE_KEY)
+    ]
+    if cut_off:
+        print(f"Cut off:      {sum(map(len, cut_off))} sections in {len(cut_off)} tickers "
+              f"(marked unavailable)")
+    gates = [r.state[GATE_KEY] for r in results if r.ok and r.state and r.state.get(GATE_KEY)]
+    if gates:
+        screens = Counter(SECTION_TITLES.get(gate["section"], gate["section"]) for gate in gates)
+        by_screen = ", ".join(f"{title} {n}" for title, n in screens.most_common())
+        skipped = sum(gate["calls_skipped"] for gate in gates)
+        cancelled = sum(len(gate["cancelled"]) for gate in gates)
+        saved = sum(gate["seconds_saved"] for gate in gates)
+        print(f"Gated:        {len(gates)} of {len(latencies)} tickers ruled out early "
+              f"({by_screen}); {skipped} calls skipped, {cancelled} agents cancelled, "
+              f"≈{saved:.0f}s saved (≈{saved / len(gates):.1f}s per ticker)")
+    if cache is not None:
+        print(f"Cache:        {cache.summary()}")
+    if fundamentals is not None:
+        print(f"Fundamentals: {fundamentals.summary()}")
+    if prices is not None:
+        print(f"Prices:       {prices.summary()}")
+    if sensitivity is not None:
+        print(f"Sensitivity:  {sensitivity.summary()}")
+    if checkpoints is not None:
+        print(f"Checkpoints:  {checkpoints.summary()}")
+    if archive is not None:
+        print(f"Archive:      {archive.summary()}")
+    if records is not None:
+        print(f"Records:      {records.summary()}")
+    if macro is not None and macro.topics:
+        print(f"Macro:        {macro.summary()}")
+    compactions = [
+        r.state[COMPACTION_KEY] for r in results
+        if r.ok and r.state and COMPACTION_KEY in r.state
+    ]
+    if compactions:
+        methods = [
+            section["method"] for stats in compactions
+            for section in stats["sections"].values()
+        ]
+        post = [stats["post_tokens"] for stats in compactions]
+        print(f"Compaction:   {sum(s['pre_tokens'] for s in compactions) / len(compactions):,.0f} → "
+              f"{sum(post) / len(post):,.0f} aggregator input tokens/ticker (max {max(post):,}), "
+              f"{methods.count('summarized')} sections summarized, "
+              f"{methods.count('truncated')} truncated")
+    if SEARCH_MODE != "builtin":
+        print(f"Search:       {get_search_broker().summary()}")
+    print(f"Rate limit:   {get_limiter().summary()}")
+    if HEDGING_ENABLED:
+        print(f"Hedging:      {get_hedger().summary()}")
+    if get_tier_usage().tiers:
+        print("\n" + get_tier_usage().summary_table(tickers=len(latencies)))
+
+    traces = [r.trace for r in results if r.ok and r.trace is not None]
+    if traces:
+        print_agent_summary(traces)
+
+
+def print_agent_summary(traces: list[RunTrace]) -> None:
+    """Print per-agent latency and token totals aggregated over many runs."""
+    durations: dict[str, list[float]] = {}
+    tokens: dict[str, int] = {}
+    for trace in traces:
+        for span in trace.agent_spans(leaf_only=True):
+            durations.setdefault(span.agent, []).append(span.duration)
+            tokens[span.agent] = tokens.get(span.agent, 0) + sum(
+                call.attrs.get("total_tokens", 0) for call in trace.model_spans(span.agent)
+            )
+    total_tokens = sum(trace.totals()["total_tokens"] for trace in traces)
+    critical = {}
+    for trace in traces:
+        for span in trace.critical_path():
+            critical[span.agent] = critical.get(span.agent, 0) + 1
+
+    print(f"\n{'Agent':<28}{'p50':>8}{'p95':>8}{'Tokens':>10}{'Critical':>10}")
+    by_p95 = sorted(durations, key=lambda name: -percentile(durations[name], 95))
+    for name in by_p95:
+        print(f"{name[:28]:<28}{percentile(durations[name], 50):>7.1f}s"
+              f"{percentile(durations[name], 95):>7.1f}s{tokens[name]:>10,}"
+              f"{critical.get(name, 0):>10}")
+    print(f"🔢 Total tokens: {total_tokens:,} "
+          f"({total_tokens // max(1, len(traces)):,} per ticker)")
@@ -0,0 +1,100 @@
+"""Benchmark the report archive at tens of thousands of reports.
+
+Fills a fresh archive with synthetic reports (every section of the
+registry, a few hundred words each, spread over many tickers and dates),
+then times the queries the CLI runs: latest report per ticker, one
+ticker's history and full-text search.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_archive --reports 20000 --tickers 2000
+"""
+import argparse
+import itertools
+import os
+import random
+import tempfile
+import time
+
+from archive import ReportArchive
+from report import RECOMMENDATION_KEY, SECTION_TITLES
+
+_TERMS = (
+    "revenue margin growth cloud debt buyback dilution dividend guidance "
+    "competition regulation valuation cash flow insider analyst upgrade "
+    "downgrade momentum support resistance volatility sentiment moat brand"
+).split()
+# Word frequencies in real text follow Zipf's law; the domain terms sit
+# among the moderately common words, as they would in real reports
+_VOCABULARY = [f"w{i}" for i in range(1000)] + _TERMS + [f"w{i}" for i in range(1000, 20000)]
+_CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(_VOCABULARY))))
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choices(_VOCABULARY, cum_weights=_CUM_WEIGHTS, k=words))
+
+
+def _timed(fn, repeat: int = 5) -> tuple[float, object]:
+    """Median milliseconds of ``repeat`` calls, and the last result."""
+    times, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return sorted(times)[len(times) // 2], result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reports", type=int, default=20000)
+    parser.add_argument("--tickers", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=150, help="Words per section.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_archive_"), "archive.sqlite3")
+    archive = ReportArchive(path)
+    tickers = [f"T{i:04d}" for i in range(args.tickers)]
+    start_date = time.time() - 365 * 86400
+
+    started = time.perf_counter()
+    for i in range(args.reports):
+        state = {
+            key: _text(rng, args.words) for key in SECTION_TITLES
+        }
+        state[RECOMMENDATION_KEY] = (
+            f"**Investment Recommendation: {rng.choice(['BUY', 'HOLD', 'AVOID'])}**\n\n"
+            + _text(rng, args.words)
+        )
+        archive.add(
+            rng.choice(tickers), state,
+            path=f"analysis/report_{i}.md",
+            created_at=start_date + rng.random() * 365 * 86400,
+            metrics={"latency": rng.uniform(30, 120)},
+        )
+    insert_s = time.perf_counter() - started
+    optimize_s, _ = _timed(archive.optimize, repeat=1)
+
+    latest_ms, latest = _timed(archive.latest)
+    history_ms, history = _timed(lambda: archive.history(tickers[0]))
+    search_ms, hits = _timed(lambda: archive.search("buyback AND dilution", limit=20))
+    ticker_search_ms, _ = _timed(lambda: archive.search("moat", ticker=tickers[1], limit=20))
+    size_mb = sum(
+        os.path.getsize(path + suffix) for suffix in ("", "-wal") if os.path.exists(path + suffix)
+    ) / 2**20
+    archive.close()
+
+    print(f"📊 Archive benchmark ({args.reports:,} reports, {args.tickers:,} tickers, "
+          f"{len(SECTION_TITLES) + 1} sections × {args.words} words)")
+    print("=" * 60)
+    print(f"Insert:            {insert_s:.1f}s ({args.reports / insert_s:,.0f} reports/s), "
+          f"{size_mb:.0f} MB on disk, index optimized in {optimize_s / 1000:.1f}s")
+    print(f"Latest per ticker: {latest_ms:8.1f} ms ({len(latest):,} tickers)")
+    print(f"History:           {history_ms:8.2f} ms ({len(history)} reports)")
+    print(f"Search:            {search_ms:8.1f} ms ({len(hits)} hits)")
+    print(f"Search one ticker: {ticker_search_ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
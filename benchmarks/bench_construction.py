@@ -0,0 +1,103 @@
+"""Benchmark workflow construction and connection pools for many tickers.
+
+Compares the old per-ticker pattern (a fresh agent tree with one Gemini
+client per agent for every ticker) with the shared, build-once workflow.
+Pools are counted as distinct ``httpx.AsyncClient`` instances; each one
+keeps its own keep-alive connections, so the pool count bounds how many
+connections the process can hold open.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_construction --tickers 100
+"""
+import argparse
+import contextlib
+import io
+import time
+
+import httpx
+from google.adk.agents import LlmAgent
+from google.adk.models.google_llm import Gemini
+
+from config import MODEL_NAME, RETRY_CONFIG
+from models import base_model, get_http_client
+from workflow import create_research_workflow, get_research_workflow
+
+# httpx.AsyncClient default when no limits are given
+DEFAULT_POOL_SIZE = 100
+
+
+def _llm_agents(root) -> list[LlmAgent]:
+    agents = []
+    stack = [root]
+    while stack:
+        agent = stack.pop()
+        if isinstance(agent, LlmAgent):
+            agents.append(agent)
+        stack.extend(agent.sub_agents)
+    return agents
+
+
+def _pool_of(model: Gemini) -> httpx.AsyncClient:
+    return base_model(model).api_client._api_client._async_httpx_client
+
+
+def _count_distinct(objects: list) -> int:
+    return len({id(obj) for obj in objects})
+
+
+def build_per_ticker(tickers: list[str]) -> tuple[float, int, int]:
+    """Old pattern: new tree and one client per agent for every ticker."""
+    # Keep every tree alive so object ids are not reused while counting
+    roots, models, pools = [], [], []
+    started = time.perf_counter()
+    for _ in tickers:
+        root = create_research_workflow()
+        for agent in _llm_agents(root):
+            agent.model = Gemini(model=MODEL_NAME, retry_options=RETRY_CONFIG)
+            models.append(agent.model)
+            pools.append(_pool_of(agent.model))
+        roots.append(root)
+    elapsed = time.perf_counter() - started
+    return elapsed, _count_distinct(models), _count_distinct(pools)
+
+
+def build_shared(tickers: list[str]) -> tuple[float, int, int]:
+    """New pattern: one workflow and one pooled client for all tickers."""
+    models, pools = [], []
+    started = time.perf_counter()
+    for _ in tickers:
+        root = get_research_workflow()
+        for agent in _llm_agents(root):
+            models.append(agent.model)
+            pools.append(_pool_of(agent.model))
+    elapsed = time.perf_counter() - started
+    return elapsed, _count_distinct(models), _count_distinct(pools)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=100)
+    args = parser.parse_args()
+    tickers = [f"T{i:04d}" for i in range(args.tickers)]
+
+    # Silence the workflow's progress prints while timing
+    with contextlib.redirect_stdout(io.StringIO()):
+        before_time, before_models, before_pools = build_per_ticker(tickers)
+        after_time, after_models, after_pools = build_shared(tickers)
+
+    shared_pool_size = get_http_client()._transport._pool._max_connections
+
+    print(f"📊 Workflow construction for {args.tickers} tickers")
+    print("=" * 64)
+    print(f"{'':<22}{'time':>10}{'models':>10}{'pools':>8}{'max conns':>14}")
+    print(f"{'per-ticker (before)':<22}{before_time:>9.3f}s{before_models:>10}"
+          f"{before_pools:>8}{before_pools * DEFAULT_POOL_SIZE:>14}")
+    print(f"{'shared (after)':<22}{after_time:>9.3f}s{after_models:>10}"
+          f"{after_pools:>8}{after_pools * shared_pool_size:>14}")
+    if after_time > 0:
+        print(f"\n⚡ Construction speedup: {before_time / after_time:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark vectorized fundamentals metrics over a synthetic universe.
+
+Writes a store with ``--tickers`` tickers and ``--quarters`` quarterly
+filings each, then times opening the memory-mapped store and computing
+every metric for the whole universe.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_fundamentals --tickers 5000
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from fundamentals import FundamentalsStore, write_store
+
+
+def synthetic_columns(tickers: int, quarters: int, seed: int = 0) -> dict[str, np.ndarray]:
+    """Random but plausible quarterly filings for ``tickers`` companies."""
+    rng = np.random.default_rng(seed)
+    rows = tickers * quarters
+    names = np.array([f"T{i:05d}" for i in range(tickers)])
+    quarter_ends = np.datetime64("2025-06-30") - np.arange(quarters)[::-1] * 91
+    shares = rng.uniform(5e7, 5e9, tickers)[:, None] * np.cumprod(
+        1 + rng.normal(0, 0.01, (tickers, quarters)), axis=1
+    )
+    columns = {
+        "ticker": np.repeat(names, quarters),
+        "period_end": np.tile(quarter_ends, tickers),
+        "total_debt": rng.uniform(0, 5e10, rows),
+        "cash": rng.uniform(0, 2e10, rows),
+        "total_equity": rng.uniform(-1e9, 8e10, rows),
+        "net_income": rng.normal(2e9, 3e9, rows),
+        "shares_outstanding": shares.ravel(),
+        "shares_short": shares.ravel() * rng.uniform(0, 0.3, rows),
+        "float_shares": shares.ravel() * 0.9,
+        "avg_daily_volume": shares.ravel() * rng.uniform(0.002, 0.02, rows),
+    }
+    # Blank out some values the way real extracts have gaps
+    for name in ("shares_short", "net_income"):
+        columns[name][rng.random(rows) < 0.1] = np.nan
+    return columns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=5000)
+    parser.add_argument("--quarters", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        started = time.perf_counter()
+        meta = write_store(synthetic_columns(args.tickers, args.quarters), store_dir)
+        build_time = time.perf_counter() - started
+
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            store = FundamentalsStore(store_dir)
+            metrics = store.metrics()
+            timings.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for ticker in store.tickers[:1000]:
+            store.lookup(str(ticker))
+        lookup_time = (time.perf_counter() - started) / min(1000, len(store))
+
+    print(f"📊 Fundamentals store: {meta['tickers']} tickers, {meta['rows']} rows")
+    print("=" * 50)
+    print(f"Build store:       {build_time:.3f}s")
+    print(f"Open + metrics:    {min(timings) * 1000:.1f}ms best, "
+          f"{max(timings) * 1000:.1f}ms worst of {args.repeat}")
+    print(f"Lookup per ticker: {lookup_time * 1e6:.1f}µs")
+    print(f"Metrics:           {len(metrics)} "
+          f"({np.isfinite(metrics['debt_to_equity']).sum()} tickers with debt-to-equity)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Measure the calls and time gated research scheduling saves in screening.
+
+Runs the same batch three times on the offline backend: with every
+research agent started at once (``RESEARCH_SCHEDULE=flat``), eager (all
+started at once, and a hard AVOID from the ethics or debt screen cancels
+the agents still running and skips the aggregator and the scorecard) and
+gated, where the expensive agents wait for the screens and are skipped
+instead. The fake screens reject each ticker with ``--reject-rate``
+probability, as in a large screening batch where most names fail.
+Compares completed model calls, tokens, cost and latency, and the
+measured saving with the estimate the batch summary prints. Tickers that
+pass their screens should take no longer eager, and longer gated. Calls
+cancelled mid-flight are not counted, though a live API may still bill
+their input tokens, so gated saves more than eager in practice.
+
+At a small ``--latency-scale`` with few concurrent tickers the runs are
+bound by the event loop, not the simulated calls. Rejected tickers then
+free their slots sooner, and the next tickers' agents slow down the ones
+still running.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_gating --tickers 200 --reject-rate 0.7
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import math
+import os
+import tempfile
+
+# Keep benchmark reports out of the real analysis directory; must be set
+# before the project modules read their configuration.
+os.environ["ANALYSIS_DIR"] = tempfile.mkdtemp(prefix="bench_analysis_")
+
+from google.adk.runners import Runner  # noqa: E402
+from google.adk.sessions import InMemorySessionService  # noqa: E402
+
+from batch import analyze_ticker, percentile  # noqa: E402
+from config import APP_NAME  # noqa: E402
+from fake_llm import FakeBackendConfig  # noqa: E402
+from models import use_backend  # noqa: E402
+from registry import AGENT_SPECS, PROFILES, resolve_sections  # noqa: E402
+from report import GATE_KEY  # noqa: E402
+from routing import get_tier_usage  # noqa: E402
+from tracing import TracingPlugin  # noqa: E402
+from workflow import create_research_workflow  # noqa: E402
+
+
+async def run(tickers: list[str], sections: tuple[str, ...], schedule: str, concurrency: int) -> dict:
+    """Analyze ``tickers`` with one schedule and total calls, tokens and latency."""
+    usage = get_tier_usage()
+    usage.reset()
+    with contextlib.redirect_stdout(io.StringIO()):
+        runner = Runner(
+            app_name=APP_NAME,
+            agent=create_research_workflow(sections, schedule=schedule),
+            session_service=InMemorySessionService(),
+            plugins=[TracingPlugin()],
+        )
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _run_one(ticker: str):
+            async with semaphore:
+                return await analyze_ticker(ticker, runner)
+
+        results = await asyncio.gather(*(_run_one(ticker) for ticker in tickers))
+    ok = [r for r in results if r.ok]
+    return {
+        "results": {r.ticker: r for r in ok},
+        "failed": len(results) - len(ok),
+        "calls": sum(stats.calls for stats in usage.tiers.values()),
+        "tokens": sum(r.trace.totals()["total_tokens"] for r in ok if r.trace is not None),
+        "cost": usage.cost,
+        "latency": percentile([r.latency for r in ok], 50),
+    }
+
+
+async def compare(tickers, sections, concurrency) -> dict[str, dict]:
+    # One event loop for every run; the shared model clients are bound to it
+    return {
+        schedule: await run(tickers, sections, schedule, concurrency)
+        for schedule in ("flat", "eager", "gated")
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=200)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="full")
+    parser.add_argument("--reject-rate", type=float, default=0.7,
+                        help="chance a ticker fails at least one screen")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-scale", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sections = resolve_sections(profile=args.profile)
+    gated = [key for key in sections if AGENT_SPECS[key].gate]
+    # Split the reject rate evenly over the screens: 1 - (1 - rate)^n = reject rate
+    rate = 1 - (1 - args.reject_rate) ** (1 / max(1, len(gated)))
+    use_backend("fake", config=FakeBackendConfig(
+        seed=args.seed, latency_scale=args.latency_scale,
+        gate_rates={AGENT_SPECS[key].name: rate for key in gated},
+    ))
+    tickers = [f"T{i:04d}" for i in range(args.tickers)]
+    runs = asyncio.run(compare(tickers, sections, args.concurrency))
+    flat = runs["flat"]
+
+    def mean_latency(run: dict, names: list[str]) -> float:
+        return sum(run["results"][t].latency for t in names) / len(names) if names else math.nan
+
+    # The fake screens answer the same for a ticker under every schedule
+    ruled_out = {t for t, r in runs["gated"]["results"].items() if r.state.get(GATE_KEY)}
+    rejected = [t for t in flat["results"] if t in ruled_out]
+    passed = [t for t in flat["results"] if t not in ruled_out]
+    print(f"⛔ Gating benchmark ({args.tickers} tickers, {args.profile} profile, "
+          f"{len(ruled_out)} ruled out by {', '.join(gated) or 'no screens'})")
+    print("=" * 72)
+    print(f"{'':<14}{'calls':>8}{'saved':>7}{'tokens':>12}{'cost':>9}{'p50':>8}"
+          f"{'ruled out':>11}{'passed':>8}")
+    for schedule, m in runs.items():
+        print(f"{schedule:<14}{m['calls']:>8,}{1 - m['calls'] / max(1, flat['calls']):>7.0%}"
+              f"{m['tokens']:>12,}{m['cost']:>9.4f}{m['latency']:>7.2f}s"
+              f"{mean_latency(m, rejected):>10.2f}s{mean_latency(m, passed):>7.2f}s")
+        if schedule == "flat":
+            continue
+        gates = [r.state[GATE_KEY] for r in m["results"].values() if r.state.get(GATE_KEY)]
+        measured = mean_latency(flat, rejected) - mean_latency(m, rejected)
+        estimated = sum(g["seconds_saved"] for g in gates) / len(gates) if gates else math.nan
+        print(f"{'':<14}{sum(g['calls_skipped'] for g in gates):,} calls skipped, "
+              f"{sum(len(g['cancelled']) for g in gates):,} agents cancelled mid-call, "
+              f"{measured:.2f}s saved per ruled-out ticker (estimated {estimated:.2f}s)")
+    failed = sum(m["failed"] for m in runs.values())
+    if failed:
+        print(f"⚠️  {failed} tickers failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Benchmark local technical indicators over a synthetic price universe.
+
+Writes a store with ``--tickers`` tickers and ``--years`` of daily bars,
+then times the first full indicator pass, opening the store with its saved
+state, appending one bar at a time and per-ticker lookups. The state after
+the appends is checked against a recomputation from scratch.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_indicators --tickers 5000 --years 10
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from indicators import FIELDS, PriceStore, advance, new_state, write_store
+
+BARS_PER_YEAR = 252
+
+
+def synthetic_bars(bars: int, tickers: int, seed: int = 0) -> dict[str, np.ndarray]:
+    """Random-walk daily OHLCV matrices of shape ``(bars, tickers)``."""
+    rng = np.random.default_rng(seed)
+    volatility = rng.uniform(0.01, 0.04, tickers).astype(np.float32)
+    returns = rng.standard_normal((bars, tickers), dtype=np.float32) * volatility
+    close = rng.uniform(5, 500, tickers).astype(np.float32) * np.exp(
+        np.cumsum(returns, axis=0, dtype=np.float32)
+    )
+    del returns
+    spread = np.abs(rng.standard_normal((bars, tickers), dtype=np.float32)) * volatility * close
+    columns = {
+        "open": close * (1 + rng.standard_normal((bars, tickers), dtype=np.float32) * volatility / 4),
+        "high": close + spread,
+        "low": close - spread,
+        "close": close,
+        "volume": rng.uniform(1e5, 1e7, (bars, tickers)).astype(np.float32),
+    }
+    # Some tickers list partway through, with no bars before
+    listed = rng.integers(0, bars, tickers)
+    late = rng.random(tickers) < 0.1
+    missing = np.arange(bars)[:, None] < np.where(late, listed, 0)[None, :]
+    for values in columns.values():
+        values[missing] = np.nan
+    return columns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=5000)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--appends", type=int, default=5)
+    args = parser.parse_args()
+
+    bars = args.years * BARS_PER_YEAR
+    columns = synthetic_bars(bars + args.appends, args.tickers)
+    tickers = np.array([f"T{i:05d}" for i in range(args.tickers)])
+    dates = np.busday_offset("2015-01-02", np.arange(bars + args.appends), roll="forward")
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        started = time.perf_counter()
+        meta = write_store(
+            tickers, dates[:bars], {name: columns[name][:bars] for name in FIELDS}, store_dir
+        )
+        build_time = time.perf_counter() - started
+        size = sum(os.path.getsize(os.path.join(store_dir, f)) for f in os.listdir(store_dir))
+
+        started = time.perf_counter()
+        PriceStore(store_dir).indicators()
+        full_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        store = PriceStore(store_dir)
+        store.indicators()
+        warm_time = time.perf_counter() - started
+
+        append_times = []
+        for bar in range(bars, bars + args.appends):
+            started = time.perf_counter()
+            store.append(dates[bar:bar + 1], {name: columns[name][bar:bar + 1] for name in FIELDS})
+            indicators = store.indicators()
+            append_times.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for ticker in store.tickers[:1000]:
+            store.lookup(str(ticker))
+        lookup_time = (time.perf_counter() - started) / min(1000, len(store))
+
+        # Appending bar by bar must give the same state as one full pass
+        reference = new_state(len(tickers))
+        advance(reference, columns["high"], columns["low"], columns["close"])
+        state = store.state()
+        matches = all(
+            np.allclose(state[name], reference[name], equal_nan=True) for name in reference
+        )
+
+    print(f"📈 Price store: {meta['tickers']} tickers × {meta['bars']} daily bars "
+          f"({size / 1e6:.0f} MB)")
+    print("=" * 50)
+    print(f"Build store:           {build_time:.3f}s")
+    print(f"Full indicator pass:   {full_time:.3f}s")
+    print(f"Open with saved state: {warm_time * 1000:.1f}ms")
+    print(f"Append 1 bar + update: {min(append_times) * 1000:.1f}ms best, "
+          f"{max(append_times) * 1000:.1f}ms worst of {args.appends}")
+    print(f"Lookup per ticker:     {lookup_time * 1e6:.1f}µs")
+    print(f"Indicators:            {len(indicators) - 1} "
+          f"({np.isfinite(indicators['sma_200']).sum()} tickers with a 200-day average)")
+    print(f"Incremental == full:   {'yes' if matches else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Measure the searches and tokens the shared macro context saves.
+
+Runs the same batch twice on the offline backend, once with every ticker's
+agents researching the rates, market and sector backdrop themselves and
+once with ``MacroContext`` researching it once for the batch. Counts every
+search and token, including the shared research and sector
+classification, and compares the measured saving with the estimate the
+batch summary prints.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_macro --tickers 300
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+
+# Keep benchmark reports out of the real analysis directory; must be set
+# before the project modules read their configuration.
+os.environ["ANALYSIS_DIR"] = tempfile.mkdtemp(prefix="bench_analysis_")
+
+from batch import run_batch  # noqa: E402
+from fake_llm import FakeBackendConfig  # noqa: E402
+from macro import MacroContext  # noqa: E402
+from models import use_backend  # noqa: E402
+from registry import PROFILES, resolve_sections  # noqa: E402
+from routing import get_tier_usage  # noqa: E402
+
+
+async def run(tickers: list[str], sections: tuple[str, ...], shared: bool) -> dict:
+    """Analyze ``tickers`` and total their searches, tokens and cost."""
+    usage = get_tier_usage()
+    usage.reset()
+    macro = MacroContext(sections) if shared else None
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = await run_batch(tickers, concurrency=50, sections=sections, macro=macro)
+    totals = [r.trace.totals() for r in results if r.ok and r.trace is not None]
+    return {
+        "failed": sum(1 for r in results if not r.ok),
+        # Shared research is one grounded search per call; classification is none
+        "searches": sum(t["searches"] for t in totals) + (macro.researched if macro else 0),
+        "tokens": sum(t["total_tokens"] for t in totals) + (macro.tokens if macro else 0),
+        "cost": usage.cost,
+        "macro": macro,
+    }
+
+
+async def compare(tickers: list[str], sections: tuple[str, ...]) -> tuple[dict, dict]:
+    # One event loop for both runs; the shared model clients are bound to it
+    return await run(tickers, sections, shared=False), await run(tickers, sections, shared=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=300)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="full")
+    parser.add_argument("--latency-scale", type=float, default=0.001)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    use_backend("fake", config=FakeBackendConfig(seed=args.seed, latency_scale=args.latency_scale))
+    tickers = [f"T{i:04d}" for i in range(args.tickers)]
+    sections = resolve_sections(profile=args.profile)
+    before, after = asyncio.run(compare(tickers, sections))
+    macro = after["macro"]
+
+    print(f"📊 Macro context benchmark ({args.tickers} tickers, {args.profile} profile, "
+          f"topics: {', '.join(macro.topics) or 'none'})")
+    print("=" * 60)
+    print(f"{'':<22}{'searches':>10}{'tokens':>14}{'cost':>10}")
+    for label, m in (("per-ticker research", before), ("shared macro context", after)):
+        print(f"{label:<22}{m['searches']:>10,}{m['tokens']:>14,}{m['cost']:>10.4f}")
+    saved_searches = before["searches"] - after["searches"]
+    saved_tokens = before["tokens"] - after["tokens"]
+    print(f"{'saved':<22}{saved_searches:>10,}{saved_tokens:>14,}"
+          f"{before['cost'] - after['cost']:>10.4f}"
+          f"  ({saved_searches / max(1, before['searches']):.0%} of searches, "
+          f"{saved_tokens / max(1, before['tokens']):.0%} of tokens)")
+    print(f"estimated by the run  {macro.saved_searches:>10,}{macro.saved_tokens:>14,}")
+    if before["failed"] or after["failed"]:
+        print(f"⚠️  {before['failed'] + after['failed']} tickers failed")
+
+
+if __name__ == "__main__":
+    main()
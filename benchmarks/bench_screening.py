@@ -0,0 +1,97 @@
+"""Benchmark screening the records store over a year of daily runs.
+
+Fills a fresh records dataset with synthetic scorecards (``--tickers``
+tickers analyzed once a day for ``--days`` days, one file per day),
+compacts it to one file per month, then times the screens the CLI runs:
+the latest record per ticker with a multi-column filter, a date-pruned
+screen and a scan of every record.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_screening --tickers 500 --days 250
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, datetime, time as day_time, timedelta, timezone
+
+from registry import ALL_SECTIONS
+from screening import VERDICTS, RecordStore, screen
+
+_RISKS = ("valuation", "competition", "regulation", "leverage", "dilution",
+          "rate sensitivity", "execution", "customer concentration")
+
+
+def _record(rng: random.Random) -> dict:
+    return {
+        "verdict": rng.choice(VERDICTS),
+        "confidence": round(rng.random(), 2),
+        "risk_score": rng.randint(1, 10),
+        "section_scores": [
+            {"section": key, "score": rng.randint(1, 5)} for key in ALL_SECTIONS
+        ],
+        "key_risks": rng.sample(_RISKS, 3),
+    }
+
+
+def _timed(fn, repeat: int = 5) -> tuple[float, object]:
+    """Median milliseconds of ``repeat`` calls, and the last result."""
+    times, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return sorted(times)[len(times) // 2], result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--days", type=int, default=250)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_screening_"), "records")
+    tickers = [f"T{i:04d}" for i in range(args.tickers)]
+    store = RecordStore(path, batch_size=args.tickers, flush_interval=float("inf"))
+    first_day = date.today() - timedelta(days=args.days - 1)
+
+    started = time.perf_counter()
+    for offset in range(args.days):
+        day = datetime.combine(first_day + timedelta(days=offset), day_time(16), timezone.utc)
+        for ticker in tickers:
+            store.add(ticker, _record(rng), f"analysis/{ticker}_{offset}.md",
+                      created_at=day.timestamp() + rng.random() * 3600)
+    store.close()
+    write_s = time.perf_counter() - started
+    compact_ms, _ = _timed(store.compact, repeat=1)
+    size_mb = sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names
+    ) / 2**20
+    records = args.tickers * args.days
+
+    latest_ms, latest = _timed(lambda: screen(
+        path, verdicts=["BUY"], max_risk=4, min_confidence=0.7,
+        min_scores={"debt_analysis": 4},
+    ))
+    recent_ms, recent = _timed(lambda: screen(
+        path, verdicts=["BUY"], since=first_day + timedelta(days=args.days - 30), latest=False,
+    ))
+    scan_ms, scanned = _timed(lambda: screen(path, min_confidence=0.9, latest=False))
+
+    print(f"📊 Screening benchmark ({records:,} records, {args.tickers:,} tickers × "
+          f"{args.days} days, {len(ALL_SECTIONS)} section scores)")
+    print("=" * 60)
+    print(f"Write:             {write_s:.1f}s ({records / write_s:,.0f} records/s), "
+          f"{size_mb:.1f} MB on disk, compacted in {compact_ms / 1000:.1f}s")
+    print(f"Latest + filters:  {latest_ms:8.1f} ms ({latest.num_rows:,} tickers)")
+    print(f"Last 30 days:      {recent_ms:8.1f} ms ({recent.num_rows:,} records)")
+    print(f"Full scan:         {scan_ms:8.1f} ms ({scanned.num_rows:,} records)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark rolling rate and market sensitivity over a synthetic universe.
+
+Prices follow a two-factor model with known betas to the market and to
+daily 10-year yield changes. The benchmark writes a price store, then times
+the first pass over every window, opening with the saved sums and appending
+one bar at a time. It checks the incremental sums against a pass from
+scratch and the estimated betas against the true ones.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_sensitivity --tickers 5000 --years 10
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_indicators import BARS_PER_YEAR
+from indicators import FIELDS, PriceStore, write_store
+from sensitivity import STATE_FILE, SensitivityEngine
+
+RATES, MARKET = "DGS10", "SPY"
+
+
+def synthetic_universe(bars: int, tickers: int, seed: int = 0):
+    """Closes driven by the market and the yield, with the true betas.
+
+    Returns:
+        tuple: ``(names, closes, market_beta, yield_beta)``; the last two
+        columns of ``closes`` are the yield and the market index.
+    """
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0.0003, 0.01, bars)
+    rates = rng.normal(0.0, 0.05, bars)  # daily yield change in points
+    market_beta = rng.uniform(0.5, 1.8, tickers)
+    yield_beta = rng.uniform(-0.15, 0.05, tickers)
+    returns = rng.normal(0.0, 0.015, (bars, tickers)).astype(np.float32)
+    returns += (market[:, None] * market_beta + rates[:, None] * yield_beta).astype(np.float32)
+    closes = np.empty((bars, tickers + 2), dtype=np.float32)
+    closes[:, :tickers] = rng.uniform(5, 500, tickers) * np.exp(np.cumsum(returns, axis=0))
+    closes[:, tickers] = 3.0 + np.cumsum(rates)
+    closes[:, tickers + 1] = 4000 * np.exp(np.cumsum(market))
+    names = np.array([f"T{i:05d}" for i in range(tickers)] + [RATES, MARKET])
+    return names, closes, market_beta, yield_beta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=5000)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--appends", type=int, default=5)
+    args = parser.parse_args()
+
+    bars = args.years * BARS_PER_YEAR
+    names, closes, market_beta, yield_beta = synthetic_universe(
+        bars + args.appends, args.tickers
+    )
+    dates = np.busday_offset("2015-01-02", np.arange(bars + args.appends), roll="forward")
+    # Appended rows must be in store (sorted ticker) order
+    order = np.argsort(names)
+    index = np.argsort(order)[:args.tickers]
+    names, closes = names[order], closes[:, order]
+
+    def rows(start: int, end: int) -> dict[str, np.ndarray]:
+        block = closes[start:end]
+        return {name: block for name in FIELDS}
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        write_store(names, dates[:bars], rows(0, bars), store_dir)
+        PriceStore(store_dir).state()  # indicator state, as build_store leaves it
+
+        started = time.perf_counter()
+        SensitivityEngine(PriceStore(store_dir), RATES, MARKET).metrics()
+        first_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        store = PriceStore(store_dir)
+        engine = SensitivityEngine(store, RATES, MARKET)
+        engine.metrics()
+        warm_time = time.perf_counter() - started
+
+        append_times = []
+        for bar in range(bars, bars + args.appends):
+            started = time.perf_counter()
+            store.append(dates[bar:bar + 1], rows(bar, bar + 1))
+            metrics = engine.metrics()
+            append_times.append(time.perf_counter() - started)
+
+        store.state()
+        started = time.perf_counter()
+        for ticker in store.tickers[:1000]:
+            engine.lookup(str(ticker))
+        lookup_time = (time.perf_counter() - started) / min(1000, len(store))
+
+        # Sums kept up bar by bar must match a pass from scratch
+        os.remove(os.path.join(store_dir, STATE_FILE))
+        fresh = SensitivityEngine(PriceStore(store_dir), RATES, MARKET)
+        matches = np.allclose(engine.state()["sums"], fresh.state()["sums"])
+
+    window = max(engine.windows)
+    yield_error = np.nanmean(np.abs(metrics[f"beta_rates_{window}"][index] - yield_beta))
+    market_error = np.nanmean(np.abs(metrics[f"beta_market_{window}"][index] - market_beta))
+
+    print(f"📉 Sensitivity: {args.tickers} tickers × {bars} daily bars, "
+          f"windows {', '.join(map(str, engine.windows))}")
+    print("=" * 50)
+    print(f"First pass:            {first_time * 1000:.1f}ms")
+    print(f"Open with saved sums:  {warm_time * 1000:.1f}ms")
+    print(f"Append 1 bar + update: {min(append_times) * 1000:.1f}ms best, "
+          f"{max(append_times) * 1000:.1f}ms worst of {args.appends}")
+    print(f"Lookup per ticker:     {lookup_time * 1e6:.1f}µs")
+    print(f"Yield beta error:      {yield_error:.3f} mean absolute "
+          f"(true betas {yield_beta.min():+.2f} to {yield_beta.max():+.2f})")
+    print(f"Market beta error:     {market_error:.3f} mean absolute "
+          f"(true betas {market_beta.min():.2f} to {market_beta.max():.2f})")
+    print(f"Incremental == full:   {'yes' if matches else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
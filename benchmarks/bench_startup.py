@@ -0,0 +1,198 @@
+"""CLI startup benchmark based on ``python -X importtime``.
+
+Runs each light command (``--help``, ``--version``, ``--list-sections``,
+``--list-reports``) and a bare ``import main`` in fresh interpreters and
+records total import time, wall time and the slowest top-level imports.
+Light commands must not import the ADK or the Gemini SDK at all; that is
+checked on every run, independent of timing noise. Results can be saved
+as a baseline and later runs compared against it like ``bench_workflow``.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_startup --save-baseline   # on the old commit
+    python -m benchmarks.bench_startup --compare         # on the new commit
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "startup_baseline.json")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Name -> interpreter arguments, run from the repository root
+COMMANDS = {
+    "import main": ["-c", "import main"],
+    "--help": ["main.py", "--help"],
+    "--version": ["main.py", "--version"],
+    "--list-sections": ["main.py", "--list-sections"],
+    "--list-reports": ["main.py", "--list-reports"],
+}
+
+# Packages the light commands (all of the above) must never import
+HEAVY_PACKAGES = ("google.adk", "google.genai", "fastapi", "numpy", "pyarrow")
+
+# Metrics compared against the baseline; all are "lower is better"
+COMPARED_METRICS = ("import_ms", "wall_ms")
+# Changes smaller than this many milliseconds are noise, whatever the ratio
+NOISE_FLOOR_MS = 5.0
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int, int]]:
+    """Parse ``-X importtime`` output.
+
+    Returns:
+        list[tuple[str, int, int, int]]: ``(module, self us, cumulative us,
+        depth)`` for every imported module, in import order.
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return modules
+
+
+def measure(args: list[str], repeat: int) -> dict:
+    """Run one command ``repeat`` times and keep the median run."""
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", *args],
+            cwd=ROOT, capture_output=True, text=True,
+        )
+        wall = time.perf_counter() - started
+        if process.returncode != 0:
+            raise RuntimeError(f"{' '.join(args)} failed:\n{process.stderr[-2000:]}")
+        modules = parse_importtime(process.stderr)
+        runs.append((sum(m[1] for m in modules), wall, modules))
+    import_us, wall, modules = sorted(runs, key=lambda run: run[0])[len(runs) // 2]
+    top_level = sorted(
+        ((name, cumulative) for name, _, cumulative, depth in modules if depth == 1),
+        key=lambda module: module[1], reverse=True,
+    )
+    names = {name for name, *_ in modules}
+    return {
+        "import_ms": round(import_us / 1000, 1),
+        "wall_ms": round(statistics.median(run[1] for run in runs) * 1000, 1),
+        "modules": len(modules),
+        "heavy": sorted(
+            package for package in HEAVY_PACKAGES
+            if any(name == package or name.startswith(package + ".") for name in names)
+        ),
+        "slowest": [[name, round(us / 1000, 1)] for name, us in top_level[:5]],
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=ROOT,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Return a description of every metric that regressed past ``threshold``."""
+    regressions = []
+    for command, metrics in current["results"].items():
+        old = baseline["results"].get(command)
+        if old is None:
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = old[metric], metrics[metric]
+            if (before > 0 and after - before > NOISE_FLOOR_MS
+                    and (after - before) / before > threshold):
+                regressions.append(
+                    f"{command}: {metric} {before} → {after} "
+                    f"(+{(after - before) / before:.0%})"
+                )
+    return regressions
+
+
+def print_results(current: dict, baseline: dict = None) -> None:
+    print(f"📊 Startup benchmark @ {current['commit']} "
+          f"(Python {current['python']}, median of {current['config']['repeat']})")
+    print("=" * 78)
+    print(f"{'command':<18}{'imports':>10}{'wall':>10}{'modules':>9}  slowest top-level imports")
+    for command, m in current["results"].items():
+        slowest = ", ".join(f"{name} {ms:.0f}ms" for name, ms in m["slowest"][:3])
+        print(f"{command:<18}{m['import_ms']:>8.1f}ms{m['wall_ms']:>8.1f}ms"
+              f"{m['modules']:>9}  {slowest}")
+        if baseline and command in baseline["results"]:
+            old = baseline["results"][command]
+            deltas = "  ".join(
+                f"{metric} {(m[metric] - old[metric]) / old[metric]:+.0%}"
+                for metric in COMPARED_METRICS if old[metric] > 0
+            )
+            print(f"{'':<18}vs {baseline['commit']}: {deltas}")
+        if m["heavy"]:
+            print(f"{'':<18}⚠️  imports {', '.join(m['heavy'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Runs per command; the median is kept (default: 5).")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Save these results as the new baseline.")
+    parser.add_argument("--compare", action="store_true",
+                        help="Fail if any metric regressed past --threshold.")
+    parser.add_argument("--threshold", type=float, default=0.3,
+                        help="Allowed relative regression (default: 0.3 = 30%%).")
+    args = parser.parse_args()
+
+    current = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "config": {"repeat": args.repeat},
+        "results": {
+            command: measure(command_args, args.repeat)
+            for command, command_args in COMMANDS.items()
+        },
+    }
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("python") != current["python"]:
+            print("⚠️  Baseline was recorded with a different Python; comparison skipped.")
+            baseline = None
+    print_results(current, baseline)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"\n💾 Baseline saved to {args.baseline}")
+
+    heavy = [command for command, m in current["results"].items() if m["heavy"]]
+    if heavy:
+        print(f"\n❌ Light commands import the SDK: {', '.join(heavy)}")
+        sys.exit(1)
+
+    if args.compare:
+        if baseline is None:
+            print("\n❌ No comparable baseline found.")
+            sys.exit(1)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print("\n❌ Startup regressions:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print("\n✅ No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
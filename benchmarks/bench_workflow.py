@@ -0,0 +1,277 @@
+"""Reproducible end-to-end workflow benchmark on the offline backend.
+
+Runs the full InvestmentAnalysisSystem for 1, 10 and 100 tickers against
+the deterministic fake model and records wall time, peak Python memory
+and event-loop lag for each size. Results can be saved as a baseline and
+later runs compared against it to catch performance regressions between
+commits. With ``HEDGING=1`` each size also runs with hedging turned off,
+so the agent-call p99 with hedges is reported next to the primaries' alone.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_workflow --save-baseline   # on the old commit
+    python -m benchmarks.bench_workflow --compare         # on the new commit
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Keep benchmark reports out of the real analysis directory; must be set
+# before the project modules read their configuration.
+os.environ["ANALYSIS_DIR"] = tempfile.mkdtemp(prefix="bench_analysis_")
+
+from batch import percentile, run_batch  # noqa: E402
+from config import HEDGING_ENABLED, MODEL_TIERS  # noqa: E402
+from fake_llm import FakeBackendConfig  # noqa: E402
+from hedging import get_hedger  # noqa: E402
+from models import get_model, use_backend  # noqa: E402
+from registry import PROFILES, resolve_sections  # noqa: E402
+from routing import get_tier_usage  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Metrics compared against the baseline; all are "lower is better"
+COMPARED_METRICS = ("wall_time", "peak_memory_mb", "loop_lag_p99_ms")
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a periodic timer."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.lags: list[float] = []
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - expected))
+
+    def __enter__(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        self._task.cancel()
+
+
+def reset_fake_models() -> None:
+    """Restart the fake models' draws, so two runs see the same primary calls."""
+    for name in set(MODEL_TIERS.values()):
+        model = get_model(name)
+        while hasattr(model, "inner"):
+            model = model.inner
+        model.reset()
+
+
+async def bench_size(
+    size: int, concurrency: int, sections: tuple[str, ...], hedge: bool = True
+) -> dict:
+    """Analyze ``size`` synthetic tickers and collect metrics.
+
+    ``hedge=False`` runs with a zero hedge budget, so every call is a primary.
+    """
+    tickers = [f"T{i:04d}" for i in range(size)]
+    usage = get_tier_usage()
+    usage.reset()
+    hedger = get_hedger()
+    hedger.reset()
+    max_extra, hedger.max_extra = hedger.max_extra, hedger.max_extra if hedge else 0.0
+    tracemalloc.start()
+    try:
+        with LoopLagMonitor() as monitor, contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            results = await run_batch(tickers, concurrency=concurrency, sections=sections)
+            wall_time = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        hedger.max_extra = max_extra
+
+    latencies = [r.latency for r in results if r.ok]
+    traces = [r.trace for r in results if r.ok and r.trace is not None]
+    agent_latencies = [
+        span.duration for t in traces for span in t.agent_spans(leaf_only=True)
+    ]
+    return {
+        "tickers": size,
+        "failed": sum(1 for r in results if not r.ok),
+        "wall_time": round(wall_time, 3),
+        "tickers_per_min": round(len(latencies) / wall_time * 60, 2),
+        "latency_p50": round(percentile(latencies, 50), 3),
+        "latency_p95": round(percentile(latencies, 95), 3),
+        "agent_p50": round(percentile(agent_latencies, 50), 3),
+        "agent_p99": round(percentile(agent_latencies, 99), 3),
+        "hedged": hedger.hedged,
+        "tokens_per_ticker": round(
+            sum(t.totals()["total_tokens"] for t in traces) / max(1, len(traces))
+        ),
+        "cost_per_ticker": round(usage.cost / max(1, len(latencies)), 6),
+        "escalations": usage.escalations,
+        "peak_memory_mb": round(peak / 2**20, 2),
+        "loop_lag_p99_ms": round(percentile(monitor.lags, 99) * 1000, 2),
+        "loop_lag_max_ms": round(max(monitor.lags, default=0.0) * 1000, 2),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Return a description of every metric that regressed past ``threshold``."""
+    regressions = []
+    for size, metrics in current["results"].items():
+        old = baseline["results"].get(size)
+        if old is None:
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = old[metric], metrics[metric]
+            if before > 0 and (after - before) / before > threshold:
+                regressions.append(
+                    f"{size} tickers: {metric} {before} → {after} "
+                    f"(+{(after - before) / before:.0%})"
+                )
+    return regressions
+
+
+def print_results(current: dict, baseline: dict = None) -> None:
+    print(f"📊 Workflow benchmark @ {current['commit']} "
+          f"(fake backend, {current['config']['profile']} profile, "
+          f"latency scale {current['config']['latency_scale']})")
+    print("=" * 106)
+    print(f"{'tickers':>8}{'wall':>9}{'tick/min':>10}{'p50':>8}{'p95':>8}{'tok/tick':>10}"
+          f"{'$/tick':>9}{'escal.':>7}{'peak MB':>9}{'lag p99':>9}{'lag max':>9}{'failed':>8}")
+    for size, m in current["results"].items():
+        print(f"{size:>8}{m['wall_time']:>8.2f}s{m['tickers_per_min']:>10.1f}"
+              f"{m['latency_p50']:>7.2f}s{m['latency_p95']:>7.2f}s{m['tokens_per_ticker']:>10}"
+              f"{m['cost_per_ticker']:>9.4f}{m['escalations']:>7}{m['peak_memory_mb']:>9.1f}{m['loop_lag_p99_ms']:>7.1f}ms"
+              f"{m['loop_lag_max_ms']:>7.1f}ms{m['failed']:>8}")
+        if baseline and size in baseline["results"]:
+            old = baseline["results"][size]
+            deltas = "  ".join(
+                f"{metric} {(m[metric] - old[metric]) / old[metric]:+.0%}"
+                for metric in COMPARED_METRICS if old[metric] > 0
+            )
+            print(f"{'':>8}vs {baseline['commit']}: {deltas}")
+        if "agent_p99" in m:
+            print(f"{'':>8}agent calls: p50 {m['agent_p50']:.3f}s, p99 {m['agent_p99']:.3f}s"
+                  f" ({m['agent_p99'] / max(m['agent_p50'], 1e-9):.1f}x), {m['hedged']} hedged")
+        if "unhedged_agent_p99" in m:
+            print(f"{'':>8}without hedging: agent p99 {m['unhedged_agent_p99']:.3f}s "
+                  f"({(m['agent_p99'] - m['unhedged_agent_p99']) / max(m['unhedged_agent_p99'], 1e-9):+.0%}"
+                  f" hedged), ticker p95 {m['unhedged_latency_p95']:.2f}s")
+
+
+async def run_suite(sizes: list[int], concurrency: int, sections: tuple[str, ...]) -> dict:
+    results = {}
+    if HEDGING_ENABLED:
+        # Warm up first so neither side of the comparison pays for it
+        await bench_size(1, concurrency, sections, hedge=False)
+    for size in sizes:
+        if HEDGING_ENABLED:
+            reset_fake_models()
+        results[str(size)] = await bench_size(size, concurrency, sections)
+        if HEDGING_ENABLED:
+            reset_fake_models()
+            primaries = await bench_size(size, concurrency, sections, hedge=False)
+            results[str(size)]["unhedged_agent_p99"] = primaries["agent_p99"]
+            results[str(size)]["unhedged_latency_p95"] = primaries["latency_p95"]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency-scale", type=float, default=0.01,
+                        help="Multiplier on simulated model latency (default: 0.01).")
+    parser.add_argument("--error-rate-429", type=float, default=0.02)
+    parser.add_argument("--error-rate-503", type=float, default=0.01)
+    parser.add_argument("--invalid-rate", type=float, default=0.05,
+                        help="Share of cheap-tier answers that fail validation (default: 0.05).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="full",
+                        help="Section profile to run (default: full).")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Save these results as the new baseline.")
+    parser.add_argument("--compare", action="store_true",
+                        help="Fail if any metric regressed past --threshold.")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed relative regression (default: 0.2 = 20%%).")
+    args = parser.parse_args()
+
+    config = {
+        "seed": args.seed,
+        "latency_scale": args.latency_scale,
+        "error_rates": {"429": args.error_rate_429, "503": args.error_rate_503},
+        "invalid_rate": args.invalid_rate,
+        "concurrency": args.concurrency,
+        "profile": args.profile,
+    }
+    use_backend("fake", config=FakeBackendConfig(
+        seed=args.seed,
+        latency_scale=args.latency_scale,
+        error_rates={429: args.error_rate_429, 503: args.error_rate_503},
+        invalid_rates={MODEL_TIERS["lite"]: args.invalid_rate},
+    ))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = asyncio.run(run_suite(
+            args.sizes, args.concurrency, resolve_sections(profile=args.profile)
+        ))
+    current = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "config": config,
+        "results": results,
+    }
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != config:
+            print("⚠️  Baseline was recorded with a different configuration; "
+                  "comparison skipped.")
+            baseline = None
+    print_results(current, baseline)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"\n💾 Baseline saved to {args.baseline}")
+
+    if args.compare:
+        if baseline is None:
+            print("\n❌ No comparable baseline found.")
+            sys.exit(1)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print("\n❌ Performance regressions:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print("\n✅ No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Load test for the analysis service.
+
+Starts the service in-process on the deterministic fake backend (or targets
+a running one with ``--url``) and sends ``--requests`` analyses from
+``--concurrency`` clients, drawn from a pool of ``--tickers`` tickers so
+popular tickers overlap and get coalesced. Each client submits a job and
+follows its event stream until the report is done, then the test reports
+throughput, end-to-end latency percentiles, coalesced and rejected requests.
+
+Run from the repository root:
+
+    python -m benchmarks.load_service --requests 200 --concurrency 50 --tickers 20
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import tempfile
+import time
+
+# Keep load-test reports out of the real analysis directory; must be set
+# before the project modules read their configuration.
+os.environ["ANALYSIS_DIR"] = tempfile.mkdtemp(prefix="load_analysis_")
+
+import httpx  # noqa: E402
+
+from batch import percentile  # noqa: E402
+from fake_llm import FakeBackendConfig  # noqa: E402
+from models import use_backend  # noqa: E402
+
+
+async def _one_request(client: httpx.AsyncClient, ticker: str, stats: dict) -> None:
+    started = time.perf_counter()
+    response = await client.post("/analyses", json={"ticker": ticker})
+    if response.status_code == 429:
+        stats["rejected"] += 1
+        return
+    response.raise_for_status()
+    job = response.json()
+    stats["coalesced"] += job["coalesced"]
+    first_section = None
+    async with client.stream("GET", f"/analyses/{job['job_id']}/events") as events:
+        async for line in events.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            event = json.loads(line[len("data: "):])
+            if event["type"] == "section" and first_section is None:
+                first_section = time.perf_counter() - started
+            if event["type"] == "error":
+                stats["failed"] += 1
+                return
+            if event["type"] == "done":
+                break
+    stats["latencies"].append(time.perf_counter() - started)
+    if first_section is not None:
+        stats["first_section"].append(first_section)
+
+
+async def run_load(url: str, requests: int, concurrency: int, tickers: list[str], seed: int) -> dict:
+    """Send ``requests`` analyses with ``concurrency`` clients and collect metrics."""
+    rng = random.Random(seed)
+    # Skewed popularity: a few tickers get most of the requests
+    weights = [1 / (rank + 1) for rank in range(len(tickers))]
+    picks = rng.choices(tickers, weights=weights, k=requests)
+    stats = {"latencies": [], "first_section": [], "coalesced": 0, "rejected": 0, "failed": 0}
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, timeout=None, limits=limits) as client:
+        async def _client(ticker: str):
+            async with semaphore:
+                await _one_request(client, ticker, stats)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(_client(ticker) for ticker in picks))
+        wall_time = time.perf_counter() - started
+        health = (await client.get("/health")).json()
+
+    latencies = stats["latencies"]
+    return {
+        "requests": requests,
+        "completed": len(latencies),
+        "wall_time": round(wall_time, 3),
+        "requests_per_s": round(len(latencies) / wall_time, 2),
+        "latency_p50": round(percentile(latencies, 50), 3),
+        "latency_p95": round(percentile(latencies, 95), 3),
+        "latency_p99": round(percentile(latencies, 99), 3),
+        "first_section_p50": round(percentile(stats["first_section"], 50), 3),
+        "coalesced": stats["coalesced"],
+        "rejected": stats["rejected"],
+        "failed": stats["failed"],
+        "analyses_run": health["submitted"] - health["coalesced"] - health["rejected"],
+    }
+
+
+async def run_in_process(args, tickers: list[str]) -> dict:
+    """Start the service on a local port, load it, then shut it down."""
+    import uvicorn
+
+    from service import AnalysisService, create_app
+
+    service = AnalysisService(concurrency=args.service_concurrency, queue_size=args.queue_size)
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(service), host="127.0.0.1", port=args.port, log_level="warning",
+    ))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        if serving.done():
+            serving.result()
+        await asyncio.sleep(0.05)
+    try:
+        return await run_load(
+            f"http://127.0.0.1:{args.port}", args.requests, args.concurrency, tickers, args.seed
+        )
+    finally:
+        server.should_exit = True
+        await serving
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Load a running service instead of starting one.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50,
+                        help="Concurrent clients (default: 50).")
+    parser.add_argument("--tickers", type=int, default=20,
+                        help="Distinct tickers requests are drawn from (default: 20).")
+    parser.add_argument("--service-concurrency", type=int, default=10,
+                        help="Tickers the in-process service analyzes at once (default: 10).")
+    parser.add_argument("--queue-size", type=int, default=100)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-scale", type=float, default=0.01,
+                        help="Multiplier on simulated model latency (default: 0.01).")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tickers = [f"T{i:04d}" for i in range(args.tickers)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        if args.url:
+            results = asyncio.run(run_load(
+                args.url, args.requests, args.concurrency, tickers, args.seed
+            ))
+        else:
+            use_backend("fake", config=FakeBackendConfig(
+                seed=args.seed, latency_scale=args.latency_scale,
+            ))
+            results = asyncio.run(run_in_process(args, tickers))
+
+    target = args.url or f"in-process, fake backend, latency scale {args.latency_scale}"
+    print(f"📊 Service load test ({target})")
+    print("=" * 60)
+    print(f"Requests:       {results['completed']}/{results['requests']} completed "
+          f"in {results['wall_time']:.2f}s → {results['requests_per_s']:.1f} req/s")
+    print(f"Latency:        p50 {results['latency_p50']:.2f}s, p95 {results['latency_p95']:.2f}s, "
+          f"p99 {results['latency_p99']:.2f}s (first section p50 "
+          f"{results['first_section_p50']:.2f}s)")
+    print(f"Coalesced:      {results['coalesced']} requests joined a running analysis "
+          f"({results['analyses_run']} analyses run)")
+    print(f"Rejected (429): {results['rejected']}")
+    print(f"Failed:         {results['failed']}")
+
+
+if __name__ == "__main__":
+    main()
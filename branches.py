@@ -0,0 +1,58 @@
+"""Helpers for running sub-agents side by side in their own branches.
+
+Adapted from the private helpers of ADK's ``ParallelAgent`` (google-adk
+1.19), which any release may rename or change. The research team, the
+scheduler and the compactor use these copies instead.
+"""
+import asyncio
+from typing import AsyncGenerator
+
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+
+
+def branch_context(
+    agent: BaseAgent, sub_agent: BaseAgent, ctx: InvocationContext
+) -> InvocationContext:
+    """A copy of ``ctx`` on an isolated branch for one of ``agent``'s sub-agents.
+
+    Sub-agents on different branches don't see each other's events.
+    """
+    ctx = ctx.model_copy()
+    suffix = f"{agent.name}.{sub_agent.name}"
+    ctx.branch = f"{ctx.branch}.{suffix}" if ctx.branch else suffix
+    return ctx
+
+
+async def merge_agent_runs(
+    runs: list[AsyncGenerator[Event, None]],
+) -> AsyncGenerator[Event, None]:
+    """Interleave the events of agent runs that go on at the same time.
+
+    Each run waits until its last event has been consumed before it goes
+    on, as the runner expects.
+    """
+    sentinel = object()
+    queue = asyncio.Queue()
+
+    async def _forward(run: AsyncGenerator[Event, None]) -> None:
+        try:
+            async for event in run:
+                resume = asyncio.Event()
+                await queue.put((event, resume))
+                await resume.wait()
+        finally:
+            await queue.put((sentinel, None))
+
+    async with asyncio.TaskGroup() as group:
+        for run in runs:
+            group.create_task(_forward(run))
+        finished = 0
+        while finished < len(runs):
+            event, resume = await queue.get()
+            if event is sentinel:
+                finished += 1
+                continue
+            yield event
+            resume.set()
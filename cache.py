@@ -0,0 +1,189 @@
+"""Persistent per-section research cache backed by SQLite."""
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from google.adk.agents import LlmAgent
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.plugins.base_plugin import BasePlugin
+from google.genai import types
+
+from config import CACHE_MAX_ENTRIES, CACHE_PATH, SECTION_CACHE_TTLS
+from registry import AGENT_SPECS, macro_state_key
+
+
+class SectionCache:
+    """Disk-backed cache of agent section outputs with per-section TTLs.
+
+    Entries are keyed by ticker, output key, model name and a hash of the
+    agent instruction and the figures and macro context injected into it,
+    so changing a prompt or model, or rebuilding a data store, invalidates
+    old text.
+    The cache holds at most ``max_entries`` rows; the least recently used
+    rows are evicted first.
+    """
+
+    def __init__(
+        self,
+        path: str = CACHE_PATH,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        ttls: Optional[dict[str, float]] = None,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttls = dict(SECTION_CACHE_TTLS if ttls is None else ttls)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS sections (
+                key TEXT PRIMARY KEY,
+                ticker TEXT NOT NULL,
+                output_key TEXT NOT NULL,
+                text TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_sections_accessed ON sections(accessed_at)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(
+        ticker: str, output_key: str, model: str, instruction: str, context: str = ""
+    ) -> str:
+        """Build the cache key for one section of one ticker.
+
+        ``context`` is the state the instruction template is filled with.
+        """
+        instruction_hash = hashlib.sha256((instruction + context).encode("utf-8")).hexdigest()
+        return f"{ticker.upper()}|{output_key}|{model}|{instruction_hash}"
+
+    def is_cacheable(self, output_key: Optional[str]) -> bool:
+        """Whether sections with this output key have a TTL configured."""
+        return bool(output_key) and self.ttls.get(output_key, 0) > 0
+
+    def get(self, key: str, output_key: str) -> Optional[str]:
+        """Return the cached text for ``key`` if present and not expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, created_at FROM sections WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            text, created_at = row
+            if now - created_at > self.ttls.get(output_key, 0):
+                self._conn.execute("DELETE FROM sections WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE sections SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return text
+
+    def put(self, key: str, ticker: str, output_key: str, text: str) -> None:
+        """Store a section and evict least recently used rows over the limit."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sections "
+                "(key, ticker, output_key, text, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, ticker.upper(), output_key, text, now, now),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM sections").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM sections WHERE key IN ("
+                    "SELECT key FROM sections ORDER BY accessed_at ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def summary(self) -> str:
+        """One-line hit/miss summary for run reports."""
+        return (
+            f"{self.hits} hits / {self.misses} misses "
+            f"({self.hit_ratio:.0%} hit ratio)"
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _section_cache_key(agent: LlmAgent, ticker: str, state) -> str:
+    instruction = agent.instruction
+    if not isinstance(instruction, str):
+        instruction = getattr(instruction, "__qualname__", repr(instruction))
+    # Figures and macro context change when their stores are rebuilt; search
+    # results change every run and would make every lookup miss
+    spec = AGENT_SPECS.get(agent.output_key)
+    keys = (*spec.context_keys, *map(macro_state_key, spec.macro_topics)) if spec else ()
+    context = "".join(f"\n{key}={state.get(key) or ''}" for key in keys)
+    return SectionCache.make_key(
+        ticker, agent.output_key, agent.canonical_model.model, instruction, context
+    )
+
+
+class SectionCachePlugin(BasePlugin):
+    """Serves cached sections from ``SectionCache`` and skips their LLM calls.
+
+    On a hit the cached text is written straight into session state under
+    the agent's ``output_key`` and the agent is short-circuited. On a miss
+    the agent runs normally and its output is stored after it finishes.
+    """
+
+    def __init__(self, cache: SectionCache):
+        super().__init__(name="section_cache")
+        self.cache = cache
+
+    def _lookup_target(self, agent: BaseAgent, callback_context: CallbackContext):
+        if not isinstance(agent, LlmAgent) or not self.cache.is_cacheable(agent.output_key):
+            return None
+        ticker = callback_context.state.get("stock_query")
+        if not ticker:
+            return None
+        return ticker, _section_cache_key(agent, ticker, callback_context.state)
+
+    async def before_agent_callback(
+        self, *, agent: BaseAgent, callback_context: CallbackContext
+    ) -> Optional[types.Content]:
+        target = self._lookup_target(agent, callback_context)
+        if target is None:
+            return None
+        _, key = target
+        text = self.cache.get(key, agent.output_key)
+        if text is None:
+            return None
+        callback_context.state[agent.output_key] = text
+        return types.ModelContent(text)
+
+    async def after_agent_callback(
+        self, *, agent: BaseAgent, callback_context: CallbackContext
+    ) -> Optional[types.Content]:
+        target = self._lookup_target(agent, callback_context)
+        if target is None:
+            return None
+        ticker, key = target
+        text = callback_context.state.get(agent.output_key)
+        if isinstance(text, str) and text.strip():
+            self.cache.put(key, ticker, agent.output_key, text)
+        return None
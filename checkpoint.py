@@ -0,0 +1,228 @@
+"""Durable checkpoints of finished sections for resuming interrupted runs.
+
+Sessions live in memory while a ticker is analyzed, so a crash or kill
+loses every section already paid for. ``CheckpointPlugin`` copies each
+section into a ``CheckpointStore`` (SQLite) as soon as its ``output_key``
+is written. With ``--resume`` an interrupted run's sections are restored
+into the new session and only the missing agents and the aggregator run
+again.
+
+Writes are batched: they are queued in memory and committed together on a
+single writer thread once ``CHECKPOINT_BATCH_SIZE`` are pending or
+``CHECKPOINT_FLUSH_INTERVAL`` seconds have passed, so hundreds of
+concurrent tickers cost a few transactions per second, not one per section.
+"""
+import asyncio
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from google.adk.agents import LlmAgent
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.adk.plugins.base_plugin import BasePlugin
+from google.genai import types
+
+from config import CHECKPOINT_BATCH_SIZE, CHECKPOINT_FLUSH_INTERVAL, CHECKPOINT_PATH
+from report import SECTION_TITLES, UNAVAILABLE_KEY
+
+
+# Statements the writer thread runs, by name
+_STATEMENTS = {
+    "begin": (
+        "INSERT INTO runs (session_id, ticker, status, started_at, updated_at) "
+        "VALUES (?, ?, 'running', ?, ?) ON CONFLICT(session_id) "
+        "DO UPDATE SET status = 'running', updated_at = excluded.updated_at"
+    ),
+    "save": (
+        "INSERT OR REPLACE INTO checkpoints (session_id, key, value, written_at) "
+        "VALUES (?, ?, ?, ?)"
+    ),
+    # Reports keep the sections of finished runs; checkpoints aren't needed
+    "complete": "DELETE FROM checkpoints WHERE session_id = ?",
+    "complete_run": "UPDATE runs SET status = 'complete', updated_at = ? WHERE session_id = ?",
+}
+
+
+class CheckpointStore:
+    """SQLite store of in-progress runs and their finished sections.
+
+    Args:
+        path: Database file.
+        batch_size: Pending writes that trigger a flush.
+        flush_interval: Longest time in seconds a write waits to be flushed.
+    """
+
+    def __init__(
+        self,
+        path: str = CHECKPOINT_PATH,
+        batch_size: int = CHECKPOINT_BATCH_SIZE,
+        flush_interval: float = CHECKPOINT_FLUSH_INTERVAL,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.saved = 0
+        self.flushes = 0
+        self.resumed = 0
+        self._pending: list[tuple[str, tuple]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # One writer thread keeps batches in order
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS runs (
+                session_id TEXT PRIMARY KEY,
+                ticker TEXT NOT NULL,
+                status TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS checkpoints (
+                session_id TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                written_at REAL NOT NULL,
+                PRIMARY KEY (session_id, key)
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_runs_ticker ON runs(ticker, status, started_at)"
+        )
+        self._conn.commit()
+
+    def _queue(self, statement: str, params: tuple) -> None:
+        self._pending.append((statement, params))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+        elif self._timer is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self.flush()
+                return
+            self._timer = loop.call_later(self.flush_interval, self.flush)
+
+    def begin(self, session_id: str, ticker: str) -> None:
+        """Record that a run started (or resumed)."""
+        now = time.time()
+        self._queue("begin", (session_id, ticker.upper(), now, now))
+
+    def save(self, session_id: str, key: str, value: str) -> None:
+        """Checkpoint one finished section of a run."""
+        self.saved += 1
+        self._queue("save", (session_id, key, value, time.time()))
+
+    def complete(self, session_id: str) -> None:
+        """Mark a run finished and drop its checkpoints."""
+        self._queue("complete", (session_id,))
+        self._queue("complete_run", (time.time(), session_id))
+
+    def _write(self, batch: list[tuple[str, tuple]]) -> None:
+        with self._lock, self._conn:
+            for statement, params in batch:
+                self._conn.execute(_STATEMENTS[statement], params)
+
+    def flush(self):
+        """Hand the pending writes to the writer thread in one transaction.
+
+        Returns:
+            Future: Completes once the batch is committed.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self.flushes += 1
+        return self._writer.submit(self._write, batch)
+
+    def load_latest(self, ticker: str) -> Optional[tuple[str, dict[str, str]]]:
+        """Find the most recent unfinished run of ``ticker``.
+
+        Returns:
+            Optional[tuple[str, dict[str, str]]]: The run's session id and
+            its checkpointed sections, or ``None`` if there is no such run.
+        """
+        self.flush().result()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT session_id FROM runs WHERE ticker = ? AND status = 'running' "
+                "ORDER BY started_at DESC LIMIT 1",
+                (ticker.upper(),),
+            ).fetchone()
+            if row is None:
+                return None
+            sections = dict(self._conn.execute(
+                "SELECT key, value FROM checkpoints WHERE session_id = ?", row
+            ).fetchall())
+        self.resumed += len(sections)
+        return row[0], sections
+
+    def summary(self) -> str:
+        """One-line summary for run reports."""
+        return (
+            f"{self.saved} sections checkpointed in {self.flushes} batched writes, "
+            f"{self.resumed} restored"
+        )
+
+    def close(self) -> None:
+        """Flush outstanding writes and close the database."""
+        self.flush().result()
+        self._writer.shutdown(wait=True)
+        with self._lock:
+            self._conn.close()
+
+
+class CheckpointPlugin(BasePlugin):
+    """Checkpoints sections as they are written and skips restored ones.
+
+    Agents whose section is already in session state when they start
+    (restored from a checkpoint by ``--resume``) are short-circuited.
+    """
+
+    def __init__(self, store: CheckpointStore):
+        super().__init__(name="checkpoint")
+        self.store = store
+
+    async def before_run_callback(
+        self, *, invocation_context: InvocationContext
+    ) -> Optional[types.Content]:
+        session = invocation_context.session
+        self.store.begin(session.id, str(session.state.get("stock_query", "")))
+        return None
+
+    async def on_event_callback(
+        self, *, invocation_context: InvocationContext, event: Event
+    ) -> Optional[Event]:
+        delta = event.actions.state_delta
+        # Sections marked unavailable still need to run on resume
+        cut_off = delta.get(UNAVAILABLE_KEY) or {}
+        for key, value in delta.items():
+            if key in SECTION_TITLES and key not in cut_off and isinstance(value, str):
+                self.store.save(invocation_context.session.id, key, value)
+        return None
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        self.store.complete(invocation_context.session.id)
+
+    async def before_agent_callback(
+        self, *, agent: BaseAgent, callback_context: CallbackContext
+    ) -> Optional[types.Content]:
+        if not isinstance(agent, LlmAgent) or agent.output_key not in SECTION_TITLES:
+            return None
+        text = callback_context.state.get(agent.output_key)
+        if not isinstance(text, str) or not text:
+            return None
+        # Rewrite the key so the section streams into the report like new ones
+        callback_context.state[agent.output_key] = text
+        return types.ModelContent(text)
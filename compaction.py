@@ -0,0 +1,231 @@
+"""Token-budgeted compaction of the research sections for the aggregator.
+
+``SectionCompactor`` runs between the parallel research team and the
+aggregator. It cleans every section deterministically, splits the total
+token budget across sections (concise sections keep their full size and
+their slack goes to the wordy ones), asks a model to summarize only the
+sections still over their share, and finally cuts anything the model
+left too long at a sentence boundary. The aggregator reads the compacted
+copies under ``<output_key>_compact``; reports keep the full sections.
+"""
+import contextlib
+import functools
+import re
+from typing import AsyncGenerator
+
+from google.adk.agents import LlmAgent
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.events import Event, EventActions
+
+from branches import branch_context, merge_agent_runs
+from config import AGGREGATOR_INPUT_TOKEN_BUDGET
+from models import get_tier_model
+from registry import AGENT_SPECS, ALL_SECTIONS, COMPACT_SUFFIX
+
+# State key holding the per-run compaction statistics
+COMPACTION_KEY = "compaction"
+
+_SOURCES_LINE = re.compile(r"^\s*\**\s*(?:sources?|references?)\s*\**\s*:.*$", re.I | re.M)
+_URL = re.compile(r"\s*\(?<?https?://[^\s)>]+>?\)?")
+_EMPHASIS = re.compile(r"\*\*|__")
+_HEADING = re.compile(r"^#+\s*")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)."""
+    return len(text) // 4
+
+
+def clean_section(text: str) -> str:
+    """Deterministically shrink a section without losing content.
+
+    Removes source lists and URLs (the aggregator cannot follow them),
+    markdown emphasis and heading markers, repeated sentences and extra
+    whitespace.
+    """
+    text = _SOURCES_LINE.sub("", text)
+    text = _URL.sub("", text)
+    text = _EMPHASIS.sub("", text)
+
+    seen = set()
+    lines = []
+    for line in text.splitlines():
+        line = _HEADING.sub("", " ".join(line.split()))
+        kept = []
+        for sentence in _SENTENCE_BREAK.split(line):
+            normalized = sentence.lower()
+            if normalized and normalized in seen:
+                continue
+            seen.add(normalized)
+            kept.append(sentence)
+        line = " ".join(kept)
+        # Keep single blank lines between paragraphs only
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    return "\n".join(lines).strip()
+
+
+def truncate_to_tokens(text: str, tokens: int) -> str:
+    """Cut ``text`` to about ``tokens`` tokens, preferring a sentence end."""
+    max_chars = tokens * 4
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    end = max(cut.rfind(". "), cut.rfind(".\n"), cut.rfind("! "), cut.rfind("? "))
+    if end >= max_chars // 2:
+        return cut[:end + 1]
+    return cut[:max(0, max_chars - 1)].rsplit(" ", 1)[0] + "…"
+
+
+def allocate_budget(sizes: dict[str, int], budget: int) -> dict[str, int]:
+    """Split ``budget`` tokens across sections by water-filling.
+
+    Sections smaller than an equal share keep their size; what they leave
+    unused is shared among the larger ones.
+
+    Args:
+        sizes: Current token count per section.
+        budget: Total tokens available for all sections.
+
+    Returns:
+        dict[str, int]: Token allowance per section.
+    """
+    allocation = {}
+    remaining = budget
+    pending = sorted(sizes, key=sizes.get)
+    while pending:
+        share = remaining // len(pending)
+        if sizes[pending[0]] > share:
+            allocation.update({key: share for key in pending})
+            break
+        key = pending.pop(0)
+        allocation[key] = sizes[key]
+        remaining -= sizes[key]
+    return allocation
+
+
+def _summarizer_name(output_key: str) -> str:
+    return AGENT_SPECS[output_key].name.removesuffix("Agent") + "Summarizer"
+
+
+def _summarizer_instruction(output_key: str, ctx: ReadonlyContext) -> str:
+    spec = AGENT_SPECS[output_key]
+    allowance = ctx.state[COMPACTION_KEY]["sections"][output_key]["allocated"]
+    words = max(20, int(allowance * 0.7))  # ~0.75 words per token, with margin
+    return (
+        f"Condense the {spec.title} research on {ctx.state.get('stock_query')} below "
+        f"to at most {words} words. Keep the conclusion and every figure, date and "
+        f"name an investor would need; drop repetition, background and sources. "
+        f"Reply with the condensed text only.\n\n"
+        f"{ctx.state.get(output_key + COMPACT_SUFFIX, '')}"
+    )
+
+
+def create_summarizer(output_key: str) -> LlmAgent:
+    """Model-based fallback for one section that is over its allowance."""
+    return LlmAgent(
+        name=_summarizer_name(output_key),
+        model=get_tier_model("lite", escalate=False),  # truncation is the fallback
+        instruction=functools.partial(_summarizer_instruction, output_key),
+        include_contents="none",
+        output_key=output_key + COMPACT_SUFFIX,
+    )
+
+
+class SectionCompactor(BaseAgent):
+    """Fits the research sections into the aggregator's token budget.
+
+    Writes ``<output_key>_compact`` for every section and a ``compaction``
+    state entry with the pre- and post-compaction token counts.
+    """
+
+    sections: tuple[str, ...] = ALL_SECTIONS
+    token_budget: int = AGGREGATOR_INPUT_TOKEN_BUDGET
+
+    def _event(self, ctx: InvocationContext, state_delta: dict) -> Event:
+        return Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta=state_delta),
+        )
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        originals = {key: str(state.get(key) or "") for key in self.sections}
+        compact = {key: clean_section(text) for key, text in originals.items()}
+        sizes = {key: estimate_tokens(text) for key, text in compact.items()}
+        allocation = allocate_budget(sizes, self.token_budget)
+        over = [key for key in self.sections if sizes[key] > allocation[key]]
+
+        stats = {
+            "budget": self.token_budget,
+            "pre_tokens": sum(estimate_tokens(text) for text in originals.values()),
+            "sections": {
+                key: {
+                    "before": estimate_tokens(originals[key]),
+                    "allocated": allocation[key],
+                    "method": "kept" if compact[key] == originals[key] else "trimmed",
+                }
+                for key in self.sections
+            },
+        }
+        yield self._event(ctx, {
+            **{key + COMPACT_SUFFIX: text for key, text in compact.items()},
+            COMPACTION_KEY: stats,
+        })
+
+        if over:
+            summarizers = [self.find_sub_agent(_summarizer_name(key)) for key in over]
+            runs = [
+                agent.run_async(branch_context(self, agent, ctx))
+                for agent in summarizers
+            ]
+            try:
+                async with contextlib.aclosing(merge_agent_runs(runs)) as agen:
+                    async for event in agen:
+                        yield event
+            except Exception as e:  # fall back to truncation below
+                print(f"⚠️  Section summarization failed: {e}")
+            finally:
+                for run in runs:
+                    await run.aclose()
+
+        final = {}
+        for key in over:
+            text = str(state.get(key + COMPACT_SUFFIX) or compact[key])
+            method = "summarized" if text != compact[key] else "trimmed"
+            if estimate_tokens(text) > allocation[key]:
+                text, method = truncate_to_tokens(text, allocation[key]), "truncated"
+            final[key] = text
+            stats["sections"][key]["method"] = method
+        compact.update(final)
+        for key, text in compact.items():
+            stats["sections"][key]["after"] = estimate_tokens(text)
+        stats["post_tokens"] = sum(estimate_tokens(text) for text in compact.values())
+        yield self._event(ctx, {
+            **{key + COMPACT_SUFFIX: text for key, text in final.items()},
+            COMPACTION_KEY: stats,
+        })
+
+
+def create_section_compactor(sections: tuple[str, ...] = ALL_SECTIONS) -> SectionCompactor:
+    """Create the compaction stage for the selected sections."""
+    return SectionCompactor(
+        name="SectionCompactor",
+        sections=sections,
+        sub_agents=[create_summarizer(key) for key in sections],
+    )
+
+
+def compaction_summary(stats: dict) -> str:
+    """One-line description of a run's compaction statistics."""
+    methods = [section["method"] for section in stats["sections"].values()]
+    return (
+        f"{stats['pre_tokens']:,} → {stats['post_tokens']:,} tokens "
+        f"(budget {stats['budget']:,}; {methods.count('trimmed')} trimmed, "
+        f"{methods.count('summarized')} summarized, {methods.count('truncated')} truncated)"
+    )
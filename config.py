@@ -1,28 +1,245 @@
 """Configuration module for the research agent system."""
+import functools
 import os
 from dotenv import load_dotenv
-from google.genai import types
 
 # Load environment variables
 load_dotenv()
 
-# Validate API key
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-if not GOOGLE_API_KEY:
-    raise ValueError(
-        "🔑 Authentication Error: GOOGLE_API_KEY not found. "
-        "Please add it to your .env file."
-    )
-
-# Retry configuration for API calls
-RETRY_CONFIG = types.HttpRetryOptions(
-    attempts=5,  # Maximum retry attempts
-    exp_base=7,  # Delay multiplier
-    initial_delay=1,
-    http_status_codes=[429, 500, 503, 504],  # Retry on these HTTP errors
+
+# Model backend: "gemini" calls the API, "fake" runs the offline stand-in
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "gemini")
+
+
+def require_api_key() -> str:
+    """Return the API key, failing if it is missing.
+
+    Validation is deferred to the first real API client so the offline
+    backend, tooling and benchmarks work without a key.
+    """
+    if not GOOGLE_API_KEY:
+        raise ValueError(
+            "🔑 Authentication Error: GOOGLE_API_KEY not found. "
+            "Please add it to your .env file."
+        )
+    return GOOGLE_API_KEY
+
+# Retry configuration for API calls. 429s are not retried here: the
+# shared rate limiter in ratelimit.py handles them so it can slow every
+# agent down instead of letting each one back off on its own.
+RETRY_OPTIONS = {
+    "attempts": 5,  # Maximum retry attempts
+    "exp_base": 2,  # Delay multiplier
+    "initial_delay": 1,
+    "max_delay": 30,  # Cap on a single retry delay in seconds
+    "http_status_codes": [500, 503, 504],  # Retry on these HTTP errors
+}
+
+
+@functools.lru_cache(maxsize=1)
+def _retry_config():
+    # google.genai takes ~1s to import; only load it once a model needs it
+    from google.genai import types
+
+    return types.HttpRetryOptions(**RETRY_OPTIONS)
+
+
+def __getattr__(name: str):
+    """Build ``RETRY_CONFIG`` on first access instead of at import time."""
+    if name == "RETRY_CONFIG":
+        return _retry_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Client-side rate limiting shared by every model call in the process.
+# Defaults match the Tier 1 quota for gemini-2.5-flash-lite.
+RATE_LIMIT_RPM = float(os.getenv("RATE_LIMIT_RPM", "4000"))
+RATE_LIMIT_TPM = float(os.getenv("RATE_LIMIT_TPM", "4000000"))
+RATE_LIMIT_HEADROOM = float(os.getenv("RATE_LIMIT_HEADROOM", "0.9"))  # Fraction of quota to use
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "64"))
+MIN_CONCURRENT_REQUESTS = 1
+THROTTLE_RETRY_ATTEMPTS = 6  # Attempts per call when the API answers 429
+THROTTLE_MAX_BACKOFF = 20.0  # Longest wait between 429 retries in seconds
+EXPECTED_OUTPUT_TOKENS = 400  # Completion tokens assumed before a response arrives
+
+# Model configuration. MODEL_NAME is the strongest tier: it runs synthesis
+# and takes over when a cheaper tier's output fails validation. Both tiers
+# default to the baseline model; a stronger MODEL_NAME (e.g.
+# gemini-2.5-flash) is opt-in, and the cost summary then compares each
+# ticker's cost with the baseline.
+BASELINE_MODEL = "gemini-2.5-flash-lite"
+MODEL_NAME = os.getenv("MODEL_NAME", BASELINE_MODEL)
+MODEL_LITE = os.getenv("MODEL_LITE", BASELINE_MODEL)
+
+# Model tiers from cheapest to strongest; agents pick one in registry.py
+# (see routing.py). With routing off every agent uses MODEL_NAME. Answers
+# only escalate to a tier that runs a different model.
+MODEL_TIERS = {
+    "lite": MODEL_LITE,
+    "standard": MODEL_NAME,
+}
+MODEL_ROUTING = os.getenv("MODEL_ROUTING", "1") != "0"
+# Cheap-tier answers shorter than this many words are escalated
+VALIDATION_MIN_WORDS = int(os.getenv("VALIDATION_MIN_WORDS", "20"))
+
+# Estimated USD per million (input, output) tokens, for cost reporting
+MODEL_PRICES = {
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+}
+
+# Hedged model calls (see hedging.py): a call still running past
+# HEDGE_PERCENTILE of its agent's recent latencies is sent again and the
+# first answer wins. Hedges are capped at HEDGE_MAX_EXTRA of all calls.
+HEDGING_ENABLED = os.getenv("HEDGING", "0") == "1"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "10"))
+HEDGE_MAX_EXTRA = float(os.getenv("HEDGE_MAX_EXTRA", "0.05"))
+HEDGE_HISTORY_SIZE = 200  # Recent latencies kept per agent
+
+# Connection pool shared by every model client in the process
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "64"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "32"))
+
+# Time limits in seconds (0 disables). Each research agent gets at most
+# AGENT_TIMEOUT; the research team stops AGGREGATOR_RESERVE seconds before
+# RUN_DEADLINE so the aggregator can still run on what finished.
+AGENT_TIMEOUT = float(os.getenv("AGENT_TIMEOUT", "90"))
+RUN_DEADLINE = float(os.getenv("RUN_DEADLINE", "240"))
+AGGREGATOR_RESERVE = float(os.getenv("AGGREGATOR_RESERVE", "45"))
+
+# How the research agents of one ticker are started (see scheduler.py):
+# "gated" runs the screening agents first, starts the rest in priority
+# order as the sections they depend on finish and skips them when a screen
+# finds a hard AVOID; "eager" starts every agent at once and a hard AVOID
+# cancels the ones still running; "flat" starts every agent at once
+# without gates. "auto" is gated for batches, where most names fail their
+# screens, and eager for single analyses, where latency matters more. At
+# most RESEARCH_CONCURRENCY agents of a ticker run at the same time (0 = all).
+RESEARCH_SCHEDULE = os.getenv("RESEARCH_SCHEDULE", "auto")
+RESEARCH_CONCURRENCY = int(os.getenv("RESEARCH_CONCURRENCY", "0"))
+
+# Directory where reports and traces are written
+ANALYSIS_DIR = os.getenv("ANALYSIS_DIR", "analysis")
+
+# Application name used for runner sessions
+APP_NAME = "investing_analysis_agent"
+
+# Maximum number of tickers analyzed at the same time in batch mode
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+
+# Analysis service (service.py): address, tickers analyzed at once, jobs
+# waiting beyond those before new ones are rejected, finished jobs kept
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8000"))
+SERVICE_CONCURRENCY = int(os.getenv("SERVICE_CONCURRENCY", str(BATCH_CONCURRENCY)))
+SERVICE_QUEUE_SIZE = int(os.getenv("SERVICE_QUEUE_SIZE", "100"))
+SERVICE_JOB_HISTORY = int(os.getenv("SERVICE_JOB_HISTORY", "1000"))
+
+# Write a per-run trace (JSONL + Chrome trace events) next to each report
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "1") != "0"
+
+# Section cache configuration
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "1") != "0"
+CACHE_PATH = os.getenv("CACHE_PATH", ".research_cache.sqlite3")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "50000"))
+
+# Durable checkpoints of finished sections for --resume (see checkpoint.py).
+# Writes are committed in batches of up to CHECKPOINT_BATCH_SIZE, at least
+# every CHECKPOINT_FLUSH_INTERVAL seconds.
+CHECKPOINT_ENABLED = os.getenv("CHECKPOINT_ENABLED", "1") != "0"
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", ".checkpoints.sqlite3")
+CHECKPOINT_BATCH_SIZE = int(os.getenv("CHECKPOINT_BATCH_SIZE", "256"))
+CHECKPOINT_FLUSH_INTERVAL = float(os.getenv("CHECKPOINT_FLUSH_INTERVAL", "1.0"))
+
+# Indexed archive of finished analyses (see archive.py), queried with
+# ``python -m archive``
+ARCHIVE_ENABLED = os.getenv("ARCHIVE_ENABLED", "1") != "0"
+ARCHIVE_PATH = os.getenv("ARCHIVE_PATH", ".archive.sqlite3")
+
+# Structured scorecard of every analysis (see scorecard.py), appended to a
+# date-partitioned Parquet store for screening (see screening.py; needs
+# pyarrow). Records are written in batches of RECORDS_BATCH_SIZE, and none
+# waits more than RECORDS_FLUSH_INTERVAL seconds.
+RECORDS_ENABLED = os.getenv("RECORDS_ENABLED", "1") != "0"
+RECORDS_DIR = os.getenv("RECORDS_DIR", ".records")
+RECORDS_BATCH_SIZE = int(os.getenv("RECORDS_BATCH_SIZE", "500"))
+RECORDS_FLUSH_INTERVAL = float(os.getenv("RECORDS_FLUSH_INTERVAL", "60"))
+
+# Compact the research sections to a total token budget before the
+# aggregator sees them (see compaction.py)
+COMPACTION_ENABLED = os.getenv("COMPACTION_ENABLED", "1") != "0"
+AGGREGATOR_INPUT_TOKEN_BUDGET = int(os.getenv("AGGREGATOR_INPUT_TOKEN_BUDGET", "4000"))
+
+# Local fundamentals store (see fundamentals.py). Mode "inject" gives the
+# debt, dilution and short interest agents exact figures to interpret,
+# "skip" answers those sections from the figures alone, "off" disables it.
+FUNDAMENTALS_DIR = os.getenv("FUNDAMENTALS_DIR", ".fundamentals")
+FUNDAMENTALS_MODE = os.getenv("FUNDAMENTALS_MODE", "inject")
+# Figures older than this are only injected, never used to skip an agent
+FUNDAMENTALS_MAX_AGE_DAYS = int(os.getenv("FUNDAMENTALS_MAX_AGE_DAYS", "200"))
+
+# Local daily price store (see indicators.py). RSI, MACD, moving averages,
+# Bollinger bands and ATR computed from it are given to the technical
+# analysis agent when the ticker's last bar is at most
+# INDICATORS_MAX_AGE_DAYS old; otherwise the agent searches as before.
+PRICES_DIR = os.getenv("PRICES_DIR", ".prices")
+INDICATORS_ENABLED = os.getenv("INDICATORS_ENABLED", "1") != "0"
+INDICATORS_MAX_AGE_DAYS = int(os.getenv("INDICATORS_MAX_AGE_DAYS", "5"))
+
+# Rolling rate and market sensitivity for the bond agent (see
+# sensitivity.py): correlation and beta of daily returns against the
+# 10-year yield and a market index over windows of trading days. Both
+# factors are series in the price store; the yield is in percent.
+SENSITIVITY_ENABLED = os.getenv("SENSITIVITY_ENABLED", "1") != "0"
+YIELD_TICKER = os.getenv("YIELD_TICKER", "DGS10")
+MARKET_TICKER = os.getenv("MARKET_TICKER", "SPY")
+SENSITIVITY_WINDOWS = tuple(
+    int(window) for window in os.getenv("SENSITIVITY_WINDOWS", "63,252").split(",")
 )
+SENSITIVITY_MAX_AGE_DAYS = int(os.getenv("SENSITIVITY_MAX_AGE_DAYS", "5"))
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+WEEK = 7 * DAY
+
+# How agents search the web: "builtin" uses Gemini's google_search tool,
+# "broker" routes searches through the deduplicating SearchBroker
+# (search.py), "prefetch" also fetches shared result sets once per run
+SEARCH_MODE = os.getenv("SEARCH_MODE", "builtin")
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", str(10 * MINUTE)))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000"))
+# Share broker results between tickers instead of per run
+SEARCH_SHARE_ACROSS_TICKERS = os.getenv("SEARCH_SHARE_ACROSS_TICKERS", "0") == "1"
 
-# Model configuration
-MODEL_NAME = "gemini-2.5-flash-lite"
+# Ticker-independent macro context (see macro.py): rates, market and sector
+# backdrop researched once per batch and shared with every ticker's agents.
+# Results are reused for MACRO_TTL seconds; sectors are classified
+# MACRO_SECTOR_BATCH tickers per model call.
+MACRO_ENABLED = os.getenv("MACRO_ENABLED", "1") != "0"
+MACRO_TTL = int(os.getenv("MACRO_TTL", str(1 * HOUR)))
+MACRO_SECTOR_BATCH = int(os.getenv("MACRO_SECTOR_BATCH", "100"))
 
-print("✅ Configuration loaded successfully.")
+# How long each agent's section stays fresh, keyed by output_key.
+# Sections without an entry are never cached.
+SECTION_CACHE_TTLS = {
+    "technical_analysis": 15 * MINUTE,
+    "media_sentiment": 30 * MINUTE,
+    "reverse_analysis": 1 * HOUR,
+    "short_interest": 12 * HOUR,
+    "insider_trading": 1 * DAY,
+    "analyst_ratings": 1 * DAY,
+    "bond_correlation": 1 * DAY,
+    "google_trends": 3 * DAY,
+    "ethics_check": 3 * DAY,
+    "share_dilution": 1 * WEEK,
+    "debt_analysis": 1 * WEEK,
+    "ceo_analysis": 2 * WEEK,
+    "investment_horizon": 2 * WEEK,
+    "infinite_game": 2 * WEEK,
+    "competitive_advantage": 2 * WEEK,
+    "business_understanding": 4 * WEEK,
+}
@@ -0,0 +1,132 @@
+"""Per-agent timeouts and a run deadline for the research team.
+
+``DeadlineParallelAgent`` runs the research agents in parallel like
+``ParallelAgent``, but gives each one at most ``AGENT_TIMEOUT`` seconds and
+stops them all when the run deadline comes near, leaving
+``AGGREGATOR_RESERVE`` seconds of ``RUN_DEADLINE`` for the stages after
+it. Agents that time out or fail are cancelled and their sections are
+filled with an explicit "unavailable" marker, so the aggregator still runs
+on whatever finished and the report lists what was cut off.
+"""
+import asyncio
+import time
+from typing import AsyncGenerator, Optional
+
+from google.adk.agents import ParallelAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+
+from branches import branch_context
+from config import AGENT_TIMEOUT, AGGREGATOR_RESERVE, RUN_DEADLINE
+from report import UNAVAILABLE_KEY, unavailable_marker
+
+
+def run_started_at(ctx: InvocationContext) -> float:
+    """Wall-clock time the current run started (its user message)."""
+    for event in ctx.session.events:
+        if event.invocation_id == ctx.invocation_id:
+            return event.timestamp
+    return time.time()
+
+
+class DeadlineParallelAgent(ParallelAgent):
+    """Runs sub-agents in parallel, cutting off any that run out of time.
+
+    Attributes:
+        agent_timeout: Seconds each sub-agent may run; 0 disables the limit.
+        run_deadline: Seconds from the start of the run until everything,
+            including later stages, should be done; 0 disables it.
+        reserve: Seconds of the run deadline kept for later stages.
+    """
+
+    agent_timeout: float = AGENT_TIMEOUT
+    run_deadline: float = RUN_DEADLINE
+    reserve: float = AGGREGATOR_RESERVE
+
+    def _time_limit(self, ctx: InvocationContext) -> Optional[float]:
+        limits = []
+        if self.agent_timeout > 0:
+            limits.append(self.agent_timeout)
+        if self.run_deadline > 0:
+            deadline = run_started_at(ctx) + self.run_deadline - self.reserve
+            limits.append(max(0.0, deadline - time.time()))
+        return min(limits) if limits else None
+
+    @staticmethod
+    async def _forward(agent, run, limit, queue, cut_off, done) -> None:
+        """Queue ``run``'s events until it ends, fails or runs out of time.
+
+        Like ``ParallelAgent``, each event waits to be processed upstream
+        before the agent produces the next one. Timeouts and failures are
+        recorded in ``cut_off`` by agent name; ``done`` is queued last.
+        """
+        try:
+            async with asyncio.timeout(limit):
+                async for event in run:
+                    resume = asyncio.Event()
+                    await queue.put((event, resume))
+                    await resume.wait()
+        except TimeoutError:
+            cut_off[agent.name] = f"timed out after {limit:.4g}s"
+        except Exception as e:
+            cut_off[agent.name] = f"failed ({type(e).__name__})"
+        finally:
+            await queue.put(done)
+
+    def _unavailable_delta(self, ctx: InvocationContext, cut_off: dict[str, str]) -> dict:
+        """State delta marking the sections of cut-off agents unavailable."""
+        unavailable = {}
+        state = ctx.session.state
+        for agent in self.sub_agents:
+            key = getattr(agent, "output_key", None)
+            if agent.name in cut_off and key and key not in state:
+                unavailable[key] = {"agent": agent.name, "reason": cut_off[agent.name]}
+                print(f"⏳ {state.get('stock_query', '')} {agent.name} {cut_off[agent.name]}; "
+                      f"marking {key} unavailable")
+        if not unavailable:
+            return {}
+        return {
+            **{key: unavailable_marker(info["reason"]) for key, info in unavailable.items()},
+            UNAVAILABLE_KEY: unavailable,
+        }
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        if not self.sub_agents:
+            return
+        limit = self._time_limit(ctx)
+        sentinel = object()
+        queue = asyncio.Queue()
+        cut_off: dict[str, str] = {}  # agent name -> reason
+        runs = [
+            (agent, agent.run_async(branch_context(self, agent, ctx)))
+            for agent in self.sub_agents
+        ]
+        tasks = [
+            asyncio.create_task(self._forward(agent, run, limit, queue, cut_off, (sentinel, None)))
+            for agent, run in runs
+        ]
+        try:
+            finished = 0
+            while finished < len(tasks):
+                event, resume = await queue.get()
+                if event is sentinel:
+                    finished += 1
+                    continue
+                yield event
+                resume.set()
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Let cancelled agents unwind before closing their generators
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for _, run in runs:
+                await run.aclose()
+
+        delta = self._unavailable_delta(ctx, cut_off)
+        if delta:
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                branch=ctx.branch,
+                actions=EventActions(state_delta=delta),
+            )
@@ -0,0 +1,347 @@
+"""Deterministic offline stand-in for the Gemini backend.
+
+``FakeLlm`` answers every request locally, so the whole workflow can be run,
+benchmarked and regression-tested without a ``GOOGLE_API_KEY``. Responses,
+latencies and injected errors are derived from a seed plus the agent name
+and ticker, so two runs with the same configuration behave identically.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+from dataclasses import dataclass, field
+from typing import AsyncGenerator, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from google.genai.errors import ClientError, ServerError
+from pydantic import Field, PrivateAttr
+
+from config import RETRY_CONFIG
+
+# Median latency in seconds and log-normal sigma per agent, roughly matching
+# live runs of gemini-2.5-flash-lite with google_search grounding
+DEFAULT_LATENCIES = {
+    "BusinessUnderstandingAgent": (5.0, 0.35),
+    "CompetitiveAdvantageAgent": (5.5, 0.35),
+    "MediaSentimentAgent": (6.5, 0.45),
+    "EthicsAgent": (6.0, 0.45),
+    "InvestmentHorizonAgent": (5.5, 0.35),
+    "InsiderTradingAgent": (7.0, 0.5),
+    "GoogleTrendsAgent": (4.5, 0.4),
+    "ShareDilutionAgent": (6.0, 0.4),
+    "ShortInterestAgent": (5.0, 0.4),
+    "DebtAnalysisAgent": (6.0, 0.4),
+    "InfiniteGameAgent": (5.5, 0.35),
+    "CEOAnalysisAgent": (5.5, 0.35),
+    "AnalystRatingsAgent": (6.5, 0.5),
+    "TechnicalAnalysisAgent": (5.0, 0.45),
+    "ReverseAnalysisAgent": (7.0, 0.5),
+    "BondCorrelationAgent": (5.0, 0.4),
+    "InvestmentAggregator": (9.0, 0.3),
+}
+
+DEFAULT_SEARCH_RESULTS = [
+    ("Company overview and latest filings", "https://example.com/filings/{ticker}"),
+    ("Recent news coverage", "https://example.com/news/{ticker}"),
+    ("Key statistics and ratios", "https://example.com/stats/{ticker}"),
+]
+
+# Query each agent sends through the web_search tool (after the ticker).
+# Several agents overlap, like the real ones do, so the broker can dedupe.
+DEFAULT_SEARCH_QUERIES = {
+    "MediaSentimentAgent": "latest stock news",
+    "ReverseAnalysisAgent": "stock latest news",
+    "EthicsAgent": "controversies lawsuits news",
+    "DebtAnalysisAgent": "financial summary debt shares outstanding short interest",
+    "ShareDilutionAgent": "shares outstanding debt financial summary short interest",
+    "ShortInterestAgent": "short interest financial summary debt shares outstanding",
+    "AnalystRatingsAgent": "analyst ratings price target technical indicators",
+    "TechnicalAnalysisAgent": "technical indicators analyst ratings price target",
+}
+
+# Ticker-independent searches each agent runs inside its grounded call
+# unless the batch's shared macro context is in its instruction
+DEFAULT_MACRO_QUERIES = {
+    "BondCorrelationAgent": ("10-year treasury yield trend fed outlook",),
+    "TechnicalAnalysisAgent": ("stock market trend volatility",),
+    "ReverseAnalysisAgent": ("stock market selloff this month", "sector performance"),
+    "InvestmentHorizonAgent": ("sector long-term outlook",),
+    "CompetitiveAdvantageAgent": ("sector competitive landscape",),
+}
+
+# Latency multiplier per model relative to gemini-2.5-flash-lite
+DEFAULT_MODEL_LATENCY_SCALES = {
+    "gemini-2.5-flash": 1.6,
+    "gemini-2.5-pro": 3.0,
+}
+
+_TICKER_PATTERN = re.compile(r"analysis of ([^.\s]+)")
+_CONDENSE_PATTERN = re.compile(r"at most (\d+) words.*?\n\n(.*)", re.S)
+# Matches ``registry.scorecard_instruction`` and the aggregator's verdict in it
+_SCORE_PATTERN = re.compile(r"very positive\): ([\w, ]+)\.")
+_VERDICT_PATTERN = re.compile(r"Investment Recommendation: (BUY|HOLD|AVOID)")
+# Marks the verdict line gated agents are asked for (``registry.GATE_LINE``)
+_GATE_MARKER = '"Hard AVOID: no"'
+
+# What a gated agent reports when its gate fires
+_GATE_REASONS = {
+    "EthicsAgent": "fraud charges against the company's leadership",
+    "DebtAnalysisAgent": "debt it cannot service and a going-concern warning",
+}
+
+# Matches ``macro.SHARED_NOTE`` and the sector classification prompt
+_SHARED_MACRO_MARKER = "shared across tickers"
+_SECTORS_PATTERN = re.compile(r"Sectors: (.+)\nTickers: (.+)\n")
+
+
+@dataclass
+class FakeBackendConfig:
+    """Behavior of the offline backend.
+
+    Attributes:
+        seed: Seed mixed into every random draw.
+        latency_scale: Multiplier applied to every simulated delay.
+        latencies: Per-agent ``(median seconds, log-normal sigma)``.
+        default_latency: Latency for agents missing from ``latencies``.
+        error_rates: Probability of injecting each HTTP status per call,
+            e.g. ``{429: 0.05, 503: 0.01}``.
+        search_results: Canned ``(title, url)`` google_search results; ``{ticker}``
+            in a URL is replaced with the analyzed ticker.
+        search_queries: Query each agent sends when it has the ``web_search``
+            tool; other agents search for their own topic.
+        macro_queries: Ticker-independent queries each agent adds to its
+            grounded searches when no shared macro context is given.
+        search_tokens: Tool-use prompt tokens each grounded search adds.
+        model_latency_scales: Latency multiplier per model name, so cheaper
+            tiers answer faster.
+        invalid_rates: Probability per model name that a research agent's
+            answer is a useless one-liner, to exercise tier escalation.
+        gate_rates: Probability per agent name that a gated agent finds a
+            hard AVOID for a ticker; the same ticker always gets the same
+            verdict.
+    """
+
+    seed: int = 0
+    latency_scale: float = 1.0
+    latencies: dict[str, tuple[float, float]] = field(
+        default_factory=lambda: dict(DEFAULT_LATENCIES)
+    )
+    default_latency: tuple[float, float] = (5.0, 0.4)
+    error_rates: dict[int, float] = field(default_factory=dict)
+    search_results: list[tuple[str, str]] = field(
+        default_factory=lambda: list(DEFAULT_SEARCH_RESULTS)
+    )
+    search_queries: dict[str, str] = field(
+        default_factory=lambda: dict(DEFAULT_SEARCH_QUERIES)
+    )
+    macro_queries: dict[str, tuple[str, ...]] = field(
+        default_factory=lambda: dict(DEFAULT_MACRO_QUERIES)
+    )
+    search_tokens: int = 250
+    model_latency_scales: dict[str, float] = field(
+        default_factory=lambda: dict(DEFAULT_MODEL_LATENCY_SCALES)
+    )
+    invalid_rates: dict[str, float] = field(default_factory=dict)
+    gate_rates: dict[str, float] = field(default_factory=dict)
+
+
+def _request_text(llm_request: LlmRequest) -> str:
+    texts = []
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            if part.text:
+                texts.append(part.text)
+    return "\n".join(texts)
+
+
+def _awaiting_search(llm_request: LlmRequest) -> bool:
+    """Whether the agent has web_search and hasn't received its results yet."""
+    if "web_search" not in llm_request.tools_dict:
+        return False
+    return not any(
+        part.function_response
+        for content in llm_request.contents or []
+        for part in content.parts or []
+    )
+
+
+def _error_payload(code: int, status: str) -> dict:
+    return {"error": {"code": code, "message": f"Injected {status}", "status": status}}
+
+
+class FakeLlm(BaseLlm):
+    """Offline model that returns canned, deterministic section text."""
+
+    config: FakeBackendConfig = Field(default_factory=FakeBackendConfig)
+    # Calls seen per (agent, ticker); keeps draws independent of scheduling order
+    _calls: dict[tuple[str, str], int] = PrivateAttr(default_factory=dict)
+
+    @property
+    def call_count(self) -> int:
+        return sum(self._calls.values())
+
+    def reset(self) -> None:
+        """Forget the calls seen, so a rerun gets the same answers and latencies."""
+        self._calls.clear()
+
+    def _rng(self, *parts) -> random.Random:
+        key = "|".join(str(p) for p in (self.config.seed, *parts))
+        return random.Random(int.from_bytes(hashlib.sha256(key.encode()).digest()[:8]))
+
+    def _latency(self, rng: random.Random, agent: str) -> float:
+        median, sigma = self.config.latencies.get(agent, self.config.default_latency)
+        scale = self.config.latency_scale * self.config.model_latency_scales.get(self.model, 1.0)
+        return median * math.exp(rng.gauss(0.0, sigma)) * scale
+
+    def _injected_error(self, rng: random.Random) -> Optional[int]:
+        for code, rate in sorted(self.config.error_rates.items()):
+            if rng.random() < rate:
+                return code
+        return None
+
+    def _respond(
+        self, agent: str, ticker: str, rng: random.Random, prompt_chars: int, system: str,
+        prompt: str = "",
+    ) -> LlmResponse:
+        condense = _CONDENSE_PATTERN.search(system) if agent.endswith("Summarizer") else None
+        searches = 0
+        sectors = _SECTORS_PATTERN.search(prompt) if agent == "SectorClassifier" else None
+        if condense:
+            # Summarizers keep the first words of the text they were given
+            text = " ".join(condense.group(2).split()[:int(condense.group(1))])
+            grounding = None
+        elif agent == "InvestmentScorecard":
+            # Schema-constrained JSON consistent with the aggregator's verdict
+            verdict = _VERDICT_PATTERN.search(system)
+            sections = _SCORE_PATTERN.search(system)
+            text = json.dumps({
+                "verdict": verdict.group(1) if verdict else rng.choice(["BUY", "HOLD", "AVOID"]),
+                "confidence": round(rng.uniform(0.4, 0.9), 2),
+                "risk_score": rng.randint(1, 10),
+                "section_scores": [
+                    {"section": key, "score": rng.randint(1, 5)}
+                    for key in (sections.group(1).split(", ") if sections else [])
+                ],
+                "key_risks": rng.sample(
+                    ["valuation", "leverage", "competition", "regulation", "dilution",
+                     "insider selling", "rate sensitivity"], k=rng.randint(1, 4),
+                ),
+            })
+            grounding = None
+        elif sectors:
+            # The same ticker always lands in the same sector
+            choices = sectors.group(1).split("; ")
+            text = json.dumps({
+                t: self._rng("sector", t).choice(choices) for t in sectors.group(2).split(", ")
+            })
+            grounding = None
+        elif rng.random() < self.config.invalid_rates.get(self.model, 0.0) and agent.endswith("Agent"):
+            text = "No relevant information was found."
+            grounding = None
+        elif agent == "InvestmentAggregator":
+            verdict = rng.choice(["BUY", "HOLD", "AVOID"])
+            text = (
+                f"**Investment Recommendation: {verdict}**\n\n"
+                f"{ticker} shows a mixed but data-driven profile across the research "
+                f"areas. Confidence: {rng.randint(40, 90)}%.\n\n"
+                f"**Key Risks:** valuation at {rng.uniform(15, 60):.1f}x earnings, "
+                f"debt-to-equity of {rng.uniform(0.1, 2.5):.2f}.\n\n"
+                f"**Key Opportunities:** revenue growth of {rng.uniform(-5, 40):.1f}% "
+                f"year over year."
+            )
+            grounding = None
+        else:
+            sources = [
+                (title, url.format(ticker=ticker))
+                for title, url in self.config.search_results
+            ]
+            text = (
+                f"{agent.removesuffix('Agent')} findings for {ticker}: metric at "
+                f"{rng.uniform(0, 100):.1f}%, change of {rng.uniform(-20, 20):+.1f}% "
+                f"over the last year, rated {rng.choice(['positive', 'neutral', 'negative'])}.\n"
+                f"Sources: " + "; ".join(f"{title} ({url})" for title, url in sources)
+            )
+            if _GATE_MARKER in system:
+                if self._rng("gate", agent, ticker).random() < self.config.gate_rates.get(agent, 0.0):
+                    text += f"\nHard AVOID: yes - {_GATE_REASONS.get(agent, 'disqualifying finding')}"
+                else:
+                    text += "\nHard AVOID: no"
+            queries = [f"{ticker} {agent.removesuffix('Agent')}"]
+            if _SHARED_MACRO_MARKER not in system:
+                queries += self.config.macro_queries.get(agent, ())
+            searches = len(queries)
+            grounding = types.GroundingMetadata(
+                web_search_queries=queries,
+                grounding_chunks=[
+                    types.GroundingChunk(web=types.GroundingChunkWeb(title=title, uri=url))
+                    for title, url in sources
+                ],
+            )
+        prompt_tokens = prompt_chars // 4
+        output_tokens = len(text) // 4
+        search_tokens = searches * self.config.search_tokens
+        return LlmResponse(
+            content=types.ModelContent(text),
+            grounding_metadata=grounding,
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens,
+                candidates_token_count=output_tokens,
+                tool_use_prompt_token_count=search_tokens or None,
+                total_token_count=prompt_tokens + output_tokens + search_tokens,
+            ),
+            turn_complete=True,
+        )
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        labels = (llm_request.config.labels or {}) if llm_request.config else {}
+        agent = labels.get("adk_agent_name", "unknown")
+        prompt = _request_text(llm_request)
+        system = llm_request.config.system_instruction if llm_request.config else None
+        system = system if isinstance(system, str) else ""
+        match = _TICKER_PATTERN.search(prompt) or _TICKER_PATTERN.search(system)
+        ticker = match.group(1) if match else "UNKNOWN"
+        prompt_chars = len(prompt) + len(system)
+
+        call_index = self._calls.get((agent, ticker), 0)
+        self._calls[(agent, ticker)] = call_index + 1
+        rng = self._rng(self.model, agent, ticker, call_index)
+
+        # 5xx errors are retried below the model like the real HTTP client does
+        retry = RETRY_CONFIG
+        for attempt in range(retry.attempts or 1):
+            await asyncio.sleep(self._latency(rng, agent))
+            code = self._injected_error(rng)
+            if code is None:
+                break
+            if code == 429:
+                raise ClientError(code, _error_payload(code, "RESOURCE_EXHAUSTED"))
+            if code not in (retry.http_status_codes or []) or attempt == retry.attempts - 1:
+                raise ServerError(code, _error_payload(code, "UNAVAILABLE"))
+            delay = min(retry.max_delay or math.inf,
+                        retry.initial_delay * retry.exp_base ** attempt)
+            await asyncio.sleep(delay * self.config.latency_scale)
+
+        if _awaiting_search(llm_request):
+            query = self.config.search_queries.get(
+                agent, agent.removesuffix("Agent").lower()
+            )
+            yield LlmResponse(content=types.Content(role="model", parts=[
+                types.Part.from_function_call(
+                    name="web_search", args={"query": f"{ticker} {query}"}
+                )
+            ]))
+            return
+
+        response = self._respond(agent, ticker, rng, prompt_chars, system, prompt)
+        if stream:
+            text = response.content.parts[0].text
+            for i in range(0, len(text), 80):
+                yield LlmResponse(content=types.ModelContent(text[i:i + 80]), partial=True)
+        yield response
@@ -0,0 +1,506 @@
+"""Memory-mapped fundamentals store for debt, dilution and short-interest metrics.
+
+Local filings extracts (CSV or Parquet) are compiled once into a directory
+of NumPy column files sorted by ticker and period. The store memory-maps
+those columns and computes the ratios for the whole universe in a few
+vectorized passes. ``FundamentalsPlugin`` then hands each ticker's numbers
+to the debt, dilution and short interest agents through session state, or
+answers those sections outright without an LLM call.
+
+Build a store from extracts with:
+
+    python -m fundamentals build extracts/*.csv extracts/*.parquet
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from datetime import date, datetime
+from typing import Optional
+
+import numpy as np
+from google.adk.agents import LlmAgent
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.plugins.base_plugin import BasePlugin
+from google.genai import types
+
+from config import FUNDAMENTALS_DIR, FUNDAMENTALS_MAX_AGE_DAYS, FUNDAMENTALS_MODE
+
+# Numeric columns read from the extracts; any of them may be missing or blank
+NUMERIC_COLUMNS = (
+    "total_debt",
+    "cash",
+    "total_equity",
+    "net_income",
+    "shares_outstanding",
+    "shares_short",
+    "float_shares",
+    "avg_daily_volume",
+)
+
+META_FILE = "meta.json"
+
+# Sort key stride per ticker; larger than any day offset from the epoch
+_KEY_STRIDE = 1 << 40
+
+
+def _read_extract(path: str) -> dict[str, np.ndarray]:
+    """Read one CSV or Parquet extract into normalized column arrays."""
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError(
+                "Reading Parquet extracts requires pyarrow: pip install pyarrow"
+            ) from e
+        table = pq.read_table(path)
+        raw = {
+            name: table.column(name).to_numpy(zero_copy_only=False)
+            for name in table.column_names
+        }
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            rows = list(reader)
+            fieldnames = reader.fieldnames or []
+        raw = {name: np.array([row[name] for row in rows]) for name in fieldnames}
+
+    for required in ("ticker", "period_end"):
+        if required not in raw:
+            raise ValueError(f"{path}: missing required column '{required}'")
+
+    size = len(raw["ticker"])
+    columns = {
+        "ticker": np.char.upper(np.char.strip(raw["ticker"].astype(str))),
+        "period_end": np.asarray(raw["period_end"]).astype("datetime64[D]"),
+    }
+    for name in NUMERIC_COLUMNS:
+        values = raw.get(name)
+        if values is None:
+            columns[name] = np.full(size, np.nan)
+        elif values.dtype.kind in "US":
+            columns[name] = np.where(values == "", "nan", values).astype(np.float64)
+        else:
+            columns[name] = np.asarray(values, dtype=np.float64)
+    return columns
+
+
+def write_store(columns: dict[str, np.ndarray], out_dir: str = FUNDAMENTALS_DIR,
+                sources: Optional[list[str]] = None) -> dict:
+    """Sort, deduplicate and write fundamentals columns as ``.npy`` files.
+
+    Rows are ordered by ticker and period. When the same ticker and period
+    appear more than once the rows are merged column by column, with the
+    last non-blank value winning, so later extracts override earlier ones.
+
+    Args:
+        columns: ``ticker``, ``period_end`` and any of ``NUMERIC_COLUMNS``.
+        out_dir: Directory of the store.
+        sources: Extract paths recorded in the store metadata.
+
+    Returns:
+        dict: The store metadata.
+    """
+    tickers = np.asarray(columns["ticker"]).astype(str)
+    period_end = np.asarray(columns["period_end"]).astype("datetime64[D]")
+    order = np.lexsort((period_end, tickers))  # stable, keeps extract order on ties
+    tickers, period_end = tickers[order], period_end[order]
+
+    # Last row of every (ticker, period) and the first row of its duplicates
+    keep = np.ones(len(order), dtype=bool)
+    keep[:-1] = (tickers[1:] != tickers[:-1]) | (period_end[1:] != period_end[:-1])
+    last_rows = np.flatnonzero(keep)
+    first_rows = np.concatenate(([0], last_rows[:-1] + 1))
+    positions = np.arange(len(order))
+
+    arrays = {}
+    for name in NUMERIC_COLUMNS:
+        values = columns.get(name)
+        if values is None:
+            arrays[name] = np.full(len(last_rows), np.nan)
+            continue
+        values = np.asarray(values, dtype=np.float64)[order]
+        valid = np.maximum.accumulate(np.where(np.isnan(values), -1, positions))[last_rows]
+        arrays[name] = np.where(
+            valid >= first_rows, values[np.maximum(valid, 0)], np.nan
+        )
+    tickers, period_end = tickers[last_rows], period_end[last_rows]
+
+    universe, ticker_index = np.unique(tickers, return_inverse=True)
+    offsets = np.zeros(len(universe) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(ticker_index, minlength=len(universe)), out=offsets[1:])
+    arrays.update(tickers=universe, offsets=offsets, period_end=period_end)
+
+    os.makedirs(out_dir, exist_ok=True)
+    for name, values in arrays.items():
+        tmp_path = os.path.join(out_dir, f"{name}.tmp.npy")
+        np.save(tmp_path, values)
+        os.replace(tmp_path, os.path.join(out_dir, f"{name}.npy"))
+
+    meta = {
+        "rows": int(len(period_end)),
+        "tickers": int(len(universe)),
+        "columns": list(NUMERIC_COLUMNS),
+        "sources": list(sources or []),
+        "built_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    with open(os.path.join(out_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def build_store(sources: list[str], out_dir: str = FUNDAMENTALS_DIR) -> dict:
+    """Compile CSV/Parquet filings extracts into a fundamentals store.
+
+    Args:
+        sources: Paths of the extracts, oldest first.
+        out_dir: Directory of the store.
+
+    Returns:
+        dict: The store metadata.
+    """
+    extracts = [_read_extract(path) for path in sources]
+    columns = {
+        name: np.concatenate([extract[name] for extract in extracts])
+        for name in ("ticker", "period_end", *NUMERIC_COLUMNS)
+    }
+    return write_store(columns, out_dir, sources)
+
+
+def compute_metrics(
+    offsets: np.ndarray, period_end: np.ndarray, columns: dict[str, np.ndarray]
+) -> dict[str, np.ndarray]:
+    """Compute per-ticker fundamentals for the whole universe at once.
+
+    Each column's value is the latest one reported for the ticker, skipping
+    blank periods. Share count changes compare against the latest count
+    reported at least one and three years before the ticker's last period.
+
+    Args:
+        offsets: Start of each ticker's rows, plus the total row count.
+        period_end: Period end date of every row, sorted within each ticker.
+        columns: The ``NUMERIC_COLUMNS`` arrays, aligned with ``period_end``.
+
+    Returns:
+        dict[str, np.ndarray]: One array per metric, indexed like the
+        store's tickers. Missing values are NaN.
+    """
+    starts = np.asarray(offsets[:-1])
+    last = np.asarray(offsets[1:]) - 1
+    positions = np.arange(len(period_end))
+    days = np.asarray(period_end).astype(np.int64)
+    group = np.repeat(np.arange(len(starts)), np.diff(offsets))
+
+    def prior_row(years: int) -> np.ndarray:
+        # Last row of the same ticker on or before ``years`` before its last period
+        keys = group * _KEY_STRIDE + days
+        targets = np.arange(len(starts)) * _KEY_STRIDE + days[last] - 365 * years
+        return np.searchsorted(keys, targets, side="right") - 1
+
+    def latest(values: np.ndarray, upto: np.ndarray = last) -> np.ndarray:
+        # Most recent non-blank value at or before each ``upto`` row
+        valid = np.maximum.accumulate(np.where(np.isnan(values), -1, positions))
+        index = valid[np.maximum(upto, 0)]
+        found = (upto >= starts) & (index >= starts)
+        return np.where(found, values[np.maximum(index, 0)], np.nan)
+
+    values = {name: np.asarray(columns[name]) for name in NUMERIC_COLUMNS}
+    debt = latest(values["total_debt"])
+    cash = latest(values["cash"])
+    equity = latest(values["total_equity"])
+    net_income = latest(values["net_income"])
+    shares = latest(values["shares_outstanding"])
+    shares_1y = latest(values["shares_outstanding"], prior_row(1))
+    shares_3y = latest(values["shares_outstanding"], prior_row(3))
+    short = latest(values["shares_short"])
+    float_shares = latest(values["float_shares"])
+    volume = latest(values["avg_daily_volume"])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "as_of": np.asarray(period_end)[last],
+            "total_debt": debt,
+            "cash": cash,
+            "net_debt": debt - cash,
+            "total_equity": equity,
+            "net_income": net_income,
+            "debt_to_equity": np.where(equity > 0, debt / equity, np.nan),
+            "debt_payoff_years": np.where(net_income > 0, debt / net_income, np.nan),
+            "shares_outstanding": shares,
+            "share_change_1y": shares / shares_1y - 1,
+            "share_change_3y": shares / shares_3y - 1,
+            "short_pct_float": np.where(float_shares > 0, short / float_shares, np.nan),
+            "days_to_cover": np.where(volume > 0, short / volume, np.nan),
+        }
+
+
+class FundamentalsStore:
+    """Read-only, memory-mapped view of a compiled fundamentals store.
+
+    Columns are mapped lazily by the OS, so opening a store is cheap and
+    only the pages touched by ``metrics`` are read. Metrics are computed
+    once for the whole universe and reused for every lookup.
+    """
+
+    def __init__(self, path: str = FUNDAMENTALS_DIR):
+        self.path = path
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            self.meta = json.load(f)
+
+        def load(name: str) -> np.ndarray:
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+        self.tickers = load("tickers")
+        self.offsets = load("offsets")
+        self.period_end = load("period_end")
+        self.columns = {name: load(name) for name in NUMERIC_COLUMNS}
+        self._metrics: Optional[dict[str, np.ndarray]] = None
+        self._index: Optional[dict[str, int]] = None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def __contains__(self, ticker: str) -> bool:
+        return self.index_of(ticker) is not None
+
+    def index_of(self, ticker: str) -> Optional[int]:
+        if self._index is None:
+            self._index = {str(t): i for i, t in enumerate(self.tickers)}
+        return self._index.get(ticker.strip().upper())
+
+    def metrics(self) -> dict[str, np.ndarray]:
+        """Metrics for every ticker in the store, computed on first use."""
+        if self._metrics is None:
+            self._metrics = compute_metrics(self.offsets, self.period_end, self.columns)
+        return self._metrics
+
+    def lookup(self, ticker: str) -> Optional[dict]:
+        """Return the metrics of one ticker, or ``None`` if it is unknown.
+
+        Args:
+            ticker: The ticker symbol (case-insensitive).
+
+        Returns:
+            Optional[dict]: Metric name to value; ``as_of`` is a ``date``
+            and missing numbers are ``None``.
+        """
+        i = self.index_of(ticker)
+        if i is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        row = {}
+        for name, values in self.metrics().items():
+            value = values[i]
+            if name == "as_of":
+                row[name] = value.astype(date)
+            else:
+                row[name] = None if np.isnan(value) else float(value)
+        return row
+
+    def summary(self) -> str:
+        return f"{len(self)} tickers, {self.hits} lookups found, {self.misses} missing"
+
+
+def open_store(path: str = FUNDAMENTALS_DIR) -> Optional[FundamentalsStore]:
+    """Open the fundamentals store if it is enabled and has been built."""
+    if FUNDAMENTALS_MODE == "off" or not os.path.exists(os.path.join(path, META_FILE)):
+        return None
+    return FundamentalsStore(path)
+
+
+def _count(value: float) -> str:
+    for limit, suffix in ((1e12, "T"), (1e9, "B"), (1e6, "M")):
+        if abs(value) >= limit:
+            return f"{value / limit:.2f}{suffix}"
+    return f"{value:,.0f}"
+
+
+def _money(value: float) -> str:
+    return f"-${_count(-value)}" if value < 0 else f"${_count(value)}"
+
+
+def _pct(value: float) -> str:
+    return f"{value:+.1%}"
+
+
+# Figures shown to each agent, as (metric, label, formatter)
+FUNDAMENTAL_SECTIONS = {
+    "debt_analysis": (
+        ("total_debt", "Total debt", _money),
+        ("cash", "Cash", _money),
+        ("net_debt", "Net debt", _money),
+        ("total_equity", "Shareholders' equity", _money),
+        ("net_income", "Net income (trailing)", _money),
+        ("debt_to_equity", "Debt-to-equity", "{:.2f}".format),
+        ("debt_payoff_years", "Years to repay debt from net income", "{:.1f}".format),
+    ),
+    "share_dilution": (
+        ("shares_outstanding", "Shares outstanding", _count),
+        ("share_change_1y", "Share count change over 1 year", _pct),
+        ("share_change_3y", "Share count change over 3 years", _pct),
+    ),
+    "short_interest": (
+        ("short_pct_float", "Short interest (% of float)", "{:.1%}".format),
+        ("days_to_cover", "Days to cover", "{:.1f}".format),
+    ),
+}
+
+# State key suffix under which each section's figures are injected
+FIGURES_SUFFIX = "_figures"
+
+
+def format_figures(output_key: str, metrics: dict) -> str:
+    """Format one section's figures for the agent's instruction.
+
+    Returns an empty string when none of the section's figures are known.
+    """
+    lines = [
+        f"- {label}: {fmt(metrics[name])}"
+        for name, label, fmt in FUNDAMENTAL_SECTIONS[output_key]
+        if metrics.get(name) is not None
+    ]
+    if not lines:
+        return ""
+    return (
+        f"Use these reported figures from local filings (latest period "
+        f"{metrics['as_of']}) instead of searching for them:\n" + "\n".join(lines)
+    )
+
+
+def _assess_debt(m: dict) -> Optional[str]:
+    if m["debt_to_equity"] is None:
+        return None
+    ratio = m["debt_to_equity"]
+    level = "low" if ratio < 0.5 else "moderate" if ratio < 1.5 else "high"
+    text = f"Leverage is {level} at {ratio:.2f}x equity."
+    if m["debt_payoff_years"] is None:
+        return text + " Net income is not positive, so current earnings do not cover the debt."
+    years = m["debt_payoff_years"]
+    verdict = "manageable" if years <= 4 else "concerning"
+    return text + f" Current earnings would repay it in about {years:.1f} years, which is {verdict}."
+
+
+def _assess_dilution(m: dict) -> Optional[str]:
+    change = m["share_change_1y"]
+    if change is None:
+        return None
+    if change < -0.01:
+        return "The share count is decreasing, so buybacks are returning capital to shareholders (good)."
+    if change > 0.01:
+        return "The share count is increasing, so existing shareholders are being diluted (bad)."
+    return "The share count is roughly flat, with no meaningful dilution or buybacks."
+
+
+def _assess_short_interest(m: dict) -> Optional[str]:
+    short = m["short_pct_float"]
+    if short is None:
+        return None
+    if short < 0.05:
+        return "Short interest is low, showing little bearish positioning."
+    if short < 0.15:
+        return "Short interest is moderate, so some investors are betting against the stock."
+    return "Short interest is high, signaling strong bearish sentiment and squeeze risk."
+
+
+_ASSESSMENTS = {
+    "debt_analysis": _assess_debt,
+    "share_dilution": _assess_dilution,
+    "short_interest": _assess_short_interest,
+}
+
+
+def render_section(output_key: str, ticker: str, metrics: dict) -> Optional[str]:
+    """Write a complete section from local figures, without an LLM call.
+
+    Returns ``None`` when the key figure for the section is missing.
+    """
+    assessment = _ASSESSMENTS[output_key](metrics)
+    if assessment is None:
+        return None
+    figures = "\n".join(
+        f"- {label}: {fmt(metrics[name])}"
+        for name, label, fmt in FUNDAMENTAL_SECTIONS[output_key]
+        if metrics.get(name) is not None
+    )
+    return (
+        f"{ticker} figures from local filings (latest period {metrics['as_of']}):\n"
+        f"{figures}\n\n{assessment}"
+    )
+
+
+class FundamentalsPlugin(BasePlugin):
+    """Gives the debt, dilution and short interest agents local figures.
+
+    In ``inject`` mode each agent's figures are written to session state
+    under ``<output_key>_figures``, which its instruction includes, so the
+    model interprets exact numbers instead of searching for them. In
+    ``skip`` mode sections whose figures are complete and recent are
+    written directly and the agent is short-circuited.
+    """
+
+    def __init__(self, store: FundamentalsStore, mode: str = FUNDAMENTALS_MODE,
+                 max_age_days: int = FUNDAMENTALS_MAX_AGE_DAYS):
+        super().__init__(name="fundamentals")
+        self.store = store
+        self.skip = mode == "skip"
+        self.max_age_days = max_age_days
+
+    async def before_agent_callback(
+        self, *, agent: BaseAgent, callback_context: CallbackContext
+    ) -> Optional[types.Content]:
+        if not isinstance(agent, LlmAgent) or agent.output_key not in FUNDAMENTAL_SECTIONS:
+            return None
+        ticker = callback_context.state.get("stock_query")
+        metrics = self.store.lookup(ticker) if ticker else None
+        if metrics is None:
+            return None
+
+        fresh = (date.today() - metrics["as_of"]).days <= self.max_age_days
+        if self.skip and fresh:
+            text = render_section(agent.output_key, ticker, metrics)
+            if text:
+                callback_context.state[agent.output_key] = text
+                return types.ModelContent(text)
+
+        figures = format_figures(agent.output_key, metrics)
+        if figures:
+            callback_context.state[agent.output_key + FIGURES_SUFFIX] = figures
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the local fundamentals store.")
+    parser.add_argument("--store", default=FUNDAMENTALS_DIR,
+                        help=f"Store directory (default: {FUNDAMENTALS_DIR}).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Compile CSV/Parquet extracts into the store.")
+    build.add_argument("sources", nargs="+", help="Extract files, oldest first.")
+    show = commands.add_parser("show", help="Print the metrics of one or more tickers.")
+    show.add_argument("tickers", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        started = time.perf_counter()
+        meta = build_store(args.sources, args.store)
+        print(f"✅ Built fundamentals store in {args.store}: {meta['tickers']} tickers, "
+              f"{meta['rows']} rows ({time.perf_counter() - started:.2f}s)")
+        return
+
+    store = FundamentalsStore(args.store)
+    for ticker in args.tickers:
+        metrics = store.lookup(ticker)
+        if metrics is None:
+            print(f"❌ {ticker.upper()}: not in the store")
+            continue
+        print(f"\n📊 {ticker.upper()}")
+        for output_key in FUNDAMENTAL_SECTIONS:
+            print(format_figures(output_key, metrics) or f"No {output_key} figures.")
+
+
+if __name__ == "__main__":
+    main()
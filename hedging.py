@@ -0,0 +1,183 @@
+"""Hedged model calls to cut the tail latency of slow agents.
+
+The slowest of the parallel research calls sets a run's wall time, and a
+few calls take several times the median. ``HedgedLlm`` tracks the latency
+of each agent's recent primary calls, never of the hedges; when a call is still running past that agent's
+``HEDGE_PERCENTILE`` latency it sends a duplicate request, returns
+whichever answer arrives first and cancels the other.
+
+Hedges are extra requests against the same quota, so they are capped at
+``HEDGE_MAX_EXTRA`` of all calls and skipped while the rate limiter is
+queueing calls. Streaming calls are never hedged.
+"""
+import asyncio
+import functools
+import math
+import time
+from collections import deque
+from typing import AsyncGenerator, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+from config import HEDGE_HISTORY_SIZE, HEDGE_MAX_EXTRA, HEDGE_MIN_SAMPLES, HEDGE_PERCENTILE
+from ratelimit import AdaptiveRateLimiter
+
+
+def _percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class Hedger:
+    """Per-agent latency history, hedging policy and statistics.
+
+    Args:
+        percentile: Latency percentile of an agent's recent calls after
+            which a call is hedged.
+        min_samples: Calls an agent needs before its calls are hedged.
+        max_extra: Maximum hedges as a fraction of all calls.
+        history_size: Recent latencies kept per agent.
+    """
+
+    def __init__(
+        self,
+        percentile: float = HEDGE_PERCENTILE,
+        min_samples: int = HEDGE_MIN_SAMPLES,
+        max_extra: float = HEDGE_MAX_EXTRA,
+        history_size: int = HEDGE_HISTORY_SIZE,
+    ):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_extra = max_extra
+        self.history_size = history_size
+        self.reset()
+
+    def reset(self) -> None:
+        self._history: dict[str, deque[float]] = {}
+        self.latencies: list[float] = []
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.over_budget = 0
+
+    def hedge_delay(self, agent: str) -> Optional[float]:
+        """Seconds after which a call from ``agent`` is hedged, if known yet."""
+        history = self._history.get(agent)
+        if not history or len(history) < self.min_samples:
+            return None
+        delay = _percentile(history, self.percentile)
+        return delay if math.isfinite(delay) else None
+
+    def allow(self, limiter: Optional[AdaptiveRateLimiter] = None) -> bool:
+        """Whether one more hedge fits the budget and the rate limit."""
+        if self.hedged + 1 > self.max_extra * self.calls:
+            self.over_budget += 1
+            return False
+        if limiter is not None and limiter.queue_depth > 0:
+            self.over_budget += 1
+            return False
+        return True
+
+    def record(self, agent: str, latency: float, primary_latency: Optional[float] = None) -> None:
+        """Record a call's latency, and its primary's for the hedge trigger.
+
+        Only primaries feed the history: a hedge that won answers sooner
+        than the call it replaced and would pull the trigger down until
+        every call is hedged. A primary the hedge beat counts as unbounded,
+        above any trigger; if more than the tail is hedged the agent stops
+        being hedged.
+        """
+        primary_latency = latency if primary_latency is None else primary_latency
+        self._history.setdefault(agent, deque(maxlen=self.history_size)).append(primary_latency)
+        self.latencies.append(latency)
+
+    def summary(self) -> str:
+        rate = self.hedged / self.calls if self.calls else 0.0
+        line = (
+            f"{self.hedged}/{self.calls} calls hedged ({rate:.1%}), "
+            f"{self.hedge_wins} won by the hedge, {self.over_budget} over budget"
+        )
+        if self.latencies:
+            line += (
+                f"; call latency p50 {_percentile(self.latencies, 50):.2f}s, "
+                f"p95 {_percentile(self.latencies, 95):.2f}s, "
+                f"p99 {_percentile(self.latencies, 99):.2f}s"
+            )
+        return line
+
+
+@functools.lru_cache(maxsize=1)
+def get_hedger() -> Hedger:
+    """The process-wide hedger shared by every model."""
+    return Hedger()
+
+
+def _copy_request(llm_request: LlmRequest) -> LlmRequest:
+    # Backends modify the request they are given (e.g. Gemini drops the
+    # labels), so each attempt gets its own copy of the mutable parts
+    return llm_request.model_copy(update={
+        "contents": list(llm_request.contents),
+        "config": llm_request.config.model_copy(deep=True) if llm_request.config else None,
+    })
+
+
+class HedgedLlm(BaseLlm):
+    """Model wrapper that duplicates calls running past their agent's tail latency."""
+
+    inner: BaseLlm
+    hedger: Hedger
+    limiter: Optional[AdaptiveRateLimiter] = None
+
+    async def _collect(self, llm_request: LlmRequest) -> list[LlmResponse]:
+        return [
+            response
+            async for response in self.inner.generate_content_async(llm_request, stream=False)
+        ]
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        labels = (llm_request.config.labels or {}) if llm_request.config else {}
+        agent = labels.get("adk_agent_name")
+        if stream or agent is None:
+            async for response in self.inner.generate_content_async(llm_request, stream=stream):
+                yield response
+            return
+
+        self.hedger.calls += 1
+        delay = self.hedger.hedge_delay(agent)
+        spare = _copy_request(llm_request) if delay is not None else None
+        started = time.perf_counter()
+        primary = asyncio.create_task(self._collect(llm_request))
+        tasks = {primary}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and self.hedger.allow(self.limiter):
+                    self.hedger.hedged += 1
+                    tasks.add(asyncio.create_task(self._collect(spare)))
+
+            pending, winner = set(tasks), None
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # A failed attempt only loses if another one is still running
+                winner = next((task for task in done if not task.exception()), None)
+            if winner is None:
+                raise primary.exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        latency = time.perf_counter() - started
+        if winner is primary:
+            self.hedger.record(agent, latency)
+        else:
+            self.hedger.hedge_wins += 1
+            # The primary was cancelled unfinished: its latency is unknown
+            self.hedger.record(agent, latency, primary_latency=math.inf)
+        for response in winner.result():
+            yield response
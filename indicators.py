@@ -0,0 +1,673 @@
+"""Technical indicators computed locally from memory-mapped daily prices.
+
+Daily OHLCV bars (CSV or Parquet, one row per ticker and day) are compiled
+into a directory of raw float32 matrices, one per field, with a row per
+trading day and a column per ticker. New bars are appended to the files in
+place and the store memory-maps them.
+
+MACD's moving averages and Wilder's RSI and ATR are recursive, so they are
+kept as per-ticker state that advances one bar at a time for the whole
+universe at once. The state is saved with the store, so a new bar costs one
+step rather than a pass over the history. Moving averages, Bollinger bands
+and the 52-week range come from the last year of rows. ``IndicatorsPlugin``
+hands each ticker's values to the technical analysis agent through session
+state, so the model interprets them instead of searching for them.
+
+Build a store from price files, then append bars as they arrive:
+
+    python -m indicators build prices/*.csv
+    python -m indicators append prices/2025-06-30.csv
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from datetime import date, datetime
+from typing import Optional
+
+import numpy as np
+from google.adk.agents import LlmAgent
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.plugins.base_plugin import BasePlugin
+from google.genai import types
+
+from config import INDICATORS_ENABLED, INDICATORS_MAX_AGE_DAYS, PRICES_DIR
+from fundamentals import FIGURES_SUFFIX
+
+# Price fields, each stored as a (bars, tickers) float32 matrix
+FIELDS = ("open", "high", "low", "close", "volume")
+
+RSI_PERIOD = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+ATR_PERIOD = 14
+SMA_PERIODS = (20, 50, 200)
+BOLLINGER_PERIOD = 20
+BOLLINGER_WIDTH = 2.0
+MONTH_BARS = 21
+YEAR_BARS = 252
+
+# Trailing rows read for the windowed indicators
+WINDOW = max(*SMA_PERIODS, BOLLINGER_PERIOD, MONTH_BARS + 1, YEAR_BARS)
+# Share of a window's bars a ticker needs for its average to be reported
+MIN_COVERAGE = 0.8
+
+# Recursive indicator state, one value per ticker
+_SMOOTHED = ("prev_close", "ema_fast", "ema_slow", "macd_signal", "avg_gain", "avg_loss", "atr")
+
+META_FILE = "meta.json"
+STATE_FILE = "state.npz"
+DATES_FILE = "dates.bin"
+
+
+def _field_file(name: str) -> str:
+    return f"{name}.bin"
+
+
+def _read_bars(path: str) -> dict[str, np.ndarray]:
+    """Read one CSV or Parquet price file into normalized column arrays."""
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError(
+                "Reading Parquet price files requires pyarrow: pip install pyarrow"
+            ) from e
+        table = pq.read_table(path)
+        raw = {
+            name: table.column(name).to_numpy(zero_copy_only=False)
+            for name in table.column_names
+        }
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            rows = list(reader)
+            fieldnames = reader.fieldnames or []
+        raw = {name: np.array([row[name] for row in rows]) for name in fieldnames}
+
+    for required in ("ticker", "date", "close"):
+        if required not in raw:
+            raise ValueError(f"{path}: missing required column '{required}'")
+
+    size = len(raw["ticker"])
+    columns = {
+        "ticker": np.char.upper(np.char.strip(raw["ticker"].astype(str))),
+        "date": np.asarray(raw["date"]).astype("datetime64[D]"),
+    }
+    for name in FIELDS:
+        values = raw.get(name)
+        if values is None:
+            columns[name] = np.full(size, np.nan)
+        elif values.dtype.kind in "US":
+            columns[name] = np.where(values == "", "nan", values).astype(np.float64)
+        else:
+            columns[name] = np.asarray(values, dtype=np.float64)
+    return columns
+
+
+def _read_sources(sources: list[str]) -> dict[str, np.ndarray]:
+    files = [_read_bars(path) for path in sources]
+    return {
+        name: np.concatenate([columns[name] for columns in files])
+        for name in ("ticker", "date", *FIELDS)
+    }
+
+
+def _pivot(
+    columns: dict[str, np.ndarray], universe: np.ndarray, calendar: np.ndarray
+) -> dict[str, np.ndarray]:
+    """Lay rows out as (calendar, universe) matrices; later rows win on duplicates.
+
+    Every row's ticker and date must be in ``universe`` and ``calendar``,
+    which are sorted. Days a ticker has no row for are NaN.
+    """
+    tickers, days = columns["ticker"], columns["date"]
+    order = np.lexsort((days, tickers))  # stable, keeps file order on ties
+    tickers, days = tickers[order], days[order]
+    keep = np.ones(len(order), dtype=bool)
+    keep[:-1] = (tickers[1:] != tickers[:-1]) | (days[1:] != days[:-1])
+    rows = np.searchsorted(calendar, days[keep])
+    cols = np.searchsorted(universe, tickers[keep])
+
+    matrices = {}
+    for name in FIELDS:
+        matrix = np.full((len(calendar), len(universe)), np.nan, dtype=np.float32)
+        matrix[rows, cols] = columns[name][order][keep]
+        matrices[name] = matrix
+    return matrices
+
+
+def _write_meta(path: str, meta: dict) -> None:
+    tmp_path = os.path.join(path, f"{META_FILE}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, os.path.join(path, META_FILE))
+
+
+def write_store(
+    tickers: np.ndarray,
+    dates: np.ndarray,
+    columns: dict[str, np.ndarray],
+    out_dir: str = PRICES_DIR,
+    sources: Optional[list[str]] = None,
+) -> dict:
+    """Write dense price matrices as a new store, replacing any existing one.
+
+    Args:
+        tickers: Ticker of every column.
+        dates: Trading day of every row, strictly increasing.
+        columns: A ``(len(dates), len(tickers))`` matrix per field in
+            ``FIELDS``; missing bars are NaN.
+        out_dir: Directory of the store.
+        sources: Price file paths recorded in the store metadata.
+
+    Returns:
+        dict: The store metadata.
+
+    Raises:
+        ValueError: If the dates are not increasing or a matrix has the
+            wrong shape.
+    """
+    tickers = np.asarray(tickers).astype(str)
+    dates = np.asarray(dates).astype("datetime64[D]")
+    if len(dates) == 0 or np.any(np.diff(dates) <= np.timedelta64(0, "D")):
+        raise ValueError("Price dates must be non-empty and strictly increasing")
+    order = np.argsort(tickers, kind="stable")
+
+    os.makedirs(out_dir, exist_ok=True)
+    for name in FIELDS:
+        values = columns[name]
+        if values.shape != (len(dates), len(tickers)):
+            raise ValueError(
+                f"'{name}' has shape {values.shape}, expected {(len(dates), len(tickers))}"
+            )
+        tmp_path = os.path.join(out_dir, f"{name}.tmp")
+        np.ascontiguousarray(values[:, order], dtype=np.float32).tofile(tmp_path)
+        os.replace(tmp_path, os.path.join(out_dir, _field_file(name)))
+    tmp_path = os.path.join(out_dir, "dates.tmp")
+    dates.astype(np.int64).tofile(tmp_path)
+    os.replace(tmp_path, os.path.join(out_dir, DATES_FILE))
+    tmp_path = os.path.join(out_dir, "tickers.tmp.npy")
+    np.save(tmp_path, tickers[order])
+    os.replace(tmp_path, os.path.join(out_dir, "tickers.npy"))
+    # Saved state (indicators, sensitivity sums) belongs to the old bars
+    for name in os.listdir(out_dir):
+        if name.endswith(".npz"):
+            os.remove(os.path.join(out_dir, name))
+
+    built_at = datetime.now().isoformat(timespec="seconds")
+    meta = {
+        "bars": int(len(dates)),
+        "tickers": int(len(tickers)),
+        "first_date": str(dates[0]),
+        "last_date": str(dates[-1]),
+        "sources": list(sources or []),
+        "built_at": built_at,
+        "updated_at": built_at,
+    }
+    _write_meta(out_dir, meta)
+    return meta
+
+
+def build_store(sources: list[str], out_dir: str = PRICES_DIR) -> dict:
+    """Compile CSV/Parquet daily price files into a price store.
+
+    The store covers every ticker and trading day found in the files, and
+    the indicator state is computed right away so lookups start warm.
+
+    Args:
+        sources: Paths of the price files, oldest first.
+        out_dir: Directory of the store.
+
+    Returns:
+        dict: The store metadata.
+    """
+    columns = _read_sources(sources)
+    universe = np.unique(columns["ticker"])
+    calendar = np.unique(columns["date"])
+    meta = write_store(universe, calendar, _pivot(columns, universe, calendar), out_dir, sources)
+    PriceStore(out_dir).state()
+    return meta
+
+
+def new_state(tickers: int) -> dict[str, np.ndarray]:
+    """Indicator state before any bar, for ``tickers`` tickers."""
+    state = {name: np.full(tickers, np.nan) for name in _SMOOTHED}
+    state["count"] = np.zeros(tickers, dtype=np.int64)
+    state["last_bar"] = np.full(tickers, -1, dtype=np.int64)
+    state["bars"] = np.zeros((), dtype=np.int64)
+    return state
+
+
+def _smooth(average: np.ndarray, values: np.ndarray, alpha: float) -> None:
+    """Exponentially smooth ``values`` into ``average`` in place.
+
+    Tickers without a value keep their average; tickers without an average
+    yet start from their value.
+    """
+    present = ~np.isnan(values)
+    np.copyto(average, average + alpha * (values - average), where=present & ~np.isnan(average))
+    np.copyto(average, values, where=present & np.isnan(average))
+
+
+def advance(
+    state: dict[str, np.ndarray], high: np.ndarray, low: np.ndarray, close: np.ndarray
+) -> None:
+    """Fold new bars into the recursive indicator state, in place.
+
+    Each step updates every ticker at once. Averages start from their first
+    value, as pandas' ``ewm(adjust=False)`` does, and are only reported
+    once a ticker has enough bars for the seed to have faded.
+
+    Args:
+        state: State from ``new_state`` or an earlier ``advance``.
+        high: ``(bars, tickers)`` highs of the new bars.
+        low: ``(bars, tickers)`` lows of the new bars.
+        close: ``(bars, tickers)`` closes of the new bars; NaN where a
+            ticker has no bar.
+    """
+    fast, slow, signal = (2 / (n + 1) for n in (MACD_FAST, MACD_SLOW, MACD_SIGNAL))
+    prev = state["prev_close"]
+    bar = int(state["bars"])
+    for h, l, c in zip(high, low, close):
+        h, l, c = (np.asarray(x, dtype=np.float64) for x in (h, l, c))
+        valid = ~np.isnan(c)
+        change = c - prev
+        # fmax skips the previous close on a ticker's first bar
+        true_range = np.fmax(h - l, np.fmax(np.abs(h - prev), np.abs(l - prev)))
+
+        _smooth(state["ema_fast"], c, fast)
+        _smooth(state["ema_slow"], c, slow)
+        macd = np.where(valid, state["ema_fast"] - state["ema_slow"], np.nan)
+        _smooth(state["macd_signal"], macd, signal)
+        _smooth(state["avg_gain"], np.maximum(change, 0.0), 1 / RSI_PERIOD)
+        _smooth(state["avg_loss"], np.maximum(-change, 0.0), 1 / RSI_PERIOD)
+        _smooth(state["atr"], np.where(valid, true_range, np.nan), 1 / ATR_PERIOD)
+
+        np.copyto(prev, c, where=valid)
+        state["count"] += valid
+        state["last_bar"][valid] = bar
+        bar += 1
+    state["bars"] = np.asarray(bar, dtype=np.int64)
+
+
+def _window_mean(values: np.ndarray, bars: int) -> tuple[np.ndarray, np.ndarray]:
+    """Mean and standard deviation of each column's last ``bars`` rows, skipping gaps."""
+    window = values[-bars:]
+    present = ~np.isnan(window)
+    count = present.sum(axis=0)
+    mean = np.where(present, window, 0.0).sum(axis=0) / count
+    variance = (np.where(present, window - mean, 0.0) ** 2).sum(axis=0) / count
+    enough = count >= MIN_COVERAGE * bars
+    return np.where(enough, mean, np.nan), np.where(enough, np.sqrt(variance), np.nan)
+
+
+def compute_indicators(
+    state: dict[str, np.ndarray], high: np.ndarray, low: np.ndarray, close: np.ndarray
+) -> dict[str, np.ndarray]:
+    """Compute every ticker's latest indicators at once.
+
+    Args:
+        state: Recursive state advanced to the last bar of the window.
+        high: ``(bars, tickers)`` highs of the trailing rows, up to ``WINDOW``.
+        low: ``(bars, tickers)`` lows of the same rows.
+        close: ``(bars, tickers)`` closes of the same rows.
+
+    Returns:
+        dict[str, np.ndarray]: One array per indicator, indexed like the
+        store's tickers, plus ``last_bar``, the row of each ticker's latest
+        bar. Values a ticker has too few bars for are NaN.
+    """
+    count = state["count"]
+    price = state["prev_close"]
+    close = np.asarray(close, dtype=np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gain, loss = state["avg_gain"], state["avg_loss"]
+        rsi = np.where(loss > 0, 100 - 100 / (1 + gain / loss), np.where(gain > 0, 100.0, 50.0))
+        macd = state["ema_fast"] - state["ema_slow"]
+        macd_ready = count >= MACD_SLOW + MACD_SIGNAL
+        indicators = {
+            "last_bar": state["last_bar"],
+            "close": price,
+            "change_1m": (
+                close[-1] / close[-1 - MONTH_BARS] - 1 if len(close) > MONTH_BARS
+                else np.full(len(price), np.nan)
+            ),
+            "rsi": np.where(count > RSI_PERIOD, rsi, np.nan),
+            "macd": np.where(macd_ready, macd, np.nan),
+            "macd_signal": np.where(macd_ready, state["macd_signal"], np.nan),
+            "macd_hist": np.where(macd_ready, macd - state["macd_signal"], np.nan),
+            "atr": np.where(count >= ATR_PERIOD, state["atr"], np.nan),
+        }
+        indicators["atr_pct"] = indicators["atr"] / price
+        for bars in SMA_PERIODS:
+            indicators[f"sma_{bars}"] = _window_mean(close, bars)[0]
+        mean, std = _window_mean(close, BOLLINGER_PERIOD)
+        upper = mean + BOLLINGER_WIDTH * std
+        lower = mean - BOLLINGER_WIDTH * std
+        indicators.update(
+            bollinger_upper=upper,
+            bollinger_lower=lower,
+            bollinger_pct_b=np.where(upper > lower, (price - lower) / (upper - lower), np.nan),
+            high_52w=np.fmax.reduce(np.asarray(high[-YEAR_BARS:], dtype=np.float64), axis=0),
+            low_52w=np.fmin.reduce(np.asarray(low[-YEAR_BARS:], dtype=np.float64), axis=0),
+        )
+    return indicators
+
+
+class PriceStore:
+    """Memory-mapped view of a compiled price store.
+
+    Field matrices are mapped lazily by the OS. The indicator state is
+    loaded from the store and advanced over any bars appended since it was
+    saved; indicators are then computed once for the whole universe and
+    reused for every lookup.
+    """
+
+    def __init__(self, path: str = PRICES_DIR):
+        self.path = path
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.tickers = np.load(os.path.join(path, "tickers.npy"), mmap_mode="r")
+        self._map()
+        self._state: Optional[dict[str, np.ndarray]] = None
+        self._indicators: Optional[dict[str, np.ndarray]] = None
+        self._index: Optional[dict[str, int]] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _map(self) -> None:
+        self.bars = self.meta["bars"]
+        self.dates = np.memmap(
+            os.path.join(self.path, DATES_FILE), dtype="datetime64[D]", mode="r",
+            shape=(self.bars,),
+        )
+        self.columns = {
+            name: np.memmap(
+                os.path.join(self.path, _field_file(name)), dtype=np.float32, mode="r",
+                shape=(self.bars, len(self.tickers)),
+            )
+            for name in FIELDS
+        }
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def __contains__(self, ticker: str) -> bool:
+        return self.index_of(ticker) is not None
+
+    def index_of(self, ticker: str) -> Optional[int]:
+        if self._index is None:
+            self._index = {str(t): i for i, t in enumerate(self.tickers)}
+        return self._index.get(ticker.strip().upper())
+
+    def append(self, dates: np.ndarray, columns: dict[str, np.ndarray]) -> int:
+        """Append new bars for every ticker to the end of the store.
+
+        Only the new rows are written. The indicator state catches up on
+        its next use, by one step per appended bar.
+
+        Args:
+            dates: Trading day of each new row, after the store's last bar
+                and strictly increasing.
+            columns: A ``(len(dates), len(store))`` matrix per field in
+                ``FIELDS``, with columns in store ticker order.
+
+        Returns:
+            int: The number of bars appended.
+
+        Raises:
+            ValueError: If the dates are not after the last bar and
+                increasing, or a matrix has the wrong shape.
+        """
+        dates = np.asarray(dates).astype("datetime64[D]")
+        if len(dates) == 0:
+            return 0
+        if dates[0] <= self.dates[-1] or np.any(np.diff(dates) <= np.timedelta64(0, "D")):
+            raise ValueError(
+                f"New bars must be strictly increasing and after {self.meta['last_date']}"
+            )
+        shape = (len(dates), len(self.tickers))
+        for name in FIELDS:
+            if columns[name].shape != shape:
+                raise ValueError(f"'{name}' has shape {columns[name].shape}, expected {shape}")
+
+        def extend(filename: str, values: np.ndarray, end: int) -> None:
+            # Write from the last committed row, dropping any torn earlier append
+            with open(os.path.join(self.path, filename), "r+b") as f:
+                f.seek(end)
+                f.write(values.tobytes())
+                f.truncate()
+
+        row_bytes = len(self.tickers) * np.dtype(np.float32).itemsize
+        for name in FIELDS:
+            extend(_field_file(name), np.ascontiguousarray(columns[name], dtype=np.float32),
+                   self.bars * row_bytes)
+        extend(DATES_FILE, dates.astype(np.int64), self.bars * np.dtype(np.int64).itemsize)
+        self.meta.update(
+            bars=self.bars + len(dates),
+            last_date=str(dates[-1]),
+            updated_at=datetime.now().isoformat(timespec="seconds"),
+        )
+        _write_meta(self.path, self.meta)
+        self._map()
+        self._indicators = None
+        return len(dates)
+
+    def _load_state(self) -> dict[str, np.ndarray]:
+        state_path = os.path.join(self.path, STATE_FILE)
+        if os.path.exists(state_path):
+            with np.load(state_path) as saved:
+                state = {name: saved[name].copy() for name in saved.files}
+            if len(state["count"]) == len(self.tickers) and int(state["bars"]) <= self.bars:
+                return state
+        return new_state(len(self.tickers))
+
+    def state(self) -> dict[str, np.ndarray]:
+        """Recursive indicator state, advanced to the last bar and saved."""
+        if self._state is None:
+            self._state = self._load_state()
+        done = int(self._state["bars"])
+        if done < self.bars:
+            columns = self.columns
+            advance(self._state, columns["high"][done:], columns["low"][done:],
+                    columns["close"][done:])
+            tmp_path = os.path.join(self.path, "state.tmp.npz")
+            np.savez(tmp_path, **self._state)
+            os.replace(tmp_path, os.path.join(self.path, STATE_FILE))
+        return self._state
+
+    def indicators(self) -> dict[str, np.ndarray]:
+        """Indicators for every ticker in the store, computed on first use."""
+        if self._indicators is None:
+            state = self.state()
+            start = max(0, self.bars - WINDOW)
+            self._indicators = compute_indicators(
+                state, *(self.columns[name][start:] for name in ("high", "low", "close"))
+            )
+        return self._indicators
+
+    def lookup(self, ticker: str) -> Optional[dict]:
+        """Return the indicators of one ticker, or ``None`` if it has no bars.
+
+        Args:
+            ticker: The ticker symbol (case-insensitive).
+
+        Returns:
+            Optional[dict]: Indicator name to value; ``as_of`` is the
+            ``date`` of the ticker's latest bar and missing numbers are
+            ``None``.
+        """
+        i = self.index_of(ticker)
+        indicators = self.indicators() if i is not None else None
+        if indicators is None or indicators["last_bar"][i] < 0:
+            self.misses += 1
+            return None
+        self.hits += 1
+        row = {"as_of": self.dates[indicators["last_bar"][i]].astype(date)}
+        for name, values in indicators.items():
+            if name != "last_bar":
+                row[name] = None if np.isnan(values[i]) else float(values[i])
+        return row
+
+    def summary(self) -> str:
+        return (
+            f"{len(self)} tickers × {self.bars} bars to {self.meta['last_date']}, "
+            f"{self.hits} lookups found, {self.misses} missing"
+        )
+
+
+def append_bars(sources: list[str], path: str = PRICES_DIR) -> tuple[int, int]:
+    """Append bars newer than the store's last bar from CSV/Parquet files.
+
+    Rows on or before the last bar and rows of tickers the store doesn't
+    cover are ignored; new tickers need a rebuild. The indicator state is
+    advanced over the new bars and saved.
+
+    Args:
+        sources: Paths of the price files.
+        path: Directory of the store.
+
+    Returns:
+        tuple[int, int]: Bars appended and unknown tickers ignored.
+    """
+    store = PriceStore(path)
+    columns = _read_sources(sources)
+    new = columns["date"] > store.dates[-1]
+    known = np.isin(columns["ticker"], store.tickers)
+    unknown = len(np.unique(columns["ticker"][new & ~known]))
+    columns = {name: values[new & known] for name, values in columns.items()}
+    calendar = np.unique(columns["date"])
+    appended = store.append(calendar, _pivot(columns, np.asarray(store.tickers), calendar))
+    store.state()
+    return appended, unknown
+
+
+def open_price_store(path: str = PRICES_DIR) -> Optional[PriceStore]:
+    """Open the price store if indicators are enabled and it has been built."""
+    if not INDICATORS_ENABLED or not os.path.exists(os.path.join(path, META_FILE)):
+        return None
+    return PriceStore(path)
+
+
+def _price(value: float) -> str:
+    return f"{value:,.2f}"
+
+
+def format_indicators(values: dict) -> str:
+    """Format one ticker's indicators for the technical analysis agent.
+
+    Returns an empty string when the ticker has no indicators yet.
+    """
+    v = values
+    lines = []
+    if v["close"] is not None:
+        change = f" ({v['change_1m']:+.1%} over 1 month)" if v["change_1m"] is not None else ""
+        lines.append(f"- Close: {_price(v['close'])}{change}")
+    if v["rsi"] is not None:
+        lines.append(f"- RSI({RSI_PERIOD}): {v['rsi']:.1f}")
+    if v["macd"] is not None:
+        lines.append(
+            f"- MACD({MACD_FAST},{MACD_SLOW},{MACD_SIGNAL}): {v['macd']:.2f}, "
+            f"signal {v['macd_signal']:.2f}, histogram {v['macd_hist']:+.2f}"
+        )
+    averages = [
+        f"{bars}-day {_price(v[f'sma_{bars}'])}"
+        for bars in SMA_PERIODS if v[f"sma_{bars}"] is not None
+    ]
+    if averages:
+        lines.append(f"- Simple moving averages: {', '.join(averages)}")
+    if v["bollinger_upper"] is not None:
+        pct_b = f", %B {v['bollinger_pct_b']:.2f}" if v["bollinger_pct_b"] is not None else ""
+        lines.append(
+            f"- Bollinger bands ({BOLLINGER_PERIOD}, {BOLLINGER_WIDTH:g}σ): "
+            f"{_price(v['bollinger_lower'])} to {_price(v['bollinger_upper'])}{pct_b}"
+        )
+    if v["atr"] is not None:
+        lines.append(f"- ATR({ATR_PERIOD}): {v['atr']:.2f} ({v['atr_pct']:.1%} of price)")
+    if v["high_52w"] is not None and v["low_52w"] is not None:
+        lines.append(f"- 52-week range: {_price(v['low_52w'])} to {_price(v['high_52w'])}")
+    if len(lines) < 2:
+        return ""
+    return (
+        f"Use these indicators computed from local daily prices (last bar "
+        f"{v['as_of']}) instead of searching for them:\n" + "\n".join(lines)
+    )
+
+
+# Section the indicators are given to
+TECHNICAL_KEY = "technical_analysis"
+
+
+class IndicatorsPlugin(BasePlugin):
+    """Gives the technical analysis agent locally computed indicators.
+
+    The ticker's indicators are written to session state under
+    ``technical_analysis_figures``, which the agent's instruction includes.
+    Tickers whose latest bar is older than ``max_age_days`` get nothing, so
+    the agent researches them as before.
+    """
+
+    def __init__(self, store: PriceStore, max_age_days: int = INDICATORS_MAX_AGE_DAYS):
+        super().__init__(name="indicators")
+        self.store = store
+        self.max_age_days = max_age_days
+
+    async def before_agent_callback(
+        self, *, agent: BaseAgent, callback_context: CallbackContext
+    ) -> Optional[types.Content]:
+        if not isinstance(agent, LlmAgent) or agent.output_key != TECHNICAL_KEY:
+            return None
+        ticker = callback_context.state.get("stock_query")
+        values = self.store.lookup(ticker) if ticker else None
+        if values is None or (date.today() - values["as_of"]).days > self.max_age_days:
+            return None
+        figures = format_indicators(values)
+        if figures:
+            callback_context.state[TECHNICAL_KEY + FIGURES_SUFFIX] = figures
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the local price store.")
+    parser.add_argument("--store", default=PRICES_DIR,
+                        help=f"Store directory (default: {PRICES_DIR}).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Compile CSV/Parquet price files into the store.")
+    build.add_argument("sources", nargs="+", help="Price files, oldest first.")
+    append = commands.add_parser("append", help="Append newer bars from price files.")
+    append.add_argument("sources", nargs="+", help="Price files.")
+    show = commands.add_parser("show", help="Print the indicators of one or more tickers.")
+    show.add_argument("tickers", nargs="+")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    if args.command == "build":
+        meta = build_store(args.sources, args.store)
+        print(f"✅ Built price store in {args.store}: {meta['tickers']} tickers × "
+              f"{meta['bars']} bars to {meta['last_date']} "
+              f"({time.perf_counter() - started:.2f}s)")
+        return
+    if args.command == "append":
+        appended, unknown = append_bars(args.sources, args.store)
+        skipped = f", {unknown} unknown tickers ignored" if unknown else ""
+        print(f"✅ Appended {appended} bars to {args.store}{skipped} "
+              f"({time.perf_counter() - started:.2f}s)")
+        return
+
+    store = PriceStore(args.store)
+    for ticker in args.tickers:
+        values = store.lookup(ticker)
+        if values is None:
+            print(f"❌ {ticker.upper()}: not in the store")
+            continue
+        print(f"\n📈 {ticker.upper()}")
+        print(format_indicators(values) or "Not enough bars for indicators.")
+
+
+if __name__ == "__main__":
+    main()
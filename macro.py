@@ -0,0 +1,305 @@
+"""Ticker-independent macro context, researched once per batch.
+
+Several research agents need the same backdrop whatever the ticker: the
+10-year Treasury yield for the bond analysis, the market trend for the
+technical and reverse analyses, the sector outlook for the moat, horizon
+and reverse analyses. Left to themselves, those agents search for it
+again for every ticker.
+
+``MacroContext`` researches each topic once (sector topics once per
+sector) before the tickers run and copies the results into every ticker's
+session state under ``macro_<topic>`` keys. Agents list the topics they
+use in ``AgentSpec.macro_topics``, see the shared context in their
+instruction and only research what is specific to their company. Sectors
+come from one cheap classification call per ``MACRO_SECTOR_BATCH``
+tickers. Results are reused for ``MACRO_TTL`` seconds, so the analysis
+service shares them across requests too.
+"""
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from config import MACRO_SECTOR_BATCH, MACRO_TTL
+from models import get_tier_model
+from registry import AGENT_SPECS, ALL_SECTIONS, macro_state_key
+from report import MACRO_SAVINGS_KEY
+from search import SearchResult, grounded_search
+
+
+@dataclass(frozen=True)
+class MacroTopic:
+    """One piece of shared context.
+
+    Attributes:
+        title: Heading the context is given to the agents under.
+        query: What to research; ``{sector}`` makes the topic per sector.
+    """
+
+    title: str
+    query: str
+
+    @property
+    def per_sector(self) -> bool:
+        return "{sector}" in self.query
+
+
+MACRO_TOPICS = {
+    "rates": MacroTopic(
+        "Interest rate backdrop",
+        "10-year US Treasury yield: current level, trend over the past year "
+        "and the Federal Reserve rate outlook",
+    ),
+    "market": MacroTopic(
+        "Market backdrop",
+        "US stock market this month: S&P 500 and Nasdaq trend, volatility "
+        "and sector rotation",
+    ),
+    "sector": MacroTopic(
+        "Sector backdrop",
+        "{sector} sector outlook: demand, valuations, regulation and recent "
+        "stock performance",
+    ),
+}
+
+SECTORS = (
+    "Communication Services",
+    "Consumer Discretionary",
+    "Consumer Staples",
+    "Energy",
+    "Financials",
+    "Health Care",
+    "Industrials",
+    "Information Technology",
+    "Materials",
+    "Real Estate",
+    "Utilities",
+)
+
+# Marks shared context in an instruction (the fake backend keys off it)
+SHARED_NOTE = "shared across tickers, don't search for it again"
+
+# Length of each shared summary; it is copied into every user's prompt
+SUMMARY_WORDS = 100
+
+
+def macro_topics(sections: Iterable[str] = ALL_SECTIONS) -> tuple[str, ...]:
+    """The macro topics the selected sections use, in ``MACRO_TOPICS`` order."""
+    used = {topic for key in sections for topic in AGENT_SPECS[key].macro_topics}
+    return tuple(topic for topic in MACRO_TOPICS if topic in used)
+
+
+class MacroContext:
+    """Macro research shared by every ticker of a batch or service.
+
+    Research runs as one task per topic (and sector), so concurrent
+    ``prepare`` calls wait for the same search instead of repeating it.
+    Failed research is retried by the next ``prepare``; until then the
+    agents research the topic themselves, as they would without sharing.
+
+    Args:
+        sections: Sections whose macro topics are researched.
+        ttl: Seconds a result is reused.
+        sector_batch: Tickers classified per model call.
+    """
+
+    def __init__(
+        self,
+        sections: Iterable[str] = ALL_SECTIONS,
+        ttl: float = MACRO_TTL,
+        sector_batch: int = MACRO_SECTOR_BATCH,
+    ):
+        self.sections = tuple(sections)
+        self.topics = macro_topics(self.sections)
+        self.ttl = ttl
+        self.sector_batch = max(1, sector_batch)
+        self.sectors: dict[str, str] = {}
+        self._results: dict[tuple[str, Optional[str]], tuple[float, asyncio.Task]] = {}
+        self.calls = 0
+        self.tokens = 0
+        self.research_tokens = 0
+        self.search_tokens = 0
+        self.researched = 0
+        self.uses = 0
+        self.shared_tokens = 0
+        self.tickers = 0
+        self._prepared: set[str] = set()
+
+    @property
+    def _needs_sectors(self) -> bool:
+        return any(MACRO_TOPICS[topic].per_sector for topic in self.topics)
+
+    async def _classify(self, tickers: list[str]) -> None:
+        """Map ``tickers`` to ``SECTORS`` with one cheap model call."""
+        model = get_tier_model("lite", escalate=False)
+        request = LlmRequest(
+            model=model.model,
+            contents=[types.UserContent(
+                "Classify each stock ticker into exactly one of these sectors.\n"
+                f"Sectors: {'; '.join(SECTORS)}\n"
+                f"Tickers: {', '.join(tickers)}\n"
+                "Answer with a JSON object mapping each ticker to its sector."
+            )],
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json",
+                labels={"adk_agent_name": "SectorClassifier"},
+            ),
+        )
+        text = ""
+        async for response in model.generate_content_async(request):
+            if response.partial:
+                continue
+            if response.content and response.content.parts:
+                text += "".join(part.text or "" for part in response.content.parts)
+            if response.usage_metadata:
+                self.tokens += response.usage_metadata.total_token_count or 0
+        self.calls += 1
+        try:
+            answer = json.loads(text)
+        except json.JSONDecodeError:
+            answer = None
+        if not isinstance(answer, dict):
+            print(f"⚠️  Sector classification returned no usable JSON for {len(tickers)} tickers")
+            return
+        for ticker, sector in answer.items():
+            if sector in SECTORS:
+                self.sectors[str(ticker).strip().upper()] = sector
+
+    async def _research(self, topic: str, sector: Optional[str]) -> SearchResult:
+        result = await grounded_search(
+            MACRO_TOPICS[topic].query.format(sector=sector), agent="MacroContext",
+            words=SUMMARY_WORDS,
+        )
+        self.calls += 1
+        self.researched += 1
+        self.tokens += result.tokens
+        self.research_tokens += result.tokens
+        self.search_tokens += result.search_tokens
+        return result
+
+    def _task(self, topic: str, sector: Optional[str]) -> asyncio.Task:
+        """The research task for a topic, started again once stale or failed."""
+        entry = self._results.get((topic, sector))
+        if entry is not None:
+            expires, task = entry
+            failed = task.done() and (task.cancelled() or task.exception() is not None)
+            if expires > time.monotonic() and not failed:
+                return task
+        task = asyncio.ensure_future(self._research(topic, sector))
+        self._results[(topic, sector)] = (time.monotonic() + self.ttl, task)
+        return task
+
+    def _keys(
+        self, ticker: str, topics: Optional[tuple[str, ...]] = None
+    ) -> list[tuple[str, Optional[str]]]:
+        keys = []
+        for topic in self.topics if topics is None else topics:
+            if not MACRO_TOPICS[topic].per_sector:
+                keys.append((topic, None))
+            elif ticker in self.sectors:
+                keys.append((topic, self.sectors[ticker]))
+        return keys
+
+    async def prepare(self, tickers: Iterable[str]) -> None:
+        """Research everything ``tickers`` need that isn't fresh yet."""
+        tickers = list(dict.fromkeys(t.strip().upper() for t in tickers))
+        self._prepared.update(tickers)
+        if not self.topics:
+            return
+        unknown = [t for t in tickers if t not in self.sectors] if self._needs_sectors else []
+        if unknown:
+            chunks = [
+                unknown[i:i + self.sector_batch]
+                for i in range(0, len(unknown), self.sector_batch)
+            ]
+            outcomes = await asyncio.gather(
+                *(self._classify(chunk) for chunk in chunks), return_exceptions=True
+            )
+            for outcome in outcomes:
+                if isinstance(outcome, Exception):
+                    print(f"⚠️  Sector classification failed: {outcome}")
+        keys = list({key for ticker in tickers for key in self._keys(ticker)})
+        outcomes = await asyncio.gather(
+            *(self._task(*key) for key in keys), return_exceptions=True
+        )
+        for (topic, sector), outcome in zip(keys, outcomes):
+            if isinstance(outcome, Exception):
+                label = f"{topic} ({sector})" if sector else topic
+                print(f"⚠️  Macro research for {label} failed: {outcome}")
+
+    def state_for(self, ticker: str, sections: Optional[Iterable[str]] = None) -> dict:
+        """Session state with the shared context for one ticker's run.
+
+        Args:
+            ticker: The ticker about to be analyzed.
+            sections: Sections the run researches; defaults to the
+                context's sections. Only their topics are included.
+        """
+        ticker = ticker.strip().upper()
+        sections = self.sections if sections is None else tuple(sections)
+        topics = tuple(t for t in macro_topics(sections) if t in self.topics)
+        state = {}
+        titles, uses, shared_tokens = [], 0, 0
+        for topic, sector in self._keys(ticker, topics):
+            entry = self._results.get((topic, sector))
+            task = entry[1] if entry is not None else None
+            if task is None or not task.done() or task.cancelled() or task.exception():
+                continue
+            macro = MACRO_TOPICS[topic]
+            title = f"{macro.title} ({sector})" if sector else macro.title
+            # Sources stay out: they would be copied into every user's prompt
+            text = f"{title} ({SHARED_NOTE}):\n{task.result().text}"
+            state[macro_state_key(topic)] = text
+            users = sum(1 for key in sections if topic in AGENT_SPECS[key].macro_topics)
+            titles.append(title)
+            uses += users
+            shared_tokens += users * len(text) // 4
+        self.uses += uses
+        self.shared_tokens += shared_tokens
+        self.tickers += 1
+        if titles:
+            # Net of this ticker's share of the research, split over every
+            # ticker it was prepared for
+            tickers = max(1, len(self._prepared))
+            state[MACRO_SAVINGS_KEY] = {
+                "topics": titles,
+                "searches_saved": round(uses - self.researched / tickers, 1),
+                "tokens_saved": round(
+                    uses * self._search_price - shared_tokens - self.tokens / tickers
+                ),
+            }
+        return state
+
+    @property
+    def _search_price(self) -> float:
+        """Tokens one search inside an agent's call is estimated to cost."""
+        if not self.researched:
+            return 0.0
+        return (self.search_tokens or self.research_tokens) / self.researched
+
+    @property
+    def saved_searches(self) -> int:
+        """Estimated searches the agents skipped, net of the shared research."""
+        return self.uses - self.researched
+
+    @property
+    def saved_tokens(self) -> int:
+        """Estimated tokens saved, net of the shared research and context.
+
+        Each use stands in for one search of the topic inside an agent's
+        call, priced at the search tokens of the shared research calls (or
+        their total tokens, if the backend doesn't report search tokens).
+        """
+        return round(self.uses * self._search_price - self.tokens - self.shared_tokens)
+
+    def summary(self) -> str:
+        sectors = len({sector for _, sector in self._results if sector})
+        return (
+            f"{len(self.topics)} topics ({sectors} sectors) researched in {self.calls} calls "
+            f"({self.tokens:,} tokens) for {self.tickers} tickers, shared {self.uses} times; "
+            f"≈{self.saved_searches:,} searches and ≈{self.saved_tokens:,} tokens saved"
+        )
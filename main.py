@@ -1,105 +1,340 @@
-"""Main entry point for the investing analysis agent."""
-import asyncio
-import os
-from datetime import datetime
-from google.adk.runners import InMemoryRunner
-from workflow import create_research_workflow
+"""Main entry point for the investing analysis agent.
 
+Only the standard library, ``config`` and ``registry`` are imported at
+module level. The ADK, the Gemini SDK and the workflow load once an
+analysis actually runs, so ``--help``, ``--version``, ``--list-sections``
+and ``--list-reports`` return immediately.
+"""
+import argparse
+import time
+from typing import Optional
 
-async def main():
+from config import ANALYSIS_DIR, BATCH_CONCURRENCY, CACHE_ENABLED
+from registry import AGENT_REGISTRY, ALL_SECTIONS, PROFILES, resolve_sections
+
+
+def get_version() -> str:
+    """Version of the installed package, or of the source tree's pyproject."""
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version("investing-analysis-agent")
+    except PackageNotFoundError:
+        import os
+        import tomllib
+
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pyproject.toml")
+        with open(path, "rb") as f:
+            return tomllib.load(f)["project"]["version"]
+
+
+class _VersionAction(argparse.Action):
+    """``--version`` that only looks the version up when it is asked for."""
+
+    def __init__(self, option_strings, dest=argparse.SUPPRESS, **kwargs):
+        super().__init__(option_strings, dest, nargs=0, default=argparse.SUPPRESS, **kwargs)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        parser.exit(message=f"{parser.prog} {get_version()}\n")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Multi-agent investment analysis powered by Gemini."
+    )
+    parser.add_argument(
+        "-V", "--version",
+        action=_VersionAction,
+        help="Show the version and exit.",
+    )
+    parser.add_argument(
+        "tickers",
+        nargs="*",
+        help="Tickers to analyze. Without tickers or --watchlist, prompts interactively.",
+    )
+    parser.add_argument(
+        "-w", "--watchlist",
+        help="File with tickers to analyze (one per line or comma separated).",
+    )
+    parser.add_argument(
+        "-c", "--concurrency",
+        type=int,
+        default=BATCH_CONCURRENCY,
+        help=f"Maximum tickers analyzed at once in batch mode (default: {BATCH_CONCURRENCY}).",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print each section as soon as it finishes and stream the recommendation live.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Regenerate every section instead of reusing fresh cached ones.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue interrupted runs, rerunning only the sections they had not finished.",
+    )
+    parser.add_argument(
+        "-s", "--sections",
+        help="Comma-separated sections to research, e.g. technical_analysis,short_interest.",
+    )
+    parser.add_argument(
+        "-p", "--profile",
+        choices=sorted(PROFILES),
+        help="Named set of sections to research (combined with --sections).",
+    )
+    parser.add_argument(
+        "--list-sections",
+        action="store_true",
+        help="List the available sections and profiles and exit.",
+    )
+    parser.add_argument(
+        "--list-reports",
+        action="store_true",
+        help=f"List the reports saved in {ANALYSIS_DIR}/ and exit.",
+    )
+    args = parser.parse_args(argv)
+    try:
+        requested = [key.strip() for key in args.sections.split(",")] if args.sections else None
+        args.sections = resolve_sections(requested, args.profile)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+
+def list_sections():
+    """Print the section registry and the profiles."""
+    print("📚 Sections:")
+    for spec in AGENT_REGISTRY:
+        print(f"  {spec.output_key:<24}{spec.title:<26}{spec.tier} tier")
+    print("\n🗂️  Profiles:")
+    for name, sections in PROFILES.items():
+        print(f"  {name:<14}{', '.join(sections)}")
+
+
+def list_reports():
+    """Print the saved reports, newest first."""
+    from report import list_reports as saved_reports
+
+    reports = saved_reports()
+    if not reports:
+        print(f"📂 No reports in {ANALYSIS_DIR}/ yet.")
+        return
+    print(f"📂 Reports in {ANALYSIS_DIR}/:")
+    for ticker, created, path in reports:
+        print(f"  {created:%Y-%m-%d %H:%M:%S}  {ticker:<12}{path}")
+
+
+async def main(
+    use_cache: bool = CACHE_ENABLED,
+    stream: bool = False,
+    sections: Optional[tuple[str, ...]] = None,
+    resume: bool = False,
+):
     """Run the investing analysis agent with user input."""
+    from archive import ReportArchive
+    from batch import analyze_ticker, create_runner
+    from cache import SectionCache
+    from checkpoint import CheckpointStore
+    from compaction import COMPACTION_KEY, compaction_summary
+    from config import ARCHIVE_ENABLED, CHECKPOINT_ENABLED, HEDGING_ENABLED, SEARCH_MODE
+    from fundamentals import open_store
+    from hedging import get_hedger
+    from indicators import open_price_store
+    from report import GATE_KEY, SECTION_TITLES, UNAVAILABLE_KEY
+    from routing import get_tier_usage
+    from scheduler import gate_summary
+    from screening import open_record_store
+    from search import get_search_broker
+    from sensitivity import open_sensitivity
+
     print("🔍 Investment Analysis Agent")
     print("=" * 50)
-    
+
     # Prompt user for stock/company to analyze
     stock_query = input("\n📊 Which stock or company would you like to analyze? ")
-    
+
     if not stock_query.strip():
         print("❌ No stock provided. Exiting...")
         return
-    
+
     print(f"\n🚀 Analyzing {stock_query}...")
     print("=" * 50)
-    
-    # Create the research workflow with the stock query
-    root_agent = create_research_workflow(stock_query)
-    
-    # Run the analysis
-    runner = InMemoryRunner(agent=root_agent)
-    await runner.run_debug(
-        f"Conduct a comprehensive investment analysis of {stock_query}. "
-        f"Provide factual, unbiased information across all research areas. "
-        f"Focus on delivering pure data and objective insights without speculation or bias.",
-        quiet=True
-    )
-    
+
+    # Run the analysis in its own session
+    cache = SectionCache() if use_cache else None
+    fundamentals = open_store()
+    prices = open_price_store()
+    sensitivity = open_sensitivity(prices)
+    checkpoints = CheckpointStore() if CHECKPOINT_ENABLED or resume else None
+    archive = ReportArchive() if ARCHIVE_ENABLED else None
+    records = open_record_store()
+    try:
+        result = await analyze_ticker(
+            stock_query.strip(),
+            create_runner(
+                cache, fundamentals=fundamentals, sections=sections, checkpoints=checkpoints,
+                prices=prices, sensitivity=sensitivity,
+            ),
+            echo=stream,
+            live_tokens=stream,
+            resume=resume,
+            archive=archive,
+            records=records,
+        )
+    finally:
+        if checkpoints is not None:
+            checkpoints.close()
+        if archive is not None:
+            archive.close()
+        if records is not None:
+            records.close()
+
     print("\n" + "=" * 50)
     print("✅ Analysis complete!")
     print("=" * 50)
-    
-    # Get the session to access the state
-    session = await runner.session_service.get_session(
-        app_name=runner.app_name,
-        session_id="debug_session_id",
-        user_id="debug_user_id"
-    )
 
-    if session and session.state:
-        # Create analysis directory if it doesn't exist
-        os.makedirs("analysis", exist_ok=True)
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"analysis/analysis_{stock_query}_{timestamp}.md"
-        
-        markdown_content = f"# Investment Analysis: {stock_query}\n\n"
-        markdown_content += f"**Date:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-        
-        # Add recommendation first if available
-        if 'investment_recommendation' in session.state:
-            markdown_content += "## 📋 Investment Recommendation\n\n"
-            markdown_content += f"{session.state['investment_recommendation']}\n\n"
-            markdown_content += "---\n\n"
-            
-        markdown_content += "## 🔍 Detailed Research Data\n\n"
-        
-        # List of all agent output keys
-        analysis_keys = [
-            ("Business Understanding", "business_understanding"),
-            ("Competitive Advantage", "competitive_advantage"),
-            ("Media Sentiment", "media_sentiment"),
-            ("Ethics Check", "ethics_check"),
-            ("Investment Horizon", "investment_horizon"),
-            ("Insider Trading", "insider_trading"),
-            ("Google Trends", "google_trends"),
-            ("Share Dilution", "share_dilution"),
-            ("Short Interest", "short_interest"),
-            ("Debt Analysis", "debt_analysis"),
-            ("Infinite Game", "infinite_game"),
-            ("CEO Analysis", "ceo_analysis"),
-            ("Analyst Ratings", "analyst_ratings"),
-            ("Technical Analysis", "technical_analysis"),
-            ("Reverse Analysis", "reverse_analysis"),
-            ("Bond Correlation", "bond_correlation"),
-        ]
-        
-        for title, key in analysis_keys:
-            if key in session.state:
-                markdown_content += f"### {title}\n\n"
-                markdown_content += f"{session.state[key]}\n\n"
-        
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write(markdown_content)
-            
-        print(f"\n💾 Analysis saved to: {filename}")
-    
-    # Display the results
-    if session and session.state and 'investment_recommendation' in session.state:
+    if not result.ok:
+        print(f"\n❌ Analysis failed: {result.error}")
+        return
+
+    if result.report_path:
+        print(f"\n💾 Analysis saved to: {result.report_path}")
+    if result.trace is not None:
+        print("\n" + result.trace.summary_table())
+    if result.first_section_latency is not None:
+        print(f"⏱️  First section after {result.first_section_latency:.1f}s, "
+              f"complete after {result.latency:.1f}s")
+    if result.state and result.state.get(UNAVAILABLE_KEY):
+        print("⏳ Cut off: " + ", ".join(
+            f"{SECTION_TITLES.get(key, key)} ({info['reason']})"
+            for key, info in result.state[UNAVAILABLE_KEY].items()
+        ))
+    if result.state and result.state.get(GATE_KEY):
+        print(f"⛔ Hard AVOID from {gate_summary(result.state[GATE_KEY])}")
+    if cache is not None:
+        print(f"🗄️  Section cache: {cache.summary()}")
+    if SEARCH_MODE != "builtin":
+        print(f"🔎 Search: {get_search_broker().summary()}")
+    if HEDGING_ENABLED:
+        print(f"🏁 Hedging: {get_hedger().summary()}")
+    if result.state and COMPACTION_KEY in result.state:
+        print(f"🗜️  Aggregator input: {compaction_summary(result.state[COMPACTION_KEY])}")
+    if fundamentals is not None:
+        print(f"📊 Fundamentals: {fundamentals.summary()}")
+    if prices is not None:
+        print(f"📈 Prices: {prices.summary()}")
+    if sensitivity is not None:
+        print(f"📉 Sensitivity: {sensitivity.summary()}")
+    if checkpoints is not None:
+        print(f"📌 Checkpoints: {checkpoints.summary()}")
+    if archive is not None:
+        print(f"🗃️  Archive: {archive.summary()}")
+    if records is not None:
+        print(f"🧮 Records: {records.summary()}")
+    if get_tier_usage().tiers:
+        print("\n" + get_tier_usage().summary_table())
+
+    # Display the results (already printed live when streaming)
+    if stream:
+        return
+    if result.state and 'investment_recommendation' in result.state:
         print("\n📋 Investment Analysis:")
-        print(session.state['investment_recommendation'])
+        print(result.state['investment_recommendation'])
     else:
         print("\n📋 Response:")
         print("No recommendation found in session state.")
 
 
+async def batch_main(
+    tickers: list[str],
+    concurrency: int,
+    use_cache: bool = CACHE_ENABLED,
+    stream: bool = False,
+    sections: Optional[tuple[str, ...]] = None,
+    resume: bool = False,
+):
+    """Analyze a list of tickers concurrently and print throughput stats."""
+    from archive import ReportArchive
+    from batch import print_batch_summary, run_batch
+    from cache import SectionCache
+    from checkpoint import CheckpointStore
+    from config import ARCHIVE_ENABLED, CHECKPOINT_ENABLED, MACRO_ENABLED
+    from fundamentals import open_store
+    from indicators import open_price_store
+    from macro import MacroContext
+    from screening import open_record_store
+    from sensitivity import open_sensitivity
+
+    print("🔍 Investment Analysis Agent — Batch Mode")
+    print("=" * 50)
+    print(f"🚀 Analyzing {len(tickers)} tickers (concurrency {concurrency})...")
+
+    cache = SectionCache() if use_cache else None
+    fundamentals = open_store()
+    prices = open_price_store()
+    sensitivity = open_sensitivity(prices)
+    checkpoints = CheckpointStore() if CHECKPOINT_ENABLED or resume else None
+    archive = ReportArchive() if ARCHIVE_ENABLED else None
+    records = open_record_store()
+    macro = MacroContext(sections or ALL_SECTIONS) if MACRO_ENABLED else None
+    started = time.perf_counter()
+    try:
+        results = await run_batch(
+            tickers,
+            concurrency=concurrency,
+            cache=cache,
+            echo=stream,
+            fundamentals=fundamentals,
+            sections=sections,
+            checkpoints=checkpoints,
+            resume=resume,
+            archive=archive,
+            records=records,
+            macro=macro,
+            prices=prices,
+            sensitivity=sensitivity,
+        )
+    finally:
+        # Commit outstanding checkpoints even when the batch is interrupted
+        if checkpoints is not None:
+            checkpoints.close()
+        if archive is not None:
+            archive.close()
+        if records is not None:
+            records.close()
+    print_batch_summary(
+        results, time.perf_counter() - started, cache, fundamentals, checkpoints, archive,
+        records, macro, prices, sensitivity,
+    )
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args()
+    if args.list_sections:
+        list_sections()
+        raise SystemExit(0)
+    if args.list_reports:
+        list_reports()
+        raise SystemExit(0)
+
+    import asyncio
+
+    from batch import dedupe_tickers, load_watchlist
+
+    tickers = list(args.tickers)
+    if args.watchlist:
+        tickers += load_watchlist(args.watchlist)
+
+    use_cache = CACHE_ENABLED and not args.no_cache
+    if tickers:
+        asyncio.run(batch_main(
+            dedupe_tickers(tickers), args.concurrency, use_cache, args.stream, args.sections,
+            args.resume,
+        ))
+    else:
+        asyncio.run(main(use_cache, args.stream, args.sections, args.resume))
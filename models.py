@@ -0,0 +1,167 @@
+"""Shared model clients for the agent system.
+
+Every agent uses the same model instance per model name, and every
+instance sends its requests through one ``genai.Client`` backed by a single
+pooled ``httpx.AsyncClient``. Building the workflow therefore creates no new
+clients or connection pools, however many agents or tickers there are.
+All models also share one ``AdaptiveRateLimiter`` and, with ``HEDGING=1``,
+one ``Hedger`` that duplicates calls stuck in the latency tail. Agents get
+their model through ``get_tier_model``, which routes them to a model tier
+and escalates failed answers (see ``routing.py``).
+
+The backend is pluggable: ``MODEL_BACKEND=fake`` (or ``use_backend("fake")``
+before the workflow is built) swaps the API for the deterministic offline
+stand-in in ``fake_llm.py``.
+"""
+import functools
+from functools import cached_property
+
+import httpx
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.google_llm import Gemini
+from google.genai import Client, types
+
+from config import (
+    HEDGING_ENABLED,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    MODEL_BACKEND,
+    MODEL_NAME,
+    MODEL_ROUTING,
+    MODEL_TIERS,
+    RETRY_CONFIG,
+    require_api_key,
+)
+from fake_llm import FakeBackendConfig, FakeLlm
+from hedging import HedgedLlm, get_hedger
+from ratelimit import AdaptiveRateLimiter, RateLimitedLlm
+from routing import RoutedLlm, get_tier_usage
+
+
+@functools.lru_cache(maxsize=1)
+def get_http_client() -> httpx.AsyncClient:
+    """The process-wide async HTTP client and its connection pool."""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        ),
+        timeout=httpx.Timeout(None),
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def get_genai_client() -> Client:
+    """The process-wide ``genai.Client`` used by every model."""
+    return Client(
+        api_key=require_api_key(),
+        http_options=types.HttpOptions(
+            retry_options=RETRY_CONFIG,
+            httpx_async_client=get_http_client(),
+        ),
+    )
+
+
+class PooledGemini(Gemini):
+    """Gemini model that sends requests through the shared client."""
+
+    @cached_property
+    def api_client(self) -> Client:
+        return get_genai_client()
+
+
+@functools.lru_cache(maxsize=1)
+def get_limiter() -> AdaptiveRateLimiter:
+    """The process-wide rate limiter shared by every model."""
+    return AdaptiveRateLimiter()
+
+
+def _gemini_backend(model_name: str) -> BaseLlm:
+    return PooledGemini(model=model_name, retry_options=RETRY_CONFIG)
+
+
+def _fake_backend(model_name: str) -> BaseLlm:
+    return FakeLlm(model=model_name, config=_backend_options.get("config", FakeBackendConfig()))
+
+
+BACKENDS = {
+    "gemini": _gemini_backend,
+    "fake": _fake_backend,
+}
+
+_backend = MODEL_BACKEND
+_backend_options: dict = {}
+
+
+def use_backend(name: str, **options) -> None:
+    """Select the model backend for models created from now on.
+
+    Call before the workflow is built; agents keep the model they were
+    constructed with.
+
+    Args:
+        name: A key of ``BACKENDS``.
+        **options: Backend options, e.g. ``config=FakeBackendConfig(...)``.
+    """
+    global _backend, _backend_options
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown model backend {name!r}; choose from {sorted(BACKENDS)}")
+    _backend, _backend_options = name, options
+    get_model.cache_clear()
+    get_tier_model.cache_clear()
+
+
+@functools.lru_cache(maxsize=None)
+def get_model(model_name: str = MODEL_NAME) -> BaseLlm:
+    """Return the shared, rate-limited (and optionally hedged) model for ``model_name``."""
+    if _backend not in BACKENDS:
+        raise ValueError(f"Unknown model backend {_backend!r}; choose from {sorted(BACKENDS)}")
+    model = RateLimitedLlm(
+        model=model_name,
+        inner=BACKENDS[_backend](model_name),
+        limiter=get_limiter(),
+    )
+    if HEDGING_ENABLED:
+        # Hedges go through the rate limiter like any other call
+        model = HedgedLlm(model=model_name, inner=model, hedger=get_hedger(), limiter=get_limiter())
+    return model
+
+
+@functools.lru_cache(maxsize=None)
+def get_tier_model(
+    tier: str, escalate: bool = True, requires_figures: bool = False
+) -> BaseLlm:
+    """Return the shared model for an agent on ``tier``.
+
+    With ``MODEL_ROUTING`` off every tier maps to the strongest one.
+
+    Args:
+        tier: A key of ``config.MODEL_TIERS``.
+        escalate: Retry answers that fail validation on the next stronger
+            tier with a different model; the strongest tier never escalates.
+        requires_figures: Answers without numbers fail validation.
+    """
+    if tier not in MODEL_TIERS:
+        raise ValueError(f"Unknown model tier {tier!r}; choose from {list(MODEL_TIERS)}")
+    tiers = list(MODEL_TIERS)
+    if not MODEL_ROUTING:
+        tier = tiers[-1]
+    # Retrying on the same model would only repeat the call
+    stronger = [t for t in tiers[tiers.index(tier) + 1:] if MODEL_TIERS[t] != MODEL_TIERS[tier]]
+    escalation_tier = stronger[0] if escalate and stronger else None
+    return RoutedLlm(
+        model=MODEL_TIERS[tier],
+        tier=tier,
+        inner=get_model(MODEL_TIERS[tier]),
+        escalate_to=get_model(MODEL_TIERS[escalation_tier]) if escalation_tier else None,
+        escalation_tier=escalation_tier,
+        requires_figures=requires_figures,
+        usage=get_tier_usage(),
+    )
+
+
+def base_model(model: BaseLlm) -> BaseLlm:
+    """Unwrap model wrappers down to the model that calls the API."""
+    while hasattr(model, "inner"):
+        model = model.inner
+    return model
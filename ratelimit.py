@@ -0,0 +1,250 @@
+"""Client-side adaptive rate limiting for model calls.
+
+One ``AdaptiveRateLimiter`` is shared by every model in the process. It
+paces requests with token buckets for requests per minute and tokens per
+minute, and caps in-flight calls with an AIMD (additive increase,
+multiplicative decrease) concurrency limit that halves when the API answers
+429 and grows back while calls succeed.
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai.errors import ClientError
+
+from config import (
+    EXPECTED_OUTPUT_TOKENS,
+    MAX_CONCURRENT_REQUESTS,
+    MIN_CONCURRENT_REQUESTS,
+    RATE_LIMIT_HEADROOM,
+    RATE_LIMIT_RPM,
+    RATE_LIMIT_TPM,
+    THROTTLE_MAX_BACKOFF,
+    THROTTLE_RETRY_ATTEMPTS,
+)
+
+WINDOW_SECONDS = 60.0
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at ``rate`` tokens per second.
+
+    Waiters are served in arrival order. A request larger than the bucket
+    capacity is admitted once the bucket is full and leaves it in debt, so
+    oversized prompts are slowed down rather than rejected.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float) -> None:
+        async with self._lock:
+            needed = min(amount, self.capacity)
+            self._refill()
+            while self.tokens < needed:
+                await asyncio.sleep((needed - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+
+    def adjust(self, amount: float) -> None:
+        """Charge (or refund, if negative) tokens after the fact."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class AdaptiveRateLimiter:
+    """Process-wide limiter combining RPM/TPM buckets with AIMD concurrency."""
+
+    def __init__(
+        self,
+        rpm: float = RATE_LIMIT_RPM,
+        tpm: float = RATE_LIMIT_TPM,
+        headroom: float = RATE_LIMIT_HEADROOM,
+        max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+        min_concurrency: int = MIN_CONCURRENT_REQUESTS,
+        decrease_factor: float = 0.5,
+        decrease_cooldown: float = 2.0,
+    ):
+        # Aim just under the quota; the buckets hold a few seconds of burst
+        request_rate = rpm * headroom / WINDOW_SECONDS
+        token_rate = tpm * headroom / WINDOW_SECONDS
+        self.requests = TokenBucket(request_rate, max(1.0, request_rate * 5))
+        self.tokens = TokenBucket(token_rate, max(1.0, token_rate * 5))
+
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = max(1, min_concurrency)
+        self.concurrency_limit = float(max_concurrency)
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown = decrease_cooldown
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.throttle_count = 0
+        self.request_count = 0
+        # (timestamp, requests, tokens) entries from the last minute
+        self._window: deque[tuple[float, int, float]] = deque()
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: float):
+        """Wait for capacity, then hold one in-flight slot for a call.
+
+        Args:
+            estimated_tokens: Expected prompt plus completion tokens.
+        """
+        self.queue_depth += 1
+        try:
+            async with self._condition:
+                await self._condition.wait_for(
+                    lambda: self.in_flight < int(self.concurrency_limit)
+                )
+                self.in_flight += 1
+        finally:
+            self.queue_depth -= 1
+        try:
+            await self.requests.acquire(1)
+            await self.tokens.acquire(estimated_tokens)
+            self.request_count += 1
+            self._record(1, estimated_tokens)
+            yield
+        finally:
+            async with self._condition:
+                self.in_flight -= 1
+                self._condition.notify_all()
+
+    def on_success(self, estimated_tokens: float, actual_tokens: Optional[float]) -> None:
+        """Additively grow concurrency and settle the token estimate."""
+        self.concurrency_limit = min(
+            float(self.max_concurrency),
+            self.concurrency_limit + 1.0 / max(1.0, self.concurrency_limit),
+        )
+        if actual_tokens:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
+            self._record(0, actual_tokens - estimated_tokens)
+
+    def on_throttle(self) -> None:
+        """Multiplicatively shrink concurrency after a 429.
+
+        A burst of 429s from calls that were already in flight counts as a
+        single congestion signal, so the limit is cut at most once per
+        cooldown period.
+        """
+        self.throttle_count += 1
+        now = time.monotonic()
+        if now - self._last_decrease >= self.decrease_cooldown:
+            self._last_decrease = now
+            self.concurrency_limit = max(
+                float(self.min_concurrency),
+                self.concurrency_limit * self.decrease_factor,
+            )
+
+    def _record(self, requests: int, tokens: float) -> None:
+        now = time.monotonic()
+        self._window.append((now, requests, tokens))
+        self._trim_window(now)
+
+    def _trim_window(self, now: float) -> None:
+        while self._window and now - self._window[0][0] > WINDOW_SECONDS:
+            self._window.popleft()
+
+    def stats(self) -> dict:
+        """Current rate, queue depth and throttling counters."""
+        self._trim_window(time.monotonic())
+        return {
+            "requests_last_minute": sum(r for _, r, _ in self._window),
+            "tokens_last_minute": int(sum(t for _, _, t in self._window)),
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "concurrency_limit": int(self.concurrency_limit),
+            "throttled": self.throttle_count,
+            "requests": self.request_count,
+        }
+
+    def summary(self) -> str:
+        """One-line summary for run reports."""
+        s = self.stats()
+        return (
+            f"{s['requests']} requests, {s['throttled']} throttled (429), "
+            f"concurrency limit {s['concurrency_limit']}/{self.max_concurrency}, "
+            f"{s['requests_last_minute']} req/min, {s['tokens_last_minute']} tok/min"
+        )
+
+
+def estimate_request_tokens(llm_request: LlmRequest) -> int:
+    """Rough token estimate for a request (about four characters per token)."""
+    chars = 0
+    if llm_request.config and isinstance(llm_request.config.system_instruction, str):
+        chars += len(llm_request.config.system_instruction)
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            if part.text:
+                chars += len(part.text)
+    return chars // 4 + EXPECTED_OUTPUT_TOKENS
+
+
+def is_throttle_error(error: Exception) -> bool:
+    """Whether ``error`` is a 429 / RESOURCE_EXHAUSTED response."""
+    return isinstance(error, ClientError) and error.code == 429
+
+
+class RateLimitedLlm(BaseLlm):
+    """Model wrapper that routes every call through an ``AdaptiveRateLimiter``.
+
+    429 responses are retried here with short jittered backoff instead of the
+    HTTP client's retry ladder, so the limiter sees every throttle and can
+    slow the whole process down.
+    """
+
+    inner: BaseLlm
+    limiter: AdaptiveRateLimiter
+    retry_attempts: int = THROTTLE_RETRY_ATTEMPTS
+    max_backoff: float = THROTTLE_MAX_BACKOFF
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        estimated = estimate_request_tokens(llm_request)
+        for attempt in range(self.retry_attempts):
+            yielded = False
+            try:
+                async with self.limiter.slot(estimated):
+                    usage = None
+                    async for response in self.inner.generate_content_async(
+                        llm_request, stream=stream
+                    ):
+                        if response.usage_metadata:
+                            usage = response.usage_metadata.total_token_count
+                        if attempt and not response.partial:
+                            response.custom_metadata = {
+                                **(response.custom_metadata or {}),
+                                "throttle_retries": attempt,
+                            }
+                        yielded = True
+                        yield response
+                self.limiter.on_success(estimated, usage)
+                return
+            except ClientError as e:
+                # Partial output already went upstream; a retry would duplicate it
+                if not is_throttle_error(e) or yielded:
+                    raise
+                self.limiter.on_throttle()
+                if attempt == self.retry_attempts - 1:
+                    raise
+                backoff = min(self.max_backoff, 2 ** attempt)
+                await asyncio.sleep(backoff * random.uniform(0.5, 1.0))
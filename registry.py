@@ -0,0 +1,408 @@
+"""Declarative registry of the research agents and the sections they write.
+
+Every research agent is described by one ``AgentSpec``. The workflow, the
+aggregator prompt and the report are all built from the registry, so
+adding a section means adding one entry here. Named profiles select a
+subset of sections for quicker, cheaper runs. Each agent also names the
+model tier it runs on (see ``config.MODEL_TIERS``), and may declare the
+sections it waits for and a gate that rules the stock out early (see
+``scheduler.py``).
+"""
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+
+@dataclass(frozen=True)
+class AgentSpec:
+    """One research agent and the report section it produces.
+
+    Attributes:
+        name: Agent name, unique within the workflow.
+        output_key: Session state key the agent writes its section to; also
+            the section's identifier for ``--sections``.
+        title: Section heading in the aggregator prompt and the report.
+        prompt: Instruction template; ``{stock_query}`` is filled from state.
+        word_limit: Target length of the section in words.
+        tools: Names of the tools the agent may use.
+        context_keys: Optional state keys appended to the instruction when
+            present, e.g. figures injected by a plugin.
+        search_topics: Shared prefetched search result sets the agent uses
+            in ``SEARCH_MODE=prefetch`` (see ``search.PREFETCH_QUERIES``).
+        macro_topics: Ticker-independent context researched once per batch
+            that the agent uses (see ``macro.MACRO_TOPICS``).
+        tier: Model tier the agent runs on; lookups use the cheap tier and
+            escalate when their answer fails validation.
+        requires_figures: The section must contain numbers to pass validation.
+        depends_on: Output keys of sections that must finish before the agent
+            starts (see ``scheduler.py``).
+        priority: Start order among agents that are ready at the same time;
+            lower starts first.
+        gate: Finding that makes the stock a hard AVOID on its own. The agent
+            ends its section with a ``GATE_LINE`` verdict, and when it fires
+            the agents that haven't finished are skipped.
+    """
+
+    name: str
+    output_key: str
+    title: str
+    prompt: str
+    word_limit: int = 150
+    tools: tuple[str, ...] = ("google_search",)
+    context_keys: tuple[str, ...] = ()
+    search_topics: tuple[str, ...] = ()
+    macro_topics: tuple[str, ...] = ()
+    tier: str = "lite"
+    requires_figures: bool = False
+    depends_on: tuple[str, ...] = ()
+    priority: int = 1
+    gate: Optional[str] = None
+
+    @property
+    def instruction(self) -> str:
+        """The full instruction template for the agent."""
+        instruction = f"{self.prompt}\nKeep concise ({self.word_limit} words)."
+        for key in (
+            *self.context_keys,
+            *map(search_state_key, self.search_topics),
+            *map(macro_state_key, self.macro_topics),
+        ):
+            instruction += f"\n{{{key}?}}"
+        return instruction
+
+
+# Final line a gated agent's section ends with, e.g. "Hard AVOID: no"
+GATE_LINE = (
+    'End with a final line "Hard AVOID: yes - <one-line reason>" if {condition}; '
+    'otherwise "Hard AVOID: no".'
+)
+
+
+def search_state_key(topic: str) -> str:
+    """State key holding the prefetched search results for ``topic``."""
+    return f"search_{topic}"
+
+
+def macro_state_key(topic: str) -> str:
+    """State key holding the shared macro context for ``topic``."""
+    return f"macro_{topic}"
+
+
+# Cheap sections that can rule a stock out; the expensive ones wait for them
+SCREENS = ("ethics_check", "debt_analysis")
+
+AGENT_REGISTRY = (
+    AgentSpec(
+        name="BusinessUnderstandingAgent",
+        output_key="business_understanding",
+        title="Business Understanding",
+        prompt="""Research and explain what {stock_query} does and its industry.
+Answer: Do you understand their business model? What products/services do they offer?
+What industry are they in?""",
+    ),
+    AgentSpec(
+        name="CompetitiveAdvantageAgent",
+        output_key="competitive_advantage",
+        title="Competitive Advantage",
+        prompt="""Research {stock_query}'s unique competitive advantages.
+What makes them different from competitors? What is their moat?
+Do they have patents, brand power, network effects, or cost advantages?""",
+        macro_topics=("sector",),
+        tier="standard",
+        depends_on=SCREENS,
+        priority=2,
+    ),
+    AgentSpec(
+        name="MediaSentimentAgent",
+        output_key="media_sentiment",
+        title="Media Sentiment",
+        prompt="""Search for recent news headlines about {stock_query}.
+Analyze the sentiment: Is the media coverage positive, negative, or mixed?
+What are the main topics in the news? Any controversies or achievements?""",
+        search_topics=("news",),
+    ),
+    AgentSpec(
+        name="EthicsAgent",
+        output_key="ethics_check",
+        title="Ethics Check",
+        prompt="""Research if {stock_query} has any ethical concerns, controversies,
+or scandals. Check for labor practices, environmental issues, legal problems,
+or unethical behavior. Is this a company with good values?""",
+        search_topics=("news",),
+        priority=0,
+        gate="you found a disqualifying scandal: proven fraud, criminal charges "
+        "against the company or its leadership, or sanctions",
+    ),
+    AgentSpec(
+        name="InvestmentHorizonAgent",
+        output_key="investment_horizon",
+        title="Investment Horizon",
+        prompt="""Research if {stock_query} is suitable for long-term investment (5+ years).
+Check their long-term strategy, market trends, growth potential, and sustainability.
+Would you want to hold this stock for more than 5 years?""",
+        macro_topics=("sector",),
+        tier="standard",
+        depends_on=SCREENS,
+        priority=2,
+    ),
+    AgentSpec(
+        name="InsiderTradingAgent",
+        output_key="insider_trading",
+        title="Insider Trading",
+        prompt="""Search for information about congressional trading and insider activity
+for {stock_query}. Check sites like housestockwatcher.com or quiverquant.com.
+Are congresspeople or insiders buying or selling? What does this signal?""",
+    ),
+    AgentSpec(
+        name="GoogleTrendsAgent",
+        output_key="google_trends",
+        title="Google Trends",
+        prompt="""Research Google Trends data for {stock_query}.
+Is interest in the company/brand growing or declining?
+What does search trend data tell us about public interest?""",
+        word_limit=100,
+    ),
+    AgentSpec(
+        name="ShareDilutionAgent",
+        output_key="share_dilution",
+        title="Share Dilution",
+        prompt="""Research how many new shares {stock_query} is issuing.
+Check for stock dilution, share buybacks, or new offerings.
+Is the share count increasing (bad for investors) or decreasing (good)?""",
+        context_keys=("share_dilution_figures",),
+        search_topics=("financials",),
+        requires_figures=True,
+    ),
+    AgentSpec(
+        name="ShortInterestAgent",
+        output_key="short_interest",
+        title="Short Interest",
+        prompt="""Research the short interest for {stock_query}.
+What percentage of shares are being shorted? Is this high or low?
+What does this indicate about market sentiment?""",
+        context_keys=("short_interest_figures",),
+        search_topics=("financials",),
+        requires_figures=True,
+    ),
+    AgentSpec(
+        name="DebtAnalysisAgent",
+        output_key="debt_analysis",
+        title="Debt Analysis",
+        prompt="""Research {stock_query}'s debt levels.
+How much debt do they have? What is their debt-to-equity ratio?
+How long would it take them to pay off their debt with current earnings?
+Is the debt manageable or concerning?""",
+        context_keys=("debt_analysis_figures",),
+        search_topics=("financials",),
+        requires_figures=True,
+        priority=0,
+        gate="there is a serious risk of insolvency: debt the company cannot "
+        "service, a going-concern warning or a likely default",
+    ),
+    AgentSpec(
+        name="InfiniteGameAgent",
+        output_key="infinite_game",
+        title="Infinite Game",
+        prompt="""Research if {stock_query} is focused on long-term success vs short-term profits.
+Do they reinvest in R&D, employees, and innovation?
+Are they building for the future or maximizing quarterly earnings?""",
+        tier="standard",
+        depends_on=SCREENS,
+        priority=2,
+    ),
+    AgentSpec(
+        name="CEOAnalysisAgent",
+        output_key="ceo_analysis",
+        title="CEO Analysis",
+        prompt="""Research {stock_query}'s CEO and leadership team.
+Who is the CEO? What is their background and track record?
+Are they focused on long-term value creation or short-term gains?
+Do they have skin in the game (own significant shares)?""",
+    ),
+    AgentSpec(
+        name="AnalystRatingsAgent",
+        output_key="analyst_ratings",
+        title="Analyst Ratings",
+        prompt="""Search for analyst ratings and scores from Danelfin, TipRanks,
+and GuruFocus for {stock_query}. What are the consensus ratings?
+What do professional analysts think about this company?""",
+        search_topics=("ratings",),
+        requires_figures=True,
+    ),
+    AgentSpec(
+        name="TechnicalAnalysisAgent",
+        output_key="technical_analysis",
+        title="Technical Analysis",
+        prompt="""Research technical indicators for {stock_query}, especially RSI
+(Relative Strength Index). Is the stock overbought or oversold?
+What do the technical charts suggest?""",
+        context_keys=("technical_analysis_figures",),
+        search_topics=("ratings",),
+        macro_topics=("market",),
+        requires_figures=True,
+    ),
+    AgentSpec(
+        name="ReverseAnalysisAgent",
+        output_key="reverse_analysis",
+        title="Reverse Analysis",
+        prompt="""If {stock_query} has dropped recently, research WHY.
+What caused the decline? Is it temporary or fundamental?
+Do your homework on recent price movements and catalysts.
+Separate moves that follow the market or sector from company-specific ones.""",
+        search_topics=("news",),
+        macro_topics=("market", "sector"),
+        tier="standard",
+        depends_on=SCREENS,
+        priority=2,
+    ),
+    AgentSpec(
+        name="BondCorrelationAgent",
+        output_key="bond_correlation",
+        title="Bond Correlation",
+        prompt="""Research how the 10-year US Treasury bond yields affect {stock_query}.
+Is this company sensitive to interest rate changes (debt, valuation, customers)?
+How does rising/falling bond yields impact the stock price?""",
+        word_limit=100,
+        context_keys=("bond_correlation_figures",),
+        macro_topics=("rates",),
+    ),
+)
+
+AGENT_SPECS = {spec.output_key: spec for spec in AGENT_REGISTRY}
+
+
+def _check_dependencies() -> None:
+    """Reject ``depends_on`` entries that are unknown or circular."""
+    for spec in AGENT_REGISTRY:
+        unknown = [key for key in spec.depends_on if key not in AGENT_SPECS]
+        if unknown:
+            raise ValueError(f"{spec.name} depends on unknown section(s) {', '.join(unknown)}")
+    remaining = dict(AGENT_SPECS)
+    while remaining:
+        ready = [key for key, spec in remaining.items() if not set(spec.depends_on) & set(remaining)]
+        if not ready:
+            raise ValueError(f"Circular dependencies among {', '.join(remaining)}")
+        for key in ready:
+            del remaining[key]
+
+
+_check_dependencies()
+
+# Suffix of the state keys holding compacted sections for the aggregator
+COMPACT_SUFFIX = "_compact"
+
+ALL_SECTIONS = tuple(AGENT_SPECS)
+
+# The aggregator synthesizes every section, so it runs on the strongest tier
+AGGREGATOR_TIER = "standard"
+
+# Named section selections for --profile
+PROFILES = {
+    "full": ALL_SECTIONS,
+    "quick": ("technical_analysis", "short_interest", "analyst_ratings"),
+    "fundamentals": (
+        "business_understanding",
+        "competitive_advantage",
+        "debt_analysis",
+        "share_dilution",
+        "ceo_analysis",
+        "infinite_game",
+    ),
+    "sentiment": (
+        "media_sentiment",
+        "google_trends",
+        "insider_trading",
+        "analyst_ratings",
+        "short_interest",
+    ),
+}
+
+
+def resolve_sections(
+    sections: Optional[Iterable[str]] = None, profile: Optional[str] = None
+) -> tuple[str, ...]:
+    """Turn a section list and/or profile name into registry output keys.
+
+    Sections from both are combined and returned in registry order.
+    Without either, every section is selected.
+
+    Args:
+        sections: Output keys to include.
+        profile: Name of a profile in ``PROFILES``.
+
+    Returns:
+        tuple[str, ...]: The selected output keys.
+
+    Raises:
+        ValueError: If a section or profile is unknown, or none is selected.
+    """
+    selected = set()
+    if profile is not None:
+        if profile not in PROFILES:
+            raise ValueError(
+                f"Unknown profile {profile!r}; choose from {', '.join(PROFILES)}"
+            )
+        selected.update(PROFILES[profile])
+    if sections is not None:
+        unknown = [key for key in sections if key not in AGENT_SPECS]
+        if unknown:
+            raise ValueError(
+                f"Unknown section(s) {', '.join(unknown)}; choose from {', '.join(ALL_SECTIONS)}"
+            )
+        selected.update(sections)
+    if profile is None and sections is None:
+        return ALL_SECTIONS
+    if not selected:
+        raise ValueError("No sections selected")
+    return tuple(key for key in ALL_SECTIONS if key in selected)
+
+
+def _findings(sections: Iterable[str], compacted: bool) -> str:
+    suffix = COMPACT_SUFFIX if compacted else ""
+    return "\n\n".join(
+        f"**{AGENT_SPECS[key].title}:**\n{{{key}{suffix}}}" for key in sections
+    )
+
+
+def aggregator_instruction(sections: Iterable[str] = ALL_SECTIONS, compacted: bool = False) -> str:
+    """Build the aggregator prompt for the selected sections.
+
+    The target length shrinks with the number of sections, from 400-500
+    words for the full set.
+
+    Args:
+        sections: Output keys of the sections to synthesize.
+        compacted: Read the compacted ``<output_key>_compact`` copies
+            instead of the full sections.
+    """
+    sections = tuple(sections)
+    findings = _findings(sections, compacted)
+    low = min(400, 100 + 25 * len(sections))
+    return f"""Synthesize all the research findings into a comprehensive investment analysis of {{stock_query}}:
+
+{findings}
+
+Provide a clear investment recommendation: BUY, HOLD, or AVOID.
+Explain the key reasons for your recommendation.
+Highlight the main risks and opportunities.
+Summary should be around {low}-{low + 100} words."""
+
+
+def scorecard_instruction(sections: Iterable[str] = ALL_SECTIONS, compacted: bool = False) -> str:
+    """Build the prompt that turns a recommendation into a structured record.
+
+    Args:
+        sections: Output keys of the sections to score.
+        compacted: Read the compacted copies instead of the full sections.
+    """
+    sections = tuple(sections)
+    return f"""Turn this investment analysis of {{stock_query}} into a structured scorecard.
+
+**Recommendation:**
+{{investment_recommendation}}
+
+{_findings(sections, compacted)}
+
+Use the verdict (BUY, HOLD or AVOID) stated in the recommendation.
+Give your confidence in it from 0 to 1 and an overall risk score from 1 (low) to 10 (high).
+Score these sections from 1 (very negative) to 5 (very positive): {", ".join(sections)}.
+List up to five key risks, one short phrase each."""
@@ -0,0 +1,223 @@
+"""Report rendering and persistence for investment analyses."""
+import os
+import re
+from datetime import datetime
+from typing import Optional
+
+from config import ANALYSIS_DIR
+from registry import AGENT_REGISTRY
+
+RECOMMENDATION_KEY = "investment_recommendation"
+
+# State key of the structured ``scorecard.InvestmentRecord`` of a run. A
+# record whose verdict contradicted the recommendation holds the
+# recommendation's verdict, and the scorecard's under "scorecard_verdict"
+RECORD_KEY = "investment_record"
+
+# State key mapping each cut-off section's output key to its agent and reason
+UNAVAILABLE_KEY = "unavailable_sections"
+
+# State key of the screen that ruled the stock out early: its section,
+# agent and reason, the sections skipped or cancelled and the calls and
+# time saved
+GATE_KEY = "screening_gate"
+
+# State key of the shared macro context a run was given: its topics and
+# the searches and tokens it saved the run, net of the run's share of the
+# shared research
+MACRO_SAVINGS_KEY = "macro_savings"
+
+# Matches the verdict the aggregator is asked for, e.g. "**Investment Recommendation: BUY**"
+_RATING = re.compile(
+    r"recommendation:?\W{0,4}(strong buy|strong sell|buy|hold|avoid|sell)\b", re.I
+)
+
+# Report section titles paired with the agent output keys they render
+ANALYSIS_SECTIONS = [(spec.title, spec.output_key) for spec in AGENT_REGISTRY]
+
+SECTION_TITLES = {key: title for title, key in ANALYSIS_SECTIONS}
+
+
+def extract_rating(recommendation: str) -> Optional[str]:
+    """The BUY/HOLD/AVOID verdict of a recommendation, if it states one."""
+    match = _RATING.search(recommendation or "")
+    return match.group(1).upper() if match else None
+
+
+def unavailable_marker(reason: str) -> str:
+    """Placeholder text for a section whose agent did not finish."""
+    return (
+        f"⚠️ Unavailable: this section {reason}. "
+        f"No findings are available; do not draw conclusions from it."
+    )
+
+
+def render_report(stock_query: str, state: dict) -> str:
+    """Render the markdown report for a finished analysis.
+
+    Args:
+        stock_query: The stock ticker or company name that was analyzed.
+        state: The session state holding the agent outputs.
+
+    Returns:
+        str: The markdown report.
+    """
+    markdown_content = f"# Investment Analysis: {stock_query}\n\n"
+    markdown_content += f"**Date:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+
+    # Add recommendation first if available
+    if RECOMMENDATION_KEY in state:
+        markdown_content += "## 📋 Investment Recommendation\n\n"
+        markdown_content += f"{state[RECOMMENDATION_KEY]}\n\n"
+        record = state.get(RECORD_KEY)
+        if record:
+            markdown_content += (
+                f"**Scorecard:** {record['verdict']} · confidence "
+                f"{record['confidence']:.0%} · risk {record['risk_score']}/10\n\n"
+            )
+            if record.get("key_risks"):
+                markdown_content += f"**Key risks:** {'; '.join(record['key_risks'])}\n\n"
+            if record.get("scorecard_verdict"):
+                markdown_content += (
+                    f"> ⚠️ The scorecard model answered {record['scorecard_verdict']}, "
+                    f"contradicting the recommendation above; its scores may not "
+                    f"reflect it.\n\n"
+                )
+        markdown_content += "---\n\n"
+
+    gate = state.get(GATE_KEY)
+    if gate:
+        markdown_content += (
+            f"> ⛔ **Ruled out by the {SECTION_TITLES.get(gate['section'], gate['section'])} "
+            f"screen:** {gate['reason']}\n"
+        )
+        skipped = [*gate["skipped"], *gate["cancelled"]]
+        if skipped:
+            markdown_content += "> Not researched: " + ", ".join(
+                SECTION_TITLES.get(key, key) for key in skipped
+            ) + "\n"
+        markdown_content += "\n"
+
+    unavailable = state.get(UNAVAILABLE_KEY) or {}
+    if unavailable:
+        markdown_content += "> ⚠️ **Incomplete analysis.** These sections were cut off:\n"
+        for key, info in unavailable.items():
+            markdown_content += f"> - {SECTION_TITLES.get(key, key)}: {info['reason']}\n"
+        markdown_content += "\n"
+
+    macro = state.get(MACRO_SAVINGS_KEY)
+    if macro:
+        tokens = macro["tokens_saved"]
+        markdown_content += (
+            f"> 🌐 **Shared macro context:** {', '.join(macro['topics'])}. Reusing it saved "
+            f"this analysis ≈{macro['searches_saved']:g} searches and "
+            + (f"≈{tokens:,} tokens.\n\n" if tokens >= 0 else
+               f"cost ≈{-tokens:,} more tokens than it saved.\n\n")
+        )
+
+    markdown_content += "## 🔍 Detailed Research Data\n\n"
+
+    for title, key in ANALYSIS_SECTIONS:
+        if key in state:
+            markdown_content += f"### {title}\n\n"
+            markdown_content += f"{state[key]}\n\n"
+
+    return markdown_content
+
+
+def report_path(stock_query: str) -> str:
+    """Build a timestamped report path inside the analysis directory."""
+    # Create analysis directory if it doesn't exist
+    os.makedirs(ANALYSIS_DIR, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"{ANALYSIS_DIR}/analysis_{stock_query}_{timestamp}.md"
+
+
+# Matches the file names built by ``report_path``
+_REPORT_NAME = re.compile(r"^analysis_(.+)_(\d{8}_\d{6})\.md$")
+
+
+def list_reports(directory: str = ANALYSIS_DIR) -> list[tuple[str, datetime, str]]:
+    """Find the saved reports in ``directory``.
+
+    Returns:
+        list[tuple[str, datetime, str]]: ``(stock query, created, path)`` for
+        every report, newest first.
+    """
+    if not os.path.isdir(directory):
+        return []
+    reports = []
+    for name in os.listdir(directory):
+        match = _REPORT_NAME.match(name)
+        if match:
+            created = datetime.strptime(match.group(2), "%Y%m%d_%H%M%S")
+            reports.append((match.group(1), created, os.path.join(directory, name)))
+    return sorted(reports, key=lambda report: report[1], reverse=True)
+
+
+def save_report(stock_query: str, state: dict) -> str:
+    """Write the markdown report for a finished analysis to disk.
+
+    Args:
+        stock_query: The stock ticker or company name that was analyzed.
+        state: The session state holding the agent outputs.
+
+    Returns:
+        str: The path of the written report.
+    """
+    filename = report_path(stock_query)
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write(render_report(stock_query, state))
+
+    return filename
+
+
+class StreamingReportWriter:
+    """Writes a report section by section while the workflow is running.
+
+    Each section is appended and flushed as soon as its ``output_key`` is
+    set, so finished work survives a crash and readers can follow along.
+    When the run completes, ``finalize`` rewrites the file in the usual
+    report layout with the recommendation first.
+
+    Args:
+        stock_query: The stock ticker or company name being analyzed.
+        echo: Also print each section to the console as it arrives.
+    """
+
+    def __init__(self, stock_query: str, echo: bool = False):
+        self.stock_query = stock_query
+        self.echo = echo
+        self.path = report_path(stock_query)
+        self.written: list[str] = []
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(f"# Investment Analysis: {stock_query}\n\n")
+            f.write(f"**Date:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+            f.write("## 🔍 Detailed Research Data\n\n")
+
+    def add_section(self, key: str, text: str, echo: Optional[bool] = None) -> None:
+        """Append one finished section to the report.
+
+        Args:
+            key: The output key of the finished section.
+            text: The section text.
+            echo: Override the writer's ``echo`` setting for this section.
+        """
+        if key == RECOMMENDATION_KEY:
+            heading = "## 📋 Investment Recommendation"
+        else:
+            heading = f"### {SECTION_TITLES.get(key, key)}"
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(f"{heading}\n\n{text}\n\n")
+        self.written.append(key)
+        if self.echo if echo is None else echo:
+            print(f"\n[{self.stock_query}] {heading}\n\n{text}")
+
+    def finalize(self, state: dict) -> str:
+        """Rewrite the report in canonical order and return its path."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(render_report(self.stock_query, state))
+        os.replace(tmp_path, self.path)
+        return self.path
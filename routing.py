@@ -0,0 +1,268 @@
+"""Per-agent model tiers with validation-based escalation.
+
+Every agent runs on a model tier (``config.MODEL_TIERS``) chosen in its
+registry entry. Lookup sections run on the cheap tier; ``RoutedLlm`` checks
+their final answer and, only when it fails validation (empty, a refusal,
+not about the analyzed company, or missing the figures the section needs),
+discards it and asks the next stronger tier instead. ``TierUsage`` counts
+calls, latency, tokens and estimated cost per tier.
+"""
+import functools
+import re
+import time
+from dataclasses import dataclass, field
+from typing import AsyncGenerator, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+from config import BASELINE_MODEL, MODEL_PRICES, VALIDATION_MIN_WORDS
+
+# Matches the subject in ``batch.build_analysis_prompt``
+_SUBJECT_PATTERN = re.compile(r"analysis of (.+?)\. ")
+_REFUSAL = re.compile(
+    r"\b(?:i (?:cannot|can't|am unable|was unable|couldn't|could not)"
+    r"|unable to (?:find|locate|access|provide)"
+    r"|no (?:relevant |reliable |specific )?(?:information|data) (?:was |is )?(?:found|available))",
+    re.I,
+)
+_DIGIT = re.compile(r"\d")
+# Ticker symbols, optionally with a share class: MSFT, BRK.B, RDS-A
+_TICKER = re.compile(r"^[a-z]{1,5}(?:[./-][a-z]{1,2})?$", re.I)
+_SUBJECT_FILLER = frozenset({"inc", "corp", "co", "ltd", "plc", "the", "company", "stock"})
+
+
+def request_subject(llm_request: LlmRequest) -> Optional[str]:
+    """The stock being analyzed, read from the run's user message."""
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            match = _SUBJECT_PATTERN.search(part.text or "")
+            if match:
+                return match.group(1)
+    return None
+
+
+def validate_output(
+    text: str, subject: Optional[str] = None, requires_figures: bool = False
+) -> Optional[str]:
+    """Check a section for the failures that warrant a stronger model.
+
+    Answers often name the company rather than its ticker, so only a
+    subject given as a company name must be mentioned in the answer.
+
+    Args:
+        text: The model's final answer.
+        subject: The analyzed stock, as a ticker or a company name.
+        requires_figures: The answer must contain at least one number.
+
+    Returns:
+        Optional[str]: Why the answer failed, or ``None`` if it passed.
+
+    Examples:
+        >>> answer = ("Microsoft reported revenue growth of 5% year over year, driven by "
+        ...           "cloud demand, steady operating margins and a growing backlog of "
+        ...           "enterprise contracts across its main segments.")
+        >>> validate_output(answer, "MSFT") is None
+        True
+        >>> validate_output(answer.replace("Microsoft", "Berkshire Hathaway"), "BRK.B") is None
+        True
+        >>> validate_output(answer, "Microsoft Corporation") is None
+        True
+        >>> validate_output(answer.replace("Microsoft", "Apple"), "Microsoft Corporation")
+        'off-topic'
+    """
+    words = text.split()
+    if not words:
+        return "empty"
+    if len(words) < VALIDATION_MIN_WORDS:
+        return "too short"
+    if _REFUSAL.search(text):
+        return "refusal"
+    if subject and not _TICKER.match(subject.strip()):
+        names = {
+            word for word in re.findall(r"[\w.&-]+", subject.lower())
+            if len(word) > 1 and word not in _SUBJECT_FILLER
+        }
+        lowered = text.lower()
+        if names and not any(name in lowered for name in names):
+            return "off-topic"
+    if requires_figures and not _DIGIT.search(text):
+        return "no figures"
+    return None
+
+
+@dataclass
+class TierStats:
+    """Calls made on one model tier."""
+
+    model: str
+    calls: int = 0
+    escalations: int = 0  # Answers rejected by validation
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+    latencies: list[float] = field(default_factory=list)
+
+    @property
+    def cost(self) -> float:
+        """Estimated USD from ``config.MODEL_PRICES``; zero for unknown models."""
+        return self.cost_on(self.model)
+
+    def cost_on(self, model: str) -> float:
+        """Estimated USD of the same tokens on ``model``."""
+        input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+        return (self.prompt_tokens * input_price + self.output_tokens * output_price) / 1e6
+
+
+class TierUsage:
+    """Per-tier model call statistics shared by every routed model."""
+
+    def __init__(self):
+        self.tiers: dict[str, TierStats] = {}
+
+    def record(
+        self, tier: str, model: str, latency: float,
+        response: Optional[LlmResponse], escalated: bool = False,
+    ) -> None:
+        stats = self.tiers.setdefault(tier, TierStats(model=model))
+        stats.calls += 1
+        stats.escalations += escalated
+        stats.latencies.append(latency)
+        usage = response.usage_metadata if response else None
+        if usage:
+            stats.prompt_tokens += usage.prompt_token_count or 0
+            stats.output_tokens += usage.candidates_token_count or 0
+
+    @property
+    def cost(self) -> float:
+        return sum(stats.cost for stats in self.tiers.values())
+
+    @property
+    def baseline_cost(self) -> float:
+        """Estimated USD of the same tokens all on ``config.BASELINE_MODEL``."""
+        return sum(stats.cost_on(BASELINE_MODEL) for stats in self.tiers.values())
+
+    @property
+    def escalations(self) -> int:
+        return sum(stats.escalations for stats in self.tiers.values())
+
+    def reset(self) -> None:
+        self.tiers.clear()
+
+    def summary_table(self, tickers: int = 1) -> str:
+        """Per-tier calls, latency, tokens and cost, plus cost per ticker."""
+        lines = [
+            f"{'Tier':<10}{'Model':<24}{'Calls':>7}{'Escal.':>8}{'p50':>8}"
+            f"{'Tokens':>11}{'Est. cost':>11}"
+        ]
+        for tier, stats in self.tiers.items():
+            latencies = sorted(stats.latencies)
+            p50 = latencies[(len(latencies) - 1) // 2] if latencies else 0.0
+            lines.append(
+                f"{tier:<10}{stats.model[:24]:<24}{stats.calls:>7}{stats.escalations:>8}"
+                f"{p50:>7.1f}s{stats.prompt_tokens + stats.output_tokens:>11,}"
+                f"{'$' + format(stats.cost, '.4f'):>11}"
+            )
+        per_ticker = f"${self.cost / max(1, tickers):.4f} per ticker"
+        if any(stats.model != BASELINE_MODEL for stats in self.tiers.values()):
+            per_ticker += (
+                f" vs ${self.baseline_cost / max(1, tickers):.4f} on {BASELINE_MODEL} alone"
+            )
+        lines.append(
+            f"💵 Estimated cost: ${self.cost:.4f} ({per_ticker}), "
+            f"{self.escalations} escalations"
+        )
+        return "\n".join(lines)
+
+
+@functools.lru_cache(maxsize=1)
+def get_tier_usage() -> TierUsage:
+    """The process-wide per-tier statistics."""
+    return TierUsage()
+
+
+def _final_text(responses: list[LlmResponse]) -> Optional[str]:
+    """Text of a finished answer, or ``None`` if the model called a tool."""
+    text = ""
+    for response in responses:
+        if response.partial or not response.content:
+            continue
+        for part in response.content.parts or []:
+            if part.function_call:
+                return None
+            text += part.text or ""
+    return text
+
+
+class RoutedLlm(BaseLlm):
+    """Runs requests on one tier and escalates answers that fail validation.
+
+    Without ``escalate_to`` responses pass straight through (and stream).
+    Otherwise the cheap tier's responses are buffered until its answer has
+    been validated; tool calls are never validated.
+    """
+
+    tier: str
+    inner: BaseLlm
+    escalate_to: Optional[BaseLlm] = None
+    escalation_tier: Optional[str] = None
+    requires_figures: bool = False
+    usage: TierUsage
+
+    async def _call(
+        self, model: BaseLlm, tier: str, llm_request: LlmRequest, labels: dict, stream: bool
+    ) -> AsyncGenerator[LlmResponse, None]:
+        # Gemini drops the labels from the request it is given; restore them
+        # so an escalated call is still attributed to the agent
+        if llm_request.config is not None:
+            llm_request.config.labels = dict(labels)
+        llm_request.model = model.model
+        started = time.perf_counter()
+        final = None
+        async for response in model.generate_content_async(llm_request, stream=stream):
+            if not response.partial:
+                final = response
+                response.custom_metadata = {**(response.custom_metadata or {}), "tier": tier}
+            yield response
+        self.usage.record(tier, model.model, time.perf_counter() - started, final)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        labels = dict((llm_request.config.labels or {}) if llm_request.config else {})
+        if self.escalate_to is None:
+            async for response in self._call(self.inner, self.tier, llm_request, labels, stream):
+                yield response
+            return
+
+        started = time.perf_counter()
+        responses = []
+        async for response in self.inner.generate_content_async(llm_request, stream=stream):
+            responses.append(response)
+        final = next((r for r in reversed(responses) if not r.partial), None)
+        text = _final_text(responses)
+        reason = None if text is None else validate_output(
+            text, request_subject(llm_request), self.requires_figures
+        )
+        self.usage.record(
+            self.tier, self.inner.model, time.perf_counter() - started, final,
+            escalated=reason is not None,
+        )
+        if reason is None:
+            for response in responses:
+                if not response.partial:
+                    response.custom_metadata = {
+                        **(response.custom_metadata or {}), "tier": self.tier,
+                    }
+                yield response
+            return
+
+        agent = labels.get("adk_agent_name", "model")
+        print(f"⬆️  {agent}: {self.tier} answer failed validation ({reason}); "
+              f"retrying on {self.escalation_tier}")
+        async for response in self._call(
+            self.escalate_to, self.escalation_tier, llm_request, labels, stream
+        ):
+            if not response.partial:
+                response.custom_metadata["escalated"] = reason
+            yield response
@@ -0,0 +1,290 @@
+"""Dependency-aware research scheduling with early-exit gates.
+
+``ScheduledResearchTeam`` replaces the flat fan-out of the research team.
+Each agent starts once the sections in its ``AgentSpec.depends_on`` have
+finished, agents that are ready together start in ``priority`` order, and
+at most ``RESEARCH_CONCURRENCY`` run at once. Screening agents (a
+``gate`` in their spec) are cheap and go first; the expensive analyses
+wait for them. When a screen ends its section with "Hard AVOID: yes", the
+agents still waiting are skipped and the running ones are cancelled. A
+stock that passes its screens takes longer, so the ``"eager"`` schedule
+ignores the dependencies: every agent starts at once and a gate only
+cancels the running ones and skips the synthesis.
+
+``GatedSynthesis`` wraps the stages after the research team. After a hard
+AVOID it writes the recommendation (and scorecard) straight from the gate
+instead of running them, so a rejected ticker costs little more than its
+screens. The calls skipped and an estimate of the time saved, from each
+agent's recent run times, are recorded under ``GATE_KEY``.
+"""
+import asyncio
+import re
+import time
+from typing import AsyncGenerator, Optional
+
+from google.adk.agents import LlmAgent, SequentialAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+
+from branches import branch_context
+from config import RESEARCH_CONCURRENCY
+from deadlines import DeadlineParallelAgent
+from registry import AGENT_SPECS
+from report import GATE_KEY, RECOMMENDATION_KEY, RECORD_KEY, SECTION_TITLES
+from scorecard import InvestmentRecord
+
+# The verdict line of a gated section, see ``registry.GATE_LINE``; the
+# separators stop at the line end so a verdict can't run into the next line
+_GATE_PATTERN = re.compile(
+    r"^[^\w\n]*hard avoid[^\w\n]*:[^\w\n]*(yes|no)\b[^\w\n]*(.*)$", re.IGNORECASE | re.MULTILINE
+)
+
+
+def gate_reason(text) -> Optional[str]:
+    """The reason a gated section rules the stock out, or None if it passes.
+
+    The last verdict line counts; a section without one passes.
+    """
+    if not isinstance(text, str):
+        return None
+    verdicts = _GATE_PATTERN.findall(text)
+    if not verdicts or verdicts[-1][0].lower() != "yes":
+        return None
+    return verdicts[-1][1].strip() or "no reason given"
+
+
+class RunTimes:
+    """Moving average of how long each agent takes, to price skipped work.
+
+    Args:
+        alpha: Weight of the newest run time.
+    """
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self._averages: dict[str, float] = {}
+
+    def record(self, agent: str, seconds: float) -> None:
+        previous = self._averages.get(agent)
+        self._averages[agent] = (
+            seconds if previous is None else previous + self.alpha * (seconds - previous)
+        )
+
+    def estimate(self, agent: str) -> float:
+        """Expected run time of ``agent``; the mean of all agents if unseen."""
+        if agent in self._averages:
+            return self._averages[agent]
+        if not self._averages:
+            return 0.0
+        return sum(self._averages.values()) / len(self._averages)
+
+
+# Shared by every run in the process
+_run_times = RunTimes()
+# Model calls per synthesis, which vary with how many sections the
+# compactor summarizes; averaged the same way as the run times
+_synthesis_calls = RunTimes()
+
+
+def _model_agents(agent) -> set[str]:
+    """Names of the LLM agents at or below ``agent``."""
+    names = {agent.name} if isinstance(agent, LlmAgent) else set()
+    for sub_agent in agent.sub_agents:
+        names |= _model_agents(sub_agent)
+    return names
+
+
+def gate_recommendation(ticker: str, gate: dict) -> str:
+    """Recommendation text for a stock a screen ruled out."""
+    title = SECTION_TITLES.get(gate["section"], gate["section"])
+    return (
+        f"**Investment Recommendation: AVOID**\n\n"
+        f"{ticker} fails the {title} screen: {gate['reason']}. This is a hard "
+        f"AVOID on its own, so the remaining research was skipped and this "
+        f"verdict rests on that finding alone."
+    )
+
+
+class ScheduledResearchTeam(DeadlineParallelAgent):
+    """Runs the research agents as a dependency graph, stopping at a hard AVOID.
+
+    Sub-agents are looked up in the registry by their ``output_key``.
+    Dependencies on sections outside the run are ignored; a dependency
+    that was cut off still counts as finished.
+
+    Attributes:
+        concurrency: Agents of one run allowed at the same time; 0 starts
+            every agent as soon as it is ready.
+        dependencies: Wait for ``depends_on``; off, every agent is ready at
+            once.
+    """
+
+    concurrency: int = RESEARCH_CONCURRENCY
+    dependencies: bool = True
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        if not self.sub_agents:
+            return
+        state = ctx.session.state
+        agents = {agent.output_key: agent for agent in self.sub_agents}
+        specs = {key: AGENT_SPECS[key] for key in agents}
+        waits = {
+            key: set(specs[key].depends_on) & set(agents) if self.dependencies else set()
+            for key in agents
+        }
+        order = list(agents)
+        waiting = sorted(agents, key=lambda key: (specs[key].priority, order.index(key)))
+        finished: set[str] = set()
+        running: dict[str, asyncio.Task] = {}
+        started: dict[str, float] = {}
+        tasks, runs = [], []
+        cut_off: dict[str, str] = {}  # agent name -> reason
+        gate = None
+        sentinel = object()
+        queue = asyncio.Queue()
+
+        def start_ready():
+            slots = self.concurrency or len(agents)
+            for key in [key for key in waiting if waits[key] <= finished]:
+                if len(running) >= slots:
+                    break
+                waiting.remove(key)
+                agent = agents[key]
+                run = agent.run_async(branch_context(self, agent, ctx))
+                started[key] = time.monotonic()
+                running[key] = asyncio.create_task(self._forward(
+                    agent, run, self._time_limit(ctx), queue, cut_off, (sentinel, key)
+                ))
+                tasks.append(running[key])
+                runs.append(run)
+
+        start_ready()
+        try:
+            while running:
+                event, resume = await queue.get()
+                if event is not sentinel:
+                    yield event
+                    resume.set()
+                    continue
+                key = resume  # a finished agent's sentinel carries its key
+                if running.pop(key, None) is None:
+                    continue  # cancelled by a gate
+                finished.add(key)
+                agent = agents[key]
+                if agent.name not in cut_off:
+                    _run_times.record(agent.name, time.monotonic() - started[key])
+                reason = gate_reason(state.get(key)) if specs[key].gate else None
+                if reason:
+                    gate = self._close_gate(key, reason, waiting, running, started)
+                    print(f"⛔ {state.get('stock_query', '')} {agent.name}: hard AVOID "
+                          f"({reason}); skipping {len(gate['skipped'])} agents, "
+                          f"cancelling {len(gate['cancelled'])}")
+                    waiting.clear()
+                    running.clear()
+                start_ready()
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Let cancelled agents unwind before closing their generators
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for run in runs:
+                await run.aclose()
+
+        delta = self._unavailable_delta(ctx, cut_off)
+        if gate is not None:
+            delta[GATE_KEY] = gate
+        if delta:
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                branch=ctx.branch,
+                actions=EventActions(state_delta=delta),
+            )
+
+    def _close_gate(
+        self,
+        key: str,
+        reason: str,
+        waiting: list[str],
+        running: dict[str, asyncio.Task],
+        started: dict[str, float],
+    ) -> dict:
+        """Cancel the running agents and describe the gate that fired."""
+        now = time.monotonic()
+        remaining = [_run_times.estimate(AGENT_SPECS[other].name) for other in waiting]
+        for other, task in running.items():
+            task.cancel()
+            remaining.append(_run_times.estimate(AGENT_SPECS[other].name) - (now - started[other]))
+        return {
+            "section": key,
+            "agent": AGENT_SPECS[key].name,
+            "reason": reason,
+            "skipped": [agent.output_key for agent in self.sub_agents if agent.output_key in waiting],
+            "cancelled": [agent.output_key for agent in self.sub_agents if agent.output_key in running],
+            # Agents cancelled mid-call have already made it
+            "calls_skipped": len(waiting),
+            # The skipped agents would have run side by side
+            "seconds_saved": round(max([0.0, *remaining]), 1),
+        }
+
+
+class GatedSynthesis(SequentialAgent):
+    """Runs the stages after the research team unless a screen ruled the stock out.
+
+    After a hard AVOID there is nothing left to weigh, so the recommendation
+    (and the scorecard record) is written from the gate instead.
+
+    Attributes:
+        record: Also write the ``InvestmentRecord`` the scorecard stage would.
+    """
+
+    record: bool = False
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        gate = state.get(GATE_KEY)
+        if not gate:
+            started = time.monotonic()
+            models = _model_agents(self)
+            calls = 0
+            async for event in super()._run_async_impl(ctx):
+                # Each model response is one call; tool results come back as user turns
+                if (event.author in models and not event.partial and event.content
+                        and event.content.role == "model"):
+                    calls += 1
+                yield event
+            _run_times.record(self.name, time.monotonic() - started)
+            _synthesis_calls.record(self.name, calls)
+            return
+        # Before any synthesis has run, assume one call per LLM stage
+        calls = round(_synthesis_calls.estimate(self.name)) or sum(
+            1 for agent in self.sub_agents if isinstance(agent, LlmAgent)
+        )
+        gate = {
+            **gate,
+            "calls_skipped": gate["calls_skipped"] + calls,
+            "seconds_saved": round(gate["seconds_saved"] + _run_times.estimate(self.name), 1),
+        }
+        delta = {
+            RECOMMENDATION_KEY: gate_recommendation(state.get("stock_query", ""), gate),
+            GATE_KEY: gate,
+        }
+        if self.record:
+            delta[RECORD_KEY] = InvestmentRecord(
+                verdict="AVOID", confidence=1.0, risk_score=10, key_risks=[gate["reason"]],
+            ).model_dump()
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta=delta),
+        )
+
+
+def gate_summary(gate: dict) -> str:
+    """One-line description of a gate that fired, for the console."""
+    title = SECTION_TITLES.get(gate["section"], gate["section"])
+    return (
+        f"{title}: {gate['reason']}; {gate['calls_skipped']} calls skipped, "
+        f"{len(gate['cancelled'])} agents cancelled, ≈{gate['seconds_saved']:.1f}s saved"
+    )
@@ -0,0 +1,88 @@
+"""Structured, schema-validated record of each analysis.
+
+The aggregator's recommendation is free text for people. The scorecard
+stage runs after it and asks a cheap model, constrained to the
+``InvestmentRecord`` JSON schema, for the same verdict in a form programs
+can filter: BUY/HOLD/AVOID, confidence, risk score, a 1-5 score per section
+and the key risks. The answer is validated before it is stored under
+``RECORD_KEY``; an invalid one is logged and dropped without failing the
+run. A record whose verdict contradicts the recommendation takes the
+recommendation's verdict, so screens never key on a verdict the report
+contradicts; the scorecard's own is kept as ``scorecard_verdict``.
+Records are appended to the columnar store in ``screening.py``.
+"""
+from typing import Literal, Optional
+
+from google.adk.agents import LlmAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_response import LlmResponse
+from pydantic import BaseModel, Field, ValidationError
+
+from models import get_tier_model
+from registry import ALL_SECTIONS, scorecard_instruction
+from report import RECOMMENDATION_KEY, RECORD_KEY, extract_rating
+
+Verdict = Literal["BUY", "HOLD", "AVOID"]
+
+# The recommendation may grade its verdict more finely than the record
+_VERDICTS = {"STRONG BUY": "BUY", "SELL": "AVOID", "STRONG SELL": "AVOID"}
+
+
+class SectionScore(BaseModel):
+    """How one research section bears on the investment case."""
+
+    section: Literal[ALL_SECTIONS] = Field(description="Output key of the section.")
+    score: int = Field(ge=1, le=5, description="1 = very negative, 5 = very positive.")
+
+
+class InvestmentRecord(BaseModel):
+    """The structured verdict of one analysis."""
+
+    verdict: Verdict
+    confidence: float = Field(ge=0.0, le=1.0, description="Confidence in the verdict.")
+    risk_score: int = Field(ge=1, le=10, description="Overall risk, 1 = low, 10 = high.")
+    section_scores: list[SectionScore] = Field(default_factory=list)
+    key_risks: list[str] = Field(default_factory=list, max_length=5)
+
+
+def _save_record(
+    callback_context: CallbackContext, llm_response: LlmResponse
+) -> Optional[LlmResponse]:
+    """Validate the scorecard answer and store it, or drop it with a warning."""
+    if llm_response.partial or not llm_response.content:
+        return None
+    text = "".join(
+        part.text or "" for part in llm_response.content.parts or [] if not part.thought
+    )
+    try:
+        record = InvestmentRecord.model_validate_json(text)
+    except ValidationError as e:
+        print(f"⚠️  {callback_context.state.get('stock_query', '')}: scorecard failed "
+              f"validation ({e.error_count()} errors); no record saved")
+        return None
+    dump = record.model_dump()
+    stated = extract_rating(callback_context.state.get(RECOMMENDATION_KEY, ""))
+    stated = _VERDICTS.get(stated, stated)
+    if stated and stated != record.verdict:
+        print(f"⚠️  {callback_context.state.get('stock_query', '')}: scorecard verdict "
+              f"{record.verdict} contradicts the recommendation ({stated}); using {stated}")
+        dump["verdict"] = stated
+        dump["scorecard_verdict"] = record.verdict
+    callback_context.state[RECORD_KEY] = dump
+    return None
+
+
+def create_scorecard_agent(
+    sections: tuple[str, ...] = ALL_SECTIONS, compacted: bool = False
+) -> LlmAgent:
+    """Create the stage that turns the recommendation into an ``InvestmentRecord``."""
+    # The schema is enforced by the model and checked here, so the prose
+    # validation that drives tier escalation doesn't apply
+    return LlmAgent(
+        name="InvestmentScorecard",
+        model=get_tier_model("lite", escalate=False),
+        instruction=scorecard_instruction(sections, compacted),
+        output_schema=InvestmentRecord,
+        after_model_callback=_save_record,
+        include_contents="none",
+    )
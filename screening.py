@@ -0,0 +1,366 @@
+"""Columnar store of analysis records and vectorized screening.
+
+Every ``scorecard.InvestmentRecord`` is flattened into one row (verdict,
+confidence, risk score, one ``score_<section>`` column per registry
+section, key risks, report path) and appended to a Parquet dataset
+partitioned by date (``month=YYYY-MM/part-*.parquet``). Screening reads
+only the columns and months it needs and filters them with Arrow compute
+kernels, so a whole universe screens in milliseconds without touching any
+markdown:
+
+    python -m screening --verdict BUY --max-risk 4 --min-confidence 0.7
+    python -m screening --min-score debt_analysis=4 --since 2026-01-01
+    python -m screening compact            # merge small files per month
+
+Needs ``pyarrow`` (``pip install pyarrow``).
+"""
+import argparse
+import os
+import threading
+import time
+import uuid
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from config import RECORDS_BATCH_SIZE, RECORDS_DIR, RECORDS_ENABLED, RECORDS_FLUSH_INTERVAL
+from registry import ALL_SECTIONS
+
+VERDICTS = ("BUY", "HOLD", "AVOID")
+SCORE_PREFIX = "score_"
+# Hive partition column; one directory per calendar month
+PARTITION = "month"
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError(
+            "The records store requires pyarrow: pip install pyarrow"
+        ) from e
+    return pa, pc, ds, pq
+
+
+def record_schema():
+    """Arrow schema of the records dataset, excluding the ``month`` partition."""
+    pa = _pyarrow()[0]
+    return pa.schema(
+        [
+            ("ticker", pa.string()),
+            ("created_at", pa.timestamp("s", tz="UTC")),
+            ("verdict", pa.string()),
+            ("confidence", pa.float32()),
+            ("risk_score", pa.int8()),
+        ]
+        + [(SCORE_PREFIX + key, pa.int8()) for key in ALL_SECTIONS]
+        + [
+            ("key_risks", pa.list_(pa.string())),
+            ("scorecard_verdict", pa.string()),
+            ("report_path", pa.string()),
+        ]
+    )
+
+
+def flatten_record(
+    ticker: str, record: dict, created_at: float, report_path: Optional[str] = None
+) -> dict:
+    """One dataset row from a validated ``InvestmentRecord`` dump."""
+    row = {
+        "ticker": ticker.strip().upper(),
+        "created_at": datetime.fromtimestamp(created_at, tz=timezone.utc),
+        "verdict": record["verdict"],
+        "confidence": record["confidence"],
+        "risk_score": record["risk_score"],
+        "key_risks": list(record.get("key_risks", [])),
+        # Set only when the scorecard contradicted the report's verdict,
+        # which "verdict" holds instead
+        "scorecard_verdict": record.get("scorecard_verdict"),
+        "report_path": report_path,
+    }
+    for key in ALL_SECTIONS:
+        row[SCORE_PREFIX + key] = None
+    for score in record.get("section_scores", []):
+        row[SCORE_PREFIX + score["section"]] = score["score"]
+    return row
+
+
+class RecordStore:
+    """Append-only, month-partitioned Parquet dataset of analysis records.
+
+    Records are buffered and written as one file per month partition when
+    ``batch_size`` are pending, ``flush_interval`` seconds after the first
+    of them was buffered, or when the store is closed. ``add`` may be
+    called from several threads; a timer thread writes buffers that don't
+    fill up.
+
+    Args:
+        path: Dataset directory.
+        batch_size: Pending records that trigger a write.
+        flush_interval: Longest time in seconds a record stays buffered.
+    """
+
+    def __init__(
+        self,
+        path: str = RECORDS_DIR,
+        batch_size: int = RECORDS_BATCH_SIZE,
+        flush_interval: float = RECORDS_FLUSH_INTERVAL,
+    ):
+        _pyarrow()
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.added = 0
+        self.files = 0
+        self._pending: list[dict] = []
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        # One write at a time, so concurrent flushes don't interleave
+        self._write_lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def add(
+        self,
+        ticker: str,
+        record: dict,
+        report_path: Optional[str] = None,
+        created_at: Optional[float] = None,
+    ) -> None:
+        """Buffer one record for the next write."""
+        row = flatten_record(ticker, record, created_at or time.time(), report_path)
+        with self._lock:
+            self._pending.append(row)
+            self.added += 1
+            full = len(self._pending) >= self.batch_size
+            if not full and self._timer is None:
+                # A daemon, so an unclosed store doesn't keep the process alive
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered records, one new file per month partition."""
+        pa, _, _, pq = _pyarrow()
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            rows, self._pending = self._pending, []
+        if not rows:
+            return
+        by_month: dict[str, list[dict]] = {}
+        for row in rows:
+            by_month.setdefault(f"{row['created_at']:%Y-%m}", []).append(row)
+        schema = record_schema()
+        with self._write_lock:
+            for month, month_rows in sorted(by_month.items()):
+                directory = os.path.join(self.path, f"{PARTITION}={month}")
+                os.makedirs(directory, exist_ok=True)
+                table = pa.Table.from_pylist(month_rows, schema=schema)
+                pq.write_table(table, os.path.join(directory, f"part-{uuid.uuid4().hex}.parquet"))
+                self.files += 1
+
+    def compact(self) -> int:
+        """Merge each month partition's files into one.
+
+        Returns:
+            int: Number of files removed.
+        """
+        _, _, _, pq = _pyarrow()
+        self.flush()
+        removed = 0
+        with self._write_lock:
+            for name in sorted(os.listdir(self.path)):
+                directory = os.path.join(self.path, name)
+                parts = sorted(
+                    os.path.join(directory, part) for part in os.listdir(directory)
+                    if part.endswith(".parquet")
+                ) if name.startswith(f"{PARTITION}=") else []
+                if len(parts) < 2:
+                    continue
+                table = pq.ParquetDataset(parts, schema=record_schema()).read()
+                merged = os.path.join(directory, f"part-{uuid.uuid4().hex}.parquet")
+                pq.write_table(
+                    table.sort_by([("ticker", "ascending"), ("created_at", "ascending")]), merged
+                )
+                for part in parts:
+                    os.remove(part)
+                removed += len(parts) - 1
+        return removed
+
+    def summary(self) -> str:
+        """One-line summary for run reports."""
+        return f"{self.added} records appended to {self.path}/ in {self.files} files"
+
+    def close(self) -> None:
+        """Write any buffered records and stop the flush timer."""
+        self.flush()
+
+
+def open_record_store(path: str = RECORDS_DIR) -> Optional[RecordStore]:
+    """Open the records store if records are enabled and pyarrow is installed."""
+    if not RECORDS_ENABLED:
+        return None
+    try:
+        return RecordStore(path)
+    except ImportError:
+        print("⚠️  pyarrow is not installed; scorecards are not stored for screening")
+        return None
+
+
+def screen(
+    path: str = RECORDS_DIR,
+    verdicts: Optional[list[str]] = None,
+    max_risk: Optional[int] = None,
+    min_confidence: Optional[float] = None,
+    min_scores: Optional[dict[str, int]] = None,
+    since: Optional[date] = None,
+    latest: bool = True,
+    tickers: Optional[list[str]] = None,
+):
+    """Filter the records dataset with vectorized Arrow expressions.
+
+    Only the ticker, timestamp and filtered columns are scanned to find the
+    matches; the remaining columns are then read for the matches alone.
+
+    Args:
+        path: Dataset directory.
+        verdicts: Keep only these verdicts.
+        max_risk: Keep risk scores at or below this.
+        min_confidence: Keep confidence at or above this.
+        min_scores: Minimum score per section output key.
+        since: Ignore records from before this day.
+        latest: Screen only each ticker's most recent record (after
+            ``since``) instead of every record.
+        tickers: Keep only these tickers.
+
+    Returns:
+        pyarrow.Table: Matching records, most confident first.
+    """
+    pa, pc, ds, _ = _pyarrow()
+    schema = record_schema()
+    if not os.path.isdir(path):
+        return schema.empty_table()
+    dataset = ds.dataset(
+        path, format="parquet", schema=schema.append(pa.field(PARTITION, pa.string())),
+        partitioning="hive",
+    )
+    scan_filter = None
+    if since is not None:
+        # ISO months compare like dates, so whole partitions are skipped
+        scan_filter = (ds.field(PARTITION) >= f"{since:%Y-%m}") & (
+            ds.field("created_at") >= datetime.combine(since, datetime.min.time(), timezone.utc)
+        )
+    if tickers:
+        ticker_filter = ds.field("ticker").isin([t.upper() for t in tickers])
+        scan_filter = ticker_filter if scan_filter is None else scan_filter & ticker_filter
+
+    conditions = []
+    if verdicts:
+        conditions.append(("verdict", lambda c: pc.is_in(c, pa.array([v.upper() for v in verdicts]))))
+    if max_risk is not None:
+        conditions.append(("risk_score", lambda c: pc.less_equal(c, max_risk)))
+    if min_confidence is not None:
+        conditions.append(("confidence", lambda c: pc.greater_equal(c, min_confidence)))
+    for key, score in (min_scores or {}).items():
+        conditions.append((SCORE_PREFIX + key, lambda c, score=score: pc.greater_equal(c, score)))
+    columns = ["ticker", "created_at"]
+    columns += sorted({column for column, _ in conditions} - set(columns))
+    table = dataset.to_table(columns=columns, filter=scan_filter)
+
+    if latest and table.num_rows > 1:
+        newest = table.group_by("ticker").aggregate([("created_at", "max")])
+        table = table.join(
+            newest.rename_columns(["ticker", "created_at"]), ["ticker", "created_at"],
+            join_type="inner",
+        )
+    mask = None
+    for column, condition in conditions:
+        matched = condition(table[column])
+        mask = matched if mask is None else pc.and_kleene(mask, matched)
+    if mask is not None:
+        table = table.filter(pc.fill_null(mask, False))
+    if not table.num_rows:
+        return schema.empty_table()
+
+    # A ticker's record is identified by its timestamp
+    def _row_keys(rows):
+        return pc.binary_join_element_wise(
+            rows["ticker"], pc.cast(pc.cast(rows["created_at"], pa.int64()), pa.string()), "|"
+        )
+
+    row_filter = ds.field("ticker").isin(pc.unique(table["ticker"])) & ds.field(
+        "created_at"
+    ).isin(pc.unique(table["created_at"]))
+    rows = dataset.to_table(
+        columns=schema.names,
+        filter=row_filter if scan_filter is None else scan_filter & row_filter,
+    )
+    rows = rows.filter(pc.is_in(_row_keys(rows), _row_keys(table)))
+    return rows.sort_by([("confidence", "descending"), ("ticker", "ascending")])
+
+
+def _parse_min_score(value: str) -> tuple[str, int]:
+    key, _, score = value.partition("=")
+    if key not in ALL_SECTIONS or not score.isdigit():
+        raise argparse.ArgumentTypeError(
+            f"expected <section>=<1-5> with a section from {', '.join(ALL_SECTIONS)}"
+        )
+    return key, int(score)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Screen stored analysis records.")
+    parser.add_argument("command", nargs="?", choices=("screen", "compact"), default="screen")
+    parser.add_argument("--path", default=RECORDS_DIR, help=f"Records dataset (default: {RECORDS_DIR}).")
+    parser.add_argument("--verdict", action="append", type=str.upper, choices=VERDICTS,
+                        help="Keep this verdict; repeat for several.")
+    parser.add_argument("--max-risk", type=int, help="Keep risk scores at or below this (1-10).")
+    parser.add_argument("--min-confidence", type=float, help="Keep confidence at or above this (0-1).")
+    parser.add_argument("--min-score", action="append", type=_parse_min_score, default=[],
+                        metavar="SECTION=N", help="Minimum section score (1-5); repeatable.")
+    parser.add_argument("--ticker", action="append", help="Only these tickers; repeatable.")
+    parser.add_argument("--since", type=date.fromisoformat, help="Only records from this day on.")
+    parser.add_argument("--all-records", action="store_true",
+                        help="Screen every record, not just each ticker's latest.")
+    parser.add_argument("-n", "--limit", type=int, default=25, help="Rows to print (default: 25).")
+    args = parser.parse_args(argv)
+
+    if args.command == "compact":
+        removed = RecordStore(args.path).compact()
+        print(f"🗜️  Removed {removed} small files from {args.path}/")
+        return
+
+    _pyarrow()  # time the screen, not the import
+    started = time.perf_counter()
+    table = screen(
+        args.path,
+        verdicts=args.verdict,
+        max_risk=args.max_risk,
+        min_confidence=args.min_confidence,
+        min_scores=dict(args.min_score),
+        since=args.since,
+        latest=not args.all_records,
+        tickers=args.ticker,
+    )
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"🧮 {table.num_rows} matching records ({elapsed:.1f} ms)")
+    if not table.num_rows:
+        return
+    print(f"  {'Ticker':<10}{'Date':<12}{'Verdict':<9}{'Conf.':>6}{'Risk':>6}  Key risks")
+    for row in table.slice(0, args.limit).to_pylist():
+        # A ⚠️ marks a scorecard that contradicted its report's verdict
+        verdict = row["verdict"] + (" ⚠️" if row["scorecard_verdict"] else "")
+        print(f"  {row['ticker']:<10}{row['created_at']:%Y-%m-%d}  {verdict:<9}"
+              f"{row['confidence']:>5.0%}{row['risk_score']:>6}  "
+              f"{', '.join(row['key_risks'] or [])}")
+    if table.num_rows > args.limit:
+        print(f"  … {table.num_rows - args.limit} more")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""Shared search broker that deduplicates web searches across agents.
+
+The built-in ``google_search`` tool runs inside each model call, so
+overlapping searches from different agents cannot be shared. With
+``SEARCH_MODE=broker`` agents get the ``web_search`` function tool
+instead, and every search goes through one ``SearchBroker``, which:
+
+- normalizes queries, so word order, case and filler words don't matter
+- coalesces identical in-flight searches into one call (singleflight)
+- caches results with a short TTL, per run or across tickers
+
+``SEARCH_MODE=prefetch`` also runs a ``SearchPrefetchAgent`` before the
+research team. It fetches the common result sets (news, financials,
+ratings) once and shares them with the agents through session state.
+Each search the broker runs is one grounded model call.
+"""
+import asyncio
+import functools
+import re
+import time
+from dataclasses import dataclass, field
+from typing import AsyncGenerator, Awaitable, Callable, Optional
+
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.models.llm_request import LlmRequest
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+
+from config import (
+    SEARCH_CACHE_MAX_ENTRIES,
+    SEARCH_CACHE_TTL,
+    SEARCH_SHARE_ACROSS_TICKERS,
+)
+from models import get_tier_model
+from registry import search_state_key
+
+# Common result sets fetched once per run in prefetch mode, keyed by topic.
+# Agents opt in with ``AgentSpec.search_topics``.
+PREFETCH_QUERIES = {
+    "news": "{ticker} stock latest news",
+    "financials": "{ticker} financial summary debt shares outstanding short interest",
+    "ratings": "{ticker} analyst ratings price target technical indicators",
+}
+
+_STOPWORDS = frozenset(
+    {"a", "an", "and", "are", "at", "for", "how", "in", "is", "of", "on", "or",
+     "s", "the", "to", "what", "with"}
+)
+_WORD = re.compile(r"[\w$%.-]+")
+
+
+def normalize_query(query: str) -> str:
+    """Canonical form of a query: lowercase, unique words, sorted, no filler."""
+    words = {word.strip(".-") for word in _WORD.findall(query.lower().replace("'s", ""))}
+    return " ".join(sorted(words - _STOPWORDS - {""}))
+
+
+@dataclass
+class SearchResult:
+    """Summary and sources returned for one search."""
+
+    query: str
+    text: str
+    sources: list[tuple[str, str]] = field(default_factory=list)
+    tokens: int = 0
+    search_tokens: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "summary": self.text,
+            "sources": [{"title": title, "url": url} for title, url in self.sources],
+        }
+
+    def format(self) -> str:
+        sources = "; ".join(f"{title} ({url})" for title, url in self.sources)
+        return f"{self.text}\nSources: {sources}" if sources else self.text
+
+
+async def grounded_search(
+    query: str, agent: str = "SearchBroker", words: int = 200
+) -> SearchResult:
+    """Run one search as a ``google_search``-grounded call on the cheap tier.
+
+    Args:
+        query: What to search for.
+        agent: Name the call is labeled with in traces and usage stats.
+        words: Length limit of the summary.
+    """
+    model = get_tier_model("lite", escalate=False)
+    request = LlmRequest(
+        model=model.model,
+        contents=[types.UserContent(
+            f"Search the web for: {query}\n"
+            f"Summarize the most relevant recent results in under {words} words, "
+            "keeping facts, figures and dates."
+        )],
+        config=types.GenerateContentConfig(
+            tools=[types.Tool(google_search=types.GoogleSearch())],
+            labels={"adk_agent_name": agent},
+        ),
+    )
+    text, sources, tokens, search_tokens = "", [], 0, 0
+    async for response in model.generate_content_async(request):
+        if response.partial:
+            continue
+        if response.content and response.content.parts:
+            text += "".join(part.text or "" for part in response.content.parts)
+        if response.grounding_metadata:
+            sources += [
+                (chunk.web.title, chunk.web.uri)
+                for chunk in response.grounding_metadata.grounding_chunks or []
+                if chunk.web
+            ]
+        if response.usage_metadata:
+            tokens += response.usage_metadata.total_token_count or 0
+            search_tokens += response.usage_metadata.tool_use_prompt_token_count or 0
+    return SearchResult(
+        query=query, text=text.strip(), sources=sources, tokens=tokens,
+        search_tokens=search_tokens,
+    )
+
+
+class SearchBroker:
+    """Deduplicates searches with query normalization, singleflight and a TTL cache.
+
+    Args:
+        backend: Coroutine that runs one search.
+        ttl: Seconds a result stays fresh.
+        max_entries: Maximum cached results; the oldest are evicted first.
+        share_across_runs: Share results between tickers' runs instead of
+            keeping a separate namespace per run.
+    """
+
+    def __init__(
+        self,
+        backend: Callable[[str], Awaitable[SearchResult]] = grounded_search,
+        ttl: float = SEARCH_CACHE_TTL,
+        max_entries: int = SEARCH_CACHE_MAX_ENTRIES,
+        share_across_runs: bool = SEARCH_SHARE_ACROSS_TICKERS,
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.share_across_runs = share_across_runs
+        self._cache: dict[tuple, tuple[float, SearchResult]] = {}
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self.requests = 0
+        self.backend_calls = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+
+    @property
+    def saved(self) -> int:
+        return self.requests - self.backend_calls
+
+    def _key(self, query: str, scope: Optional[str]) -> tuple:
+        return (None if self.share_across_runs else scope, normalize_query(query))
+
+    def _store(self, key: tuple, result: SearchResult) -> None:
+        self._cache.pop(key, None)
+        self._cache[key] = (time.monotonic() + self.ttl, result)
+        while len(self._cache) > self.max_entries:
+            del self._cache[next(iter(self._cache))]
+
+    async def search(self, query: str, scope: Optional[str] = None) -> SearchResult:
+        """Return results for ``query``, running at most one search per key.
+
+        Args:
+            query: The search query.
+            scope: Namespace of the cache entry, usually the run's
+                invocation id; ignored when sharing across runs.
+        """
+        self.requests += 1
+        key = self._key(query, scope)
+
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.cache_hits += 1
+            return entry[1]
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # The search we joined was cancelled; run our own
+                self.requests -= 1
+                self.coalesced -= 1
+                return await self.search(query, scope)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            self.backend_calls += 1
+            result = await self.backend(query)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # waiters re-raise it; avoid "never retrieved" warnings
+            raise
+        finally:
+            del self._inflight[key]
+        future.set_result(result)
+        self._store(key, result)
+        return result
+
+    def summary(self) -> str:
+        return (
+            f"{self.requests} searches requested, {self.backend_calls} run, "
+            f"{self.saved} saved ({self.cache_hits} cached, {self.coalesced} coalesced)"
+        )
+
+
+@functools.lru_cache(maxsize=1)
+def get_search_broker() -> SearchBroker:
+    """The process-wide search broker shared by every agent."""
+    return SearchBroker()
+
+
+async def web_search(query: str, tool_context: ToolContext) -> dict:
+    """Search the web and return a summary of the top results with sources.
+
+    Args:
+        query: What to search for, e.g. "AAPL debt to equity ratio".
+
+    Returns:
+        dict: ``summary`` text and a list of ``sources`` with title and url.
+    """
+    result = await get_search_broker().search(query, scope=tool_context.invocation_id)
+    return result.to_dict()
+
+
+class SearchPrefetchAgent(BaseAgent):
+    """Fetches the shared search result sets once before the research team.
+
+    Results are written to ``search_<topic>`` state keys, which agents that
+    list the topic in ``AgentSpec.search_topics`` see in their instruction.
+    The searches also warm the broker's cache for the rest of the run.
+    """
+
+    topics: tuple[str, ...] = tuple(PREFETCH_QUERIES)
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        ticker = ctx.session.state.get("stock_query", "")
+        broker = get_search_broker()
+        results = await asyncio.gather(
+            *(
+                broker.search(PREFETCH_QUERIES[topic].format(ticker=ticker), ctx.invocation_id)
+                for topic in self.topics
+            ),
+            return_exceptions=True,
+        )
+        state_delta = {}
+        for topic, result in zip(self.topics, results):
+            if isinstance(result, BaseException):
+                print(f"⚠️  Prefetching {topic} search results failed: {result}")
+                continue
+            state_delta[search_state_key(topic)] = (
+                f'Shared search results for "{result.query}" (already fetched; search '
+                f"only for what they don't cover):\n{result.format()}"
+            )
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta=state_delta),
+        )
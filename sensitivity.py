@@ -0,0 +1,395 @@
+"""Rolling rate and market sensitivity computed from the local price store.
+
+The bond agent asks how the 10-year Treasury yield moves a stock. This
+module answers with numbers: the rolling correlation and beta of every
+ticker's daily log returns against daily changes in the yield and against
+a market index's returns. Both factors are ordinary series in the price
+store (see indicators.py): the yield in percent, e.g. FRED's ``DGS10``, and
+an index or ETF such as ``SPY``.
+
+Each window's statistics reduce to six sums per ticker and factor, which
+are saved next to the store. New bars add their terms and subtract those
+that leave the window, so an update costs a few rows rather than a pass
+over the window, and the whole universe is covered by the same vectorized
+step. ``SensitivityPlugin`` gives the results to the bond agent through
+session state.
+
+    python -m sensitivity show AAPL MSFT
+    python -m sensitivity rank --by beta_rates --window 252
+"""
+import argparse
+import os
+import time
+from datetime import date
+from typing import Optional
+
+import numpy as np
+from google.adk.agents import LlmAgent
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.plugins.base_plugin import BasePlugin
+from google.genai import types
+
+from config import (
+    MARKET_TICKER,
+    PRICES_DIR,
+    SENSITIVITY_ENABLED,
+    SENSITIVITY_MAX_AGE_DAYS,
+    SENSITIVITY_WINDOWS,
+    YIELD_TICKER,
+)
+from fundamentals import FIGURES_SUFFIX
+from indicators import MIN_COVERAGE, YEAR_BARS, PriceStore
+
+# Factors in the order of the state's factor axis
+FACTORS = ("rates", "market")
+
+# Running sums per window, factor and ticker, in the order of the state's sum axis
+_SUMS = ("n", "x", "y", "xy", "xx", "yy")
+
+STATE_FILE = "sensitivity.npz"
+
+# Section the statistics are given to
+BOND_KEY = "bond_correlation"
+
+
+def _changes(values: np.ndarray, factor: Optional[str] = None) -> np.ndarray:
+    """Daily changes of consecutive rows: yield differences in points, else log returns."""
+    values = np.asarray(values, dtype=np.float64)
+    if factor == "rates":
+        return values[1:] - values[:-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.log(values[1:] / values[:-1])
+    return np.where(np.isfinite(returns), returns, np.nan)
+
+
+def window_sums(returns: np.ndarray, factors: np.ndarray) -> np.ndarray:
+    """Sum the regression terms of a block of rows.
+
+    Only days where both the ticker and the factor have a change count.
+
+    Args:
+        returns: ``(rows, tickers)`` daily log returns.
+        factors: ``(rows, factors)`` daily factor changes.
+
+    Returns:
+        np.ndarray: ``(len(_SUMS), factors, tickers)`` sums.
+    """
+    valid = ~np.isnan(returns)[:, None, :] & ~np.isnan(factors)[:, :, None]
+    x = np.where(valid, returns[:, None, :], 0.0)
+    y = np.where(valid, factors[:, :, None], 0.0)
+    return np.stack([
+        valid.sum(axis=0, dtype=np.float64),
+        x.sum(axis=0),
+        y.sum(axis=0),
+        (x * y).sum(axis=0),
+        (x * x).sum(axis=0),
+        (y * y).sum(axis=0),
+    ])
+
+
+def _period(bars: int) -> str:
+    labels = {21: "1 month", 63: "3 months", 126: "6 months", YEAR_BARS: "1 year"}
+    return labels.get(bars, f"{bars} days")
+
+
+class SensitivityEngine:
+    """Rolling correlation and beta against the yield and the market.
+
+    The running sums are loaded from the price store, brought up to its
+    last bar and saved. Statistics are then computed once for the whole
+    universe and reused for every lookup.
+
+    Args:
+        prices: The price store holding the tickers and both factors.
+        rates: Ticker of the 10-year yield series, in percent.
+        market: Ticker of the market index.
+        windows: Window lengths in trading days.
+
+    Raises:
+        ValueError: If a factor series is not in the store.
+    """
+
+    def __init__(
+        self,
+        prices: PriceStore,
+        rates: str = YIELD_TICKER,
+        market: str = MARKET_TICKER,
+        windows: tuple[int, ...] = SENSITIVITY_WINDOWS,
+    ):
+        self.prices = prices
+        self.factor_tickers = (rates.strip().upper(), market.strip().upper())
+        missing = [t for t in self.factor_tickers if t not in prices]
+        if missing:
+            raise ValueError(f"Factor series not in the price store: {', '.join(missing)}")
+        self.factor_index = [prices.index_of(t) for t in self.factor_tickers]
+        self.windows = tuple(sorted(set(windows)))
+        self._state: Optional[dict[str, np.ndarray]] = None
+        self._metrics: Optional[dict[str, np.ndarray]] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _block(self, start: int, end: int) -> np.ndarray:
+        """Regression sums of the changes into rows ``start`` to ``end``."""
+        start = max(start, 1)
+        if end <= start:
+            return np.zeros((len(_SUMS), len(FACTORS), len(self.prices)))
+        close = np.asarray(self.prices.columns["close"][start - 1:end])
+        factors = np.column_stack([
+            _changes(close[:, i], factor) for factor, i in zip(FACTORS, self.factor_index)
+        ])
+        return window_sums(_changes(close), factors)
+
+    def _load_state(self) -> dict[str, np.ndarray]:
+        state_path = os.path.join(self.prices.path, STATE_FILE)
+        if os.path.exists(state_path):
+            with np.load(state_path) as saved:
+                state = {name: saved[name].copy() for name in saved.files}
+            if (
+                tuple(state["windows"]) == self.windows
+                and tuple(state["factors"]) == self.factor_tickers
+                and state["sums"].shape[-1] == len(self.prices)
+                and int(state["bars"]) <= self.prices.bars
+            ):
+                return state
+        return {
+            "bars": np.zeros((), dtype=np.int64),
+            "windows": np.array(self.windows),
+            "factors": np.array(self.factor_tickers),
+            "sums": np.zeros((len(self.windows), len(_SUMS), len(FACTORS), len(self.prices))),
+        }
+
+    def state(self) -> dict[str, np.ndarray]:
+        """Running sums brought up to the store's last bar and saved.
+
+        Each window covers the changes into its last ``window`` rows. When
+        bars arrive, their terms are added and the terms that left the
+        window are subtracted. A window is summed from scratch when the
+        state is new or more than a window behind.
+        """
+        if self._state is None:
+            self._state = self._load_state()
+        state = self._state
+        done, bars = int(state["bars"]), self.prices.bars
+        if done < bars:
+            added = None
+            for i, window in enumerate(self.windows):
+                if done == 0 or bars - done >= window:
+                    state["sums"][i] = self._block(bars - window, bars)
+                    continue
+                if added is None:
+                    added = self._block(done, bars)
+                state["sums"][i] += added - self._block(done - window, bars - window)
+            state["bars"] = np.asarray(bars, dtype=np.int64)
+            tmp_path = os.path.join(self.prices.path, "sensitivity.tmp.npz")
+            np.savez(tmp_path, **state)
+            os.replace(tmp_path, os.path.join(self.prices.path, STATE_FILE))
+            self._metrics = None
+        return state
+
+    def metrics(self) -> dict[str, np.ndarray]:
+        """Correlation and beta of every ticker, computed on first use.
+
+        Returns:
+            dict[str, np.ndarray]: ``corr_<factor>_<window>`` and
+            ``beta_<factor>_<window>`` arrays indexed like the store's
+            tickers. Yield betas are the log return per one-point rise in
+            the yield. Windows with too few shared days are NaN.
+        """
+        sums = self.state()["sums"]
+        if self._metrics is not None:
+            return self._metrics
+        n, sx, sy, sxy, sxx, syy = (sums[:, i] for i in range(len(_SUMS)))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = (sxy - sx * sy / n) / (n - 1)
+            var_x = (sxx - sx * sx / n) / (n - 1)
+            var_y = (syy - sy * sy / n) / (n - 1)
+            enough = n >= MIN_COVERAGE * np.array(self.windows)[:, None, None]
+            beta = np.where(enough & (var_y > 0), cov / var_y, np.nan)
+            corr = np.where(
+                enough & (var_x > 0) & (var_y > 0), cov / np.sqrt(var_x * var_y), np.nan
+            )
+        metrics = {}
+        for w, window in enumerate(self.windows):
+            for f, factor in enumerate(FACTORS):
+                metrics[f"corr_{factor}_{window}"] = np.clip(corr[w, f], -1.0, 1.0)
+                metrics[f"beta_{factor}_{window}"] = beta[w, f]
+        self._metrics = metrics
+        return metrics
+
+    def yield_level(self) -> tuple[Optional[float], Optional[float]]:
+        """Latest 10-year yield and its change over the past year, in points."""
+        series = np.asarray(
+            self.prices.columns["close"][-(YEAR_BARS + 1):, self.factor_index[0]],
+            dtype=np.float64,
+        )
+        valid = series[~np.isnan(series)]
+        if not len(valid):
+            return None, None
+        change = float(valid[-1] - series[0]) if not np.isnan(series[0]) else None
+        return float(valid[-1]), change
+
+    def lookup(self, ticker: str) -> Optional[dict]:
+        """Return the statistics of one ticker, or ``None`` if it has none.
+
+        Args:
+            ticker: The ticker symbol (case-insensitive).
+
+        Returns:
+            Optional[dict]: Metric name to value, plus ``as_of`` (the
+            ``date`` of the ticker's latest bar), ``yield`` and
+            ``yield_change_1y``. Missing numbers are ``None``.
+        """
+        i = self.prices.index_of(ticker)
+        metrics = self.metrics() if i is not None else None
+        if metrics is None or all(np.isnan(values[i]) for values in metrics.values()):
+            self.misses += 1
+            return None
+        self.hits += 1
+        last_bar = self.prices.state()["last_bar"][i]
+        level, change = self.yield_level()
+        row = {
+            "as_of": self.prices.dates[last_bar].astype(date),
+            "yield": level,
+            "yield_change_1y": change,
+        }
+        for name, values in metrics.items():
+            row[name] = None if np.isnan(values[i]) else float(values[i])
+        return row
+
+    def summary(self) -> str:
+        rates, market = self.factor_tickers
+        return (
+            f"{len(self.prices)} tickers against {rates} and {market} over "
+            f"{', '.join(map(str, self.windows))} days, "
+            f"{self.hits} lookups found, {self.misses} missing"
+        )
+
+
+def open_sensitivity(prices: Optional[PriceStore]) -> Optional[SensitivityEngine]:
+    """The sensitivity engine, if enabled and both factors are in the price store."""
+    if not SENSITIVITY_ENABLED or prices is None:
+        return None
+    try:
+        return SensitivityEngine(prices)
+    except ValueError as e:
+        print(f"⚠️  Rate sensitivity disabled: {e}")
+        return None
+
+
+def _series(values: dict, name: str, fmt) -> Optional[str]:
+    parts = [
+        f"{fmt(values[key])} over {_period(window)}"
+        for window, key in sorted(
+            (int(k.rsplit("_", 1)[1]), k) for k in values if k.startswith(f"{name}_")
+        )
+        if values[key] is not None
+    ]
+    return ", ".join(parts) or None
+
+
+def format_sensitivity(values: dict, rates: str = YIELD_TICKER, market: str = MARKET_TICKER) -> str:
+    """Format one ticker's statistics for the bond agent.
+
+    Returns an empty string when none of the rate statistics are known.
+    """
+    rate_corr = _series(values, "corr_rates", "{:+.2f}".format)
+    rate_beta = _series(values, "beta_rates", "{:+.1%}".format)
+    if rate_corr is None:
+        return ""
+    lines = []
+    if values["yield"] is not None:
+        change = (
+            f" ({values['yield_change_1y']:+.2f} points over 1 year)"
+            if values["yield_change_1y"] is not None else ""
+        )
+        lines.append(f"- 10-year Treasury yield ({rates}): {values['yield']:.2f}%{change}")
+    lines.append(f"- Correlation of daily returns with yield changes: {rate_corr}")
+    if rate_beta:
+        lines.append(f"- Yield beta (stock return per 1-point rise in the yield): {rate_beta}")
+    market_corr = _series(values, "corr_market", "{:+.2f}".format)
+    market_beta = _series(values, "beta_market", "{:.2f}".format)
+    if market_corr:
+        lines.append(f"- Correlation with the market ({market}): {market_corr}")
+    if market_beta:
+        lines.append(f"- Market beta: {market_beta}")
+    return (
+        f"Use these statistics computed from local daily prices (last bar "
+        f"{values['as_of']}) instead of searching for them:\n" + "\n".join(lines)
+    )
+
+
+class SensitivityPlugin(BasePlugin):
+    """Gives the bond agent the ticker's rate and market sensitivity.
+
+    The statistics are written to session state under
+    ``bond_correlation_figures``, which the agent's instruction includes.
+    Tickers whose latest bar is older than ``max_age_days`` get nothing, so
+    the agent researches them as before.
+    """
+
+    def __init__(self, engine: SensitivityEngine, max_age_days: int = SENSITIVITY_MAX_AGE_DAYS):
+        super().__init__(name="sensitivity")
+        self.engine = engine
+        self.max_age_days = max_age_days
+
+    async def before_agent_callback(
+        self, *, agent: BaseAgent, callback_context: CallbackContext
+    ) -> Optional[types.Content]:
+        if not isinstance(agent, LlmAgent) or agent.output_key != BOND_KEY:
+            return None
+        ticker = callback_context.state.get("stock_query")
+        values = self.engine.lookup(ticker) if ticker else None
+        if values is None or (date.today() - values["as_of"]).days > self.max_age_days:
+            return None
+        figures = format_sensitivity(values, *self.engine.factor_tickers)
+        if figures:
+            callback_context.state[BOND_KEY + FIGURES_SUFFIX] = figures
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Rate and market sensitivity from the local price store."
+    )
+    parser.add_argument("--store", default=PRICES_DIR,
+                        help=f"Price store directory (default: {PRICES_DIR}).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    show = commands.add_parser("show", help="Print the statistics of one or more tickers.")
+    show.add_argument("tickers", nargs="+")
+    rank = commands.add_parser("rank", help="List the tickers with the highest values.")
+    rank.add_argument("--by", choices=("beta_rates", "corr_rates", "beta_market", "corr_market"),
+                      default="beta_rates")
+    rank.add_argument("--window", type=int, default=max(SENSITIVITY_WINDOWS))
+    rank.add_argument("--ascending", action="store_true", help="Lowest values first.")
+    rank.add_argument("-n", "--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    engine = SensitivityEngine(PriceStore(args.store))
+    if args.command == "show":
+        for ticker in args.tickers:
+            values = engine.lookup(ticker)
+            if values is None:
+                print(f"❌ {ticker.upper()}: not in the store or too few bars")
+                continue
+            print(f"\n📉 {ticker.upper()}")
+            print(format_sensitivity(values, *engine.factor_tickers) or "No rate statistics.")
+        return
+
+    started = time.perf_counter()
+    name = f"{args.by}_{args.window}"
+    metrics = engine.metrics()
+    if name not in metrics:
+        parser.error(f"--window must be one of {', '.join(map(str, engine.windows))}")
+    values = metrics[name]
+    order = np.argsort(values if args.ascending else -values)  # NaN sorts last
+    order = order[~np.isnan(values[order]) & ~np.isin(order, engine.factor_index)][:args.limit]
+    elapsed = time.perf_counter() - started
+    for i in order:
+        print(f"{str(engine.prices.tickers[i]):<8} {values[i]:+.3f}")
+    print(f"🔎 {len(order)} of {np.isfinite(values).sum()} tickers by {name} "
+          f"({elapsed * 1000:.0f}ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+"""Long-lived HTTP analysis service with request coalescing.
+
+The CLI pays for imports, configuration and workflow construction on every
+invocation. The service does that once and keeps the workflow, model
+clients, rate limiter and caches warm for every job:
+
+- ``POST /analyses`` queues a job; a ticker (and section selection) that is
+  already queued or running joins that job instead of starting another run
+- the queue is bounded; when it is full new jobs get ``429`` with a
+  ``Retry-After`` header so clients back off
+- ``GET /analyses/{id}/events`` streams each section as server-sent events
+  as soon as it is written, then a final ``done`` or ``error`` event
+
+Run it with ``python -m service``.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from google.adk.runners import Runner
+from pydantic import BaseModel
+
+from archive import ReportArchive
+from batch import analyze_ticker, create_runner, percentile
+from cache import SectionCache
+from checkpoint import CheckpointStore
+from config import (
+    ARCHIVE_ENABLED,
+    CACHE_ENABLED,
+    CHECKPOINT_ENABLED,
+    MACRO_ENABLED,
+    SERVICE_CONCURRENCY,
+    SERVICE_HOST,
+    SERVICE_JOB_HISTORY,
+    SERVICE_PORT,
+    SERVICE_QUEUE_SIZE,
+)
+from fundamentals import open_store
+from indicators import open_price_store
+from macro import MacroContext
+from registry import resolve_sections
+from report import RECOMMENDATION_KEY, RECORD_KEY, SECTION_TITLES
+from screening import RecordStore, open_record_store
+from sensitivity import open_sensitivity
+from workflow import get_research_workflow
+
+# Events that end a job's stream
+TERMINAL_EVENTS = ("done", "error")
+
+
+class AnalysisRequest(BaseModel):
+    """Body of ``POST /analyses``."""
+
+    ticker: str
+    sections: Optional[list[str]] = None
+    profile: Optional[str] = None
+
+
+@dataclass
+class Job:
+    """One analysis run and everyone waiting for its events."""
+
+    id: str
+    ticker: str
+    sections: tuple[str, ...]
+    status: str = "queued"  # queued, running, done or failed
+    submitted_at: float = field(default_factory=time.perf_counter)
+    finished_at: Optional[float] = None
+    subscribers: int = 1  # Requests coalesced into this job
+    events: list[dict] = field(default_factory=list)
+    result: Optional[dict] = None
+    _listeners: list[asyncio.Queue] = field(default_factory=list, repr=False)
+
+    @property
+    def key(self) -> tuple[str, tuple[str, ...]]:
+        return self.ticker, self.sections
+
+    def publish(self, event: dict) -> None:
+        self.events.append(event)
+        for listener in self._listeners:
+            listener.put_nowait(event)
+
+    async def stream(self) -> AsyncIterator[dict]:
+        """Every event of the job so far, then new ones until it ends."""
+        # Events published while the history is replayed land in the listener
+        history, listener = list(self.events), asyncio.Queue()
+        self._listeners.append(listener)
+        try:
+            for event in history:
+                yield event
+                if event["type"] in TERMINAL_EVENTS:
+                    return
+            while True:
+                event = await listener.get()
+                yield event
+                if event["type"] in TERMINAL_EVENTS:
+                    return
+        finally:
+            self._listeners.remove(listener)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "ticker": self.ticker,
+            "sections": list(self.sections),
+            "status": self.status,
+            "subscribers": self.subscribers,
+            "events": len(self.events),
+            "latency": (
+                round(self.finished_at - self.submitted_at, 3)
+                if self.finished_at is not None else None
+            ),
+            "result": self.result,
+        }
+
+
+class QueueFull(Exception):
+    """The job queue has no room for another job."""
+
+
+class AnalysisService:
+    """Warm runners, a bounded job queue and coalescing of duplicate jobs.
+
+    Args:
+        concurrency: Jobs analyzed at the same time.
+        queue_size: Jobs that may wait for a worker; more are rejected.
+        history: Finished jobs kept for status lookups.
+        cache: Optional section cache shared by every job.
+        checkpoints: Optional checkpoint store shared by every job.
+        archive: Optional archive every finished report is indexed in.
+        records: Optional store every job's scorecard is appended to.
+        macro: Optional macro context shared by every job and refreshed
+            when it expires.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = SERVICE_CONCURRENCY,
+        queue_size: int = SERVICE_QUEUE_SIZE,
+        history: int = SERVICE_JOB_HISTORY,
+        cache: Optional[SectionCache] = None,
+        checkpoints: Optional[CheckpointStore] = None,
+        archive: Optional[ReportArchive] = None,
+        records: Optional[RecordStore] = None,
+        macro: Optional[MacroContext] = None,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.history = history
+        self.cache = cache
+        self.checkpoints = checkpoints
+        self.archive = archive
+        self.records = records
+        self.macro = macro
+        self.fundamentals = open_store()
+        self.prices = open_price_store()
+        self.sensitivity = open_sensitivity(self.prices)
+        self.jobs: OrderedDict[str, Job] = OrderedDict()
+        self.submitted = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self._queue: asyncio.Queue[Job] = asyncio.Queue(maxsize=max(1, queue_size))
+        self._active: dict[tuple, Job] = {}
+        self._runners: dict[tuple[str, ...], Runner] = {}
+        self._workers: list[asyncio.Task] = []
+
+    def runner(self, sections: tuple[str, ...]) -> Runner:
+        """The warm runner for a section selection."""
+        if sections not in self._runners:
+            self._runners[sections] = create_runner(
+                self.cache,
+                fundamentals=self.fundamentals,
+                sections=sections,
+                checkpoints=self.checkpoints,
+                prices=self.prices,
+                sensitivity=self.sensitivity,
+            )
+        return self._runners[sections]
+
+    def start(self) -> None:
+        """Build the default workflow and start the workers."""
+        self.runner(resolve_sections())
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        if self.checkpoints is not None:
+            self.checkpoints.close()
+        if self.archive is not None:
+            self.archive.close()
+        if self.records is not None:
+            self.records.close()
+
+    def submit(self, ticker: str, sections: tuple[str, ...]) -> tuple[Job, bool]:
+        """Queue an analysis, or join the one already queued or running.
+
+        Returns:
+            tuple[Job, bool]: The job and whether it was coalesced.
+
+        Raises:
+            QueueFull: If a new job is needed and the queue is full.
+        """
+        ticker = ticker.strip().upper()
+        self.submitted += 1
+        job = self._active.get((ticker, sections))
+        if job is not None:
+            job.subscribers += 1
+            self.coalesced += 1
+            return job, True
+        job = Job(id=uuid.uuid4().hex[:12], ticker=ticker, sections=sections)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFull from None
+        self._active[job.key] = job
+        self.jobs[job.id] = job
+        while len(self.jobs) > self.history:
+            oldest = next(iter(self.jobs.values()))
+            if oldest.status in ("queued", "running"):
+                break
+            self.jobs.popitem(last=False)
+        job.publish({"type": "queued", "job_id": job.id, "ticker": ticker})
+        return job, False
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        job.status = "running"
+        job.publish({"type": "started", "job_id": job.id})
+
+        def on_section(key: str, text: str) -> None:
+            job.publish({
+                "type": "recommendation" if key == RECOMMENDATION_KEY else "section",
+                "key": key,
+                "title": SECTION_TITLES.get(key, "Investment Recommendation"),
+                "text": text,
+            })
+
+        try:
+            shared_state = None
+            if self.macro is not None:
+                await self.macro.prepare([job.ticker])
+                shared_state = self.macro.state_for(job.ticker, job.sections)
+            result = await analyze_ticker(
+                job.ticker, self.runner(job.sections), on_section=on_section,
+                archive=self.archive, records=self.records, shared_state=shared_state,
+            )
+        finally:
+            # New requests for the ticker start a fresh run from here on
+            self._active.pop(job.key, None)
+        job.finished_at = time.perf_counter()
+        if result.ok:
+            job.status = "done"
+            job.result = {
+                "report_path": result.report_path,
+                "latency": round(result.latency, 3),
+                "recommendation": (result.state or {}).get(RECOMMENDATION_KEY),
+                "record": (result.state or {}).get(RECORD_KEY),
+            }
+            job.publish({"type": "done", **job.result})
+        else:
+            job.status = "failed"
+            job.result = {"error": result.error}
+            job.publish({"type": "error", "error": result.error})
+
+    def stats(self) -> dict:
+        latencies = [
+            job.finished_at - job.submitted_at for job in self.jobs.values()
+            if job.finished_at is not None
+        ]
+        return {
+            "queued": self._queue.qsize(),
+            "running": sum(1 for job in self._active.values() if job.status == "running"),
+            "queue_size": self._queue.maxsize,
+            "concurrency": self.concurrency,
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "latency_p50": round(percentile(latencies, 50), 3),
+            "latency_p95": round(percentile(latencies, 95), 3),
+            "macro": self.macro.summary() if self.macro is not None else None,
+        }
+
+
+def _sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+def create_app(service: Optional[AnalysisService] = None) -> FastAPI:
+    """Build the HTTP app around an ``AnalysisService``.
+
+    Args:
+        service: Service to expose; by default one is created at startup
+            with the configured cache, checkpoint store, archive, records
+            store and macro context.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        app.state.service = service or AnalysisService(
+            cache=SectionCache() if CACHE_ENABLED else None,
+            checkpoints=CheckpointStore() if CHECKPOINT_ENABLED else None,
+            archive=ReportArchive() if ARCHIVE_ENABLED else None,
+            records=open_record_store(),
+            macro=MacroContext() if MACRO_ENABLED else None,
+        )
+        app.state.service.start()
+        try:
+            yield
+        finally:
+            await app.state.service.stop()
+
+    app = FastAPI(title="Investment Analysis Service", lifespan=lifespan)
+
+    def _job(job_id: str) -> Job:
+        job = app.state.service.jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+        return job
+
+    @app.post("/analyses", status_code=202)
+    async def submit(request: AnalysisRequest) -> dict:
+        try:
+            sections = resolve_sections(request.sections, request.profile)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        try:
+            job, coalesced = app.state.service.submit(request.ticker, sections)
+        except QueueFull:
+            raise HTTPException(
+                status_code=429,
+                detail="Analysis queue is full; retry later.",
+                headers={"Retry-After": "5"},
+            )
+        return {"job_id": job.id, "status": job.status, "coalesced": coalesced}
+
+    @app.get("/analyses/{job_id}")
+    async def status(job_id: str) -> dict:
+        return _job(job_id).to_dict()
+
+    @app.get("/analyses/{job_id}/events")
+    async def events(job_id: str) -> StreamingResponse:
+        job = _job(job_id)
+
+        async def _stream():
+            async for event in job.stream():
+                yield _sse(event)
+
+        return StreamingResponse(_stream(), media_type="text/event-stream")
+
+    @app.get("/health")
+    async def health() -> dict:
+        return {"status": "ok", **app.state.service.stats()}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the investment analysis service.")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    # Warm the workflow before accepting requests
+    get_research_workflow()
+    print(f"🌐 Analysis service on http://{args.host}:{args.port}")
+    uvicorn.run(create_app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
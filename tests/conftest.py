@@ -0,0 +1,20 @@
+"""Shared setup: keep every file a test run writes out of the working tree."""
+import os
+import sys
+import tempfile
+
+# config reads the environment on import, so this has to come first
+_scratch = tempfile.mkdtemp(prefix="investing-tests-")
+os.environ.update({
+    "ANALYSIS_DIR": os.path.join(_scratch, "analysis"),
+    "CACHE_PATH": os.path.join(_scratch, "cache.sqlite3"),
+    "CHECKPOINT_PATH": os.path.join(_scratch, "checkpoints.sqlite3"),
+    "ARCHIVE_PATH": os.path.join(_scratch, "archive.sqlite3"),
+    "RECORDS_DIR": os.path.join(_scratch, "records"),
+    "FUNDAMENTALS_DIR": os.path.join(_scratch, "fundamentals"),
+    "PRICES_DIR": os.path.join(_scratch, "prices"),
+    "RESEARCH_SCHEDULE": "auto",
+    "HEDGING": "0",
+})
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,29 @@
+from compaction import allocate_budget
+
+
+def test_sections_within_budget_keep_their_size():
+    sizes = {"a": 100, "b": 200, "c": 300}
+    assert allocate_budget(sizes, 1000) == sizes
+
+
+def test_small_sections_leave_their_share_to_large_ones():
+    allocation = allocate_budget({"a": 100, "b": 500, "c": 900}, 1000)
+    assert allocation == {"a": 100, "b": 450, "c": 450}
+
+
+def test_equal_shares_when_every_section_is_large():
+    allocation = allocate_budget({"a": 800, "b": 900, "c": 1000}, 600)
+    assert allocation == {"a": 200, "b": 200, "c": 200}
+
+
+def test_allocation_never_exceeds_budget():
+    sizes = {f"s{i}": 37 * i + 11 for i in range(12)}
+    for budget in (0, 50, 500, 2000, 5000):
+        allocation = allocate_budget(sizes, budget)
+        assert allocation.keys() == sizes.keys()
+        assert sum(allocation.values()) <= budget or allocation == sizes
+        assert all(allocation[key] <= sizes[key] for key in sizes)
+
+
+def test_no_sections():
+    assert allocate_budget({}, 1000) == {}
@@ -0,0 +1,113 @@
+import math
+
+import numpy as np
+import pytest
+
+from indicators import (
+    ATR_PERIOD,
+    MACD_FAST,
+    MACD_SIGNAL,
+    MACD_SLOW,
+    MONTH_BARS,
+    RSI_PERIOD,
+    WINDOW,
+    YEAR_BARS,
+    advance,
+    compute_indicators,
+    new_state,
+)
+
+BARS = 300
+
+
+def _ewm(values, alpha):
+    """Exponential average seeded with the first value, like ``ewm(adjust=False)``."""
+    average = None
+    for value in values:
+        average = value if average is None else average + alpha * (value - average)
+    return average
+
+
+@pytest.fixture(scope="module")
+def bars():
+    rng = np.random.default_rng(7)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (BARS, 2)), axis=0))
+    high = close * (1 + rng.uniform(0, 0.02, close.shape))
+    low = close * (1 - rng.uniform(0, 0.02, close.shape))
+    # The second ticker listed ten bars ago
+    for values in (high, low, close):
+        values[:-10, 1] = np.nan
+    return high, low, close
+
+
+def _indicators(high, low, close, chunks=(BARS,)):
+    state = new_state(close.shape[1])
+    start = 0
+    for end in np.cumsum(chunks):
+        advance(state, high[start:end], low[start:end], close[start:end])
+        start = end
+    return compute_indicators(state, high[-WINDOW:], low[-WINDOW:], close[-WINDOW:])
+
+
+def test_matches_reference_computations(bars):
+    high, low, close = bars
+    result = _indicators(high, low, close)
+    h, l, c = high[:, 0], low[:, 0], close[:, 0]
+
+    assert result["close"][0] == c[-1]
+    assert result["last_bar"][0] == BARS - 1
+    assert result["change_1m"][0] == pytest.approx(c[-1] / c[-1 - MONTH_BARS] - 1)
+    for period in (20, 50, 200):
+        assert result[f"sma_{period}"][0] == pytest.approx(c[-period:].mean())
+    assert result["high_52w"][0] == h[-YEAR_BARS:].max()
+    assert result["low_52w"][0] == l[-YEAR_BARS:].min()
+
+    mean, std = c[-20:].mean(), c[-20:].std()
+    assert result["bollinger_upper"][0] == pytest.approx(mean + 2 * std)
+    assert result["bollinger_lower"][0] == pytest.approx(mean - 2 * std)
+
+    changes = np.diff(c)
+    gain = _ewm(np.maximum(changes, 0), 1 / RSI_PERIOD)
+    loss = _ewm(np.maximum(-changes, 0), 1 / RSI_PERIOD)
+    assert result["rsi"][0] == pytest.approx(100 - 100 / (1 + gain / loss))
+
+    fast = [_ewm(c[:i + 1], 2 / (MACD_FAST + 1)) for i in range(BARS)]
+    slow = [_ewm(c[:i + 1], 2 / (MACD_SLOW + 1)) for i in range(BARS)]
+    macd = np.subtract(fast, slow)
+    signal = _ewm(macd, 2 / (MACD_SIGNAL + 1))
+    assert result["macd"][0] == pytest.approx(macd[-1])
+    assert result["macd_signal"][0] == pytest.approx(signal)
+    assert result["macd_hist"][0] == pytest.approx(macd[-1] - signal)
+
+    true_range = [h[0] - l[0]] + [
+        max(h[i] - l[i], abs(h[i] - c[i - 1]), abs(l[i] - c[i - 1])) for i in range(1, BARS)
+    ]
+    atr = _ewm(true_range, 1 / ATR_PERIOD)
+    assert result["atr"][0] == pytest.approx(atr)
+    assert result["atr_pct"][0] == pytest.approx(atr / c[-1])
+
+
+def test_short_history_leaves_slow_indicators_empty(bars):
+    high, low, close = bars
+    result = _indicators(high, low, close)
+    assert result["close"][1] == close[-1, 1]
+    assert result["high_52w"][1] == np.nanmax(high[:, 1])
+    for name in ("rsi", "macd", "macd_signal", "atr", "sma_20", "sma_200", "change_1m"):
+        assert math.isnan(result[name][1]), name
+
+
+def test_advancing_in_steps_matches_one_pass(bars):
+    high, low, close = bars
+    whole = _indicators(high, low, close)
+    stepped = _indicators(high, low, close, chunks=(120, 1, 150, 29))
+    for name, values in whole.items():
+        np.testing.assert_allclose(stepped[name], values, equal_nan=True, err_msg=name)
+
+
+def test_gap_keeps_the_last_bar(bars):
+    high, low, close = (values.copy() for values in bars)
+    for values in (high, low, close):
+        values[-1, 0] = np.nan
+    result = _indicators(high, low, close)
+    assert result["last_bar"][0] == BARS - 2
+    assert result["close"][0] == close[-2, 0]
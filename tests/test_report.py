@@ -0,0 +1,25 @@
+import pytest
+
+from report import extract_rating
+
+
+@pytest.mark.parametrize("text, rating", [
+    ("Recommendation: BUY\n\nStrong cloud growth.", "BUY"),
+    ("**Recommendation:** hold - valuation is stretched", "HOLD"),
+    ("## Recommendation\n\nAVOID", "AVOID"),
+    ("Recommendation: Strong Buy", "STRONG BUY"),
+    ("Recommendation: STRONG SELL", "STRONG SELL"),
+    ("Recommendation: sell", "SELL"),
+])
+def test_extract_rating(text, rating):
+    assert extract_rating(text) == rating
+
+
+def test_first_stated_recommendation_counts():
+    text = "Recommendation: HOLD\n\nA later recommendation: BUY would need a lower price."
+    assert extract_rating(text) == "HOLD"
+
+
+@pytest.mark.parametrize("text", ["", None, "We like the buyback and would hold.", "Buy now!"])
+def test_no_rating(text):
+    assert extract_rating(text) is None
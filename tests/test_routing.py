@@ -0,0 +1,51 @@
+import pytest
+
+from config import VALIDATION_MIN_WORDS
+from routing import validate_output
+
+ANSWER = (
+    "Microsoft reported revenue growth of 5% year over year, driven by cloud demand, "
+    "steady operating margins and a growing backlog of enterprise contracts across "
+    "its main segments."
+)
+
+
+def test_good_answer_passes():
+    assert validate_output(ANSWER, "MSFT", requires_figures=True) is None
+
+
+@pytest.mark.parametrize("text", ["", "   \n "])
+def test_empty(text):
+    assert validate_output(text, "MSFT") == "empty"
+
+
+def test_too_short():
+    text = " ".join(["word"] * (VALIDATION_MIN_WORDS - 1))
+    assert validate_output(text, "MSFT") == "too short"
+    assert validate_output(text + " word", "MSFT") is None
+
+
+@pytest.mark.parametrize("opening", [
+    "I cannot access real-time data",
+    "I was unable to verify the filings",
+    "No relevant information was found",
+    "Unable to find recent coverage",
+])
+def test_refusal(opening):
+    assert validate_output(f"{opening}. {ANSWER}", "MSFT") == "refusal"
+
+
+def test_company_name_must_be_mentioned():
+    assert validate_output(ANSWER, "Microsoft Corporation") is None
+    assert validate_output(ANSWER.replace("Microsoft", "Apple"), "Microsoft Corp") == "off-topic"
+
+
+@pytest.mark.parametrize("ticker", ["AAPL", "BRK.B", "RDS-A"])
+def test_tickers_need_not_be_mentioned(ticker):
+    assert validate_output(ANSWER, ticker) is None
+
+
+def test_no_figures():
+    text = ANSWER.replace("5%", "a few percent")
+    assert validate_output(text, "MSFT") is None
+    assert validate_output(text, "MSFT", requires_figures=True) == "no figures"
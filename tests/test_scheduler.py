@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+import workflow
+from batch import analyze_ticker, create_runner
+from fake_llm import FakeBackendConfig
+from models import use_backend
+from registry import AGENT_SPECS, SCREENS
+from report import GATE_KEY, RECOMMENDATION_KEY, RECORD_KEY, extract_rating
+from scheduler import gate_reason
+
+
+@pytest.mark.parametrize("text, reason", [
+    ("Clean record.\nHard AVOID: no", None),
+    ("Sanctions exposure.\nHard AVOID: yes - sanctioned subsidiary", "sanctioned subsidiary"),
+    ("**Hard AVOID:** YES — going-concern warning", "going-concern warning"),
+    ("- hard avoid: yes", "no reason given"),
+    ("Hard AVOID: yes - fraud\nOn review, the claim was unfounded.\nHard AVOID: no", None),
+    ("Hard AVOID: no\nHard AVOID: yes - restated accounts", "restated accounts"),
+    ("No verdict line at all.", None),
+    ("We would not call this a hard avoid: yes, it is risky.", None),
+])
+def test_gate_reason(text, reason):
+    assert gate_reason(text) == reason
+
+
+@pytest.mark.parametrize("value", [None, 3, {"text": "Hard AVOID: yes"}])
+def test_gate_reason_ignores_non_text(value):
+    assert gate_reason(value) is None
+
+
+def _analyze(ticker: str, gate_rates: dict[str, float]):
+    """One gated batch analysis of ``ticker`` on the fake backend."""
+    use_backend("fake", config=FakeBackendConfig(latency_scale=0.001, gate_rates=gate_rates))
+    # The workflow keeps the models it was built with
+    workflow._cached_workflow.cache_clear()
+    runner = create_runner(trace=False, batch=True)
+    result = asyncio.run(analyze_ticker(ticker, runner))
+    assert result.ok, result.error
+    return result.state
+
+
+def test_hard_avoid_skips_the_rest_of_the_analysis():
+    state = _analyze("MSFT", {"EthicsAgent": 1.0})
+    gate = state[GATE_KEY]
+    assert gate["agent"] == "EthicsAgent"
+    assert gate["section"] in SCREENS
+    assert gate["skipped"]
+    # Every skipped agent would have made at least one call, plus the synthesis
+    assert gate["calls_skipped"] > len(gate["skipped"])
+    assert not any(key in state for key in gate["skipped"])
+    assert extract_rating(state[RECOMMENDATION_KEY]) == "AVOID"
+    assert state[RECORD_KEY]["verdict"] == "AVOID"
+
+
+def test_passing_screens_run_every_agent():
+    state = _analyze("MSFT", {})
+    assert not state.get(GATE_KEY)
+    assert all(key in state for key in AGENT_SPECS)
+    assert extract_rating(state[RECOMMENDATION_KEY])
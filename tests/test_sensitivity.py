@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from sensitivity import _SUMS, _changes, window_sums
+
+
+def test_changes():
+    values = np.array([4.0, 4.5, np.nan, 4.25])
+    np.testing.assert_allclose(_changes(values, "rates"), [0.5, np.nan, np.nan])
+    np.testing.assert_allclose(
+        _changes(values), [np.log(4.5 / 4.0), np.nan, np.nan], equal_nan=True
+    )
+
+
+def test_changes_of_bad_prices_are_missing():
+    assert np.isnan(_changes(np.array([0.0, 10.0, 10.0]))[:1]).all()
+    assert np.isnan(_changes(np.array([10.0, -1.0]))).all()
+
+
+def test_window_sums_match_brute_force():
+    rng = np.random.default_rng(3)
+    returns = rng.normal(0, 0.02, (40, 3))
+    factors = rng.normal(0, 0.05, (40, 2))
+    returns[rng.random(returns.shape) < 0.2] = np.nan
+    factors[rng.random(factors.shape) < 0.2] = np.nan
+
+    sums = window_sums(returns, factors)
+    assert sums.shape == (len(_SUMS), 2, 3)
+    for f in range(2):
+        for t in range(3):
+            both = ~np.isnan(returns[:, t]) & ~np.isnan(factors[:, f])
+            x, y = returns[both, t], factors[both, f]
+            expected = [both.sum(), x.sum(), y.sum(), (x * y).sum(), (x * x).sum(), (y * y).sum()]
+            np.testing.assert_allclose(sums[:, f, t], expected, atol=1e-12)
+
+
+def test_window_sums_add_up_over_blocks():
+    rng = np.random.default_rng(5)
+    returns = rng.normal(0, 0.02, (30, 4))
+    factors = rng.normal(0, 0.05, (30, 2))
+    returns[::7, 1] = np.nan
+    whole = window_sums(returns, factors)
+    parts = window_sums(returns[:12], factors[:12]) + window_sums(returns[12:], factors[12:])
+    np.testing.assert_allclose(parts, whole, atol=1e-12)
+
+
+def test_window_sums_give_the_regression_beta():
+    rng = np.random.default_rng(11)
+    factor = rng.normal(0, 0.01, 500)
+    returns = 1.5 * factor + rng.normal(0, 0.001, 500)
+    n, sx, sy, sxy, _, syy = window_sums(returns[:, None], factor[:, None])[:, 0, 0]
+    beta = (sxy - sx * sy / n) / (syy - sy * sy / n)
+    assert beta == pytest.approx(1.5, abs=0.02)
@@ -0,0 +1,351 @@
+"""Per-agent latency, token and retry instrumentation for workflow runs.
+
+``TracingPlugin`` records a span for every agent and every model call of
+each run. The resulting ``RunTrace`` can be written as JSONL (one span per
+line), exported in Chrome trace-event format for ``chrome://tracing`` or
+Perfetto, and summarized as a table with the slowest agent, the critical
+path and token totals.
+"""
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+from google.adk.agents import LlmAgent
+from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.genai import types
+
+from report import UNAVAILABLE_KEY
+
+
+@dataclass
+class Span:
+    """A timed unit of work inside a run."""
+
+    name: str
+    kind: str  # "run", "agent" or "model"
+    agent: str
+    start: float  # Seconds since the run started
+    end: Optional[float] = None
+    parent: Optional[str] = None
+    attrs: dict = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else self.start) - self.start
+
+
+@dataclass
+class RunTrace:
+    """All spans recorded for one workflow run."""
+
+    session_id: str
+    ticker: Optional[str]
+    started_at: float  # Wall clock epoch seconds
+    spans: list[Span] = field(default_factory=list)
+    _origin: float = field(default_factory=time.perf_counter, repr=False)
+
+    def now(self) -> float:
+        return time.perf_counter() - self._origin
+
+    @property
+    def run_span(self) -> Optional[Span]:
+        return next((s for s in self.spans if s.kind == "run"), None)
+
+    def agent_spans(self, leaf_only: bool = False) -> list[Span]:
+        return [
+            s for s in self.spans
+            if s.kind == "agent" and (not leaf_only or s.attrs.get("leaf"))
+        ]
+
+    def model_spans(self, agent: Optional[str] = None) -> list[Span]:
+        return [
+            s for s in self.spans
+            if s.kind == "model" and (agent is None or s.agent == agent)
+        ]
+
+    def totals(self) -> dict:
+        """Token, search and retry totals over every model call."""
+        totals = {"model_calls": 0, "prompt_tokens": 0, "output_tokens": 0,
+                  "total_tokens": 0, "searches": 0, "retries": 0, "errors": 0}
+        for span in self.model_spans():
+            totals["model_calls"] += 1
+            totals["prompt_tokens"] += span.attrs.get("prompt_tokens", 0)
+            totals["output_tokens"] += span.attrs.get("output_tokens", 0)
+            totals["total_tokens"] += span.attrs.get("total_tokens", 0)
+            totals["searches"] += span.attrs.get("searches", 0)
+            totals["retries"] += span.attrs.get("retries", 0)
+            totals["errors"] += 1 if span.attrs.get("error") else 0
+        return totals
+
+    def critical_path(self) -> list[Span]:
+        """Chain of leaf agents that determined the run's wall time.
+
+        Starting from the leaf agent that finished last, repeatedly step to
+        the leaf agent that finished last before the current one started.
+        """
+        leaves = [s for s in self.agent_spans(leaf_only=True) if s.end is not None]
+        path = []
+        current = max(leaves, key=lambda s: s.end, default=None)
+        while current is not None:
+            path.append(current)
+            earlier = [s for s in leaves if s.end <= current.start]
+            current = max(earlier, key=lambda s: s.end, default=None)
+        return list(reversed(path))
+
+    def to_jsonl(self, path: str) -> None:
+        """Write one JSON object per span."""
+        with open(path, "w", encoding="utf-8") as f:
+            header = {"kind": "trace", "session_id": self.session_id,
+                      "ticker": self.ticker, "started_at": self.started_at,
+                      "totals": self.totals()}
+            f.write(json.dumps(header) + "\n")
+            for span in self.spans:
+                f.write(json.dumps(asdict(span) | {"duration": span.duration}) + "\n")
+
+    def to_chrome(self, path: str) -> None:
+        """Write a Chrome trace-event file; each agent gets its own lane."""
+        lanes: dict[str, int] = {}
+        events = []
+        for span in sorted(self.spans, key=lambda s: s.start):
+            tid = lanes.setdefault(span.agent, len(lanes) + 1)
+            events.append({
+                "name": span.name,
+                "cat": span.kind,
+                "ph": "X",
+                "ts": round(span.start * 1e6),
+                "dur": round(span.duration * 1e6),
+                "pid": 1,
+                "tid": tid,
+                "args": span.attrs,
+            })
+        for agent, tid in lanes.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": 1,
+                           "tid": tid, "args": {"name": agent}})
+        events.append({"name": "process_name", "ph": "M", "pid": 1,
+                       "args": {"name": f"Investment analysis: {self.ticker}"}})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def write(self, report_path: str) -> tuple[str, str]:
+        """Write JSONL and Chrome traces next to a report.
+
+        Returns:
+            tuple[str, str]: Paths of the JSONL and Chrome trace files.
+        """
+        base = report_path[:-3] if report_path.endswith(".md") else report_path
+        jsonl_path, chrome_path = f"{base}.trace.jsonl", f"{base}.trace.json"
+        self.to_jsonl(jsonl_path)
+        self.to_chrome(chrome_path)
+        return jsonl_path, chrome_path
+
+    def summary_table(self) -> str:
+        """Per-agent table with the slowest agent, critical path and totals."""
+        run = self.run_span
+        totals = self.totals()
+        lines = [
+            f"⏱️  Trace: {self.ticker} ({run.duration if run else 0:.1f}s, "
+            f"{totals['model_calls']} model calls, {totals['total_tokens']:,} tokens)",
+            f"{'Agent':<28}{'Wall':>8}{'Calls':>7}{'Prompt':>9}{'Output':>9}"
+            f"{'Search':>8}{'Retry':>7}",
+        ]
+        agents = sorted(self.agent_spans(leaf_only=True), key=lambda s: -s.duration)
+        for span in agents:
+            calls = self.model_spans(span.agent)
+            flag = " (skipped)" if span.attrs.get("short_circuited") else ""
+            flag = " (cut off)" if span.attrs.get("cut_off") else flag
+            lines.append(
+                f"{span.agent[:28]:<28}{span.duration:>7.1f}s{len(calls):>7}"
+                f"{sum(c.attrs.get('prompt_tokens', 0) for c in calls):>9}"
+                f"{sum(c.attrs.get('output_tokens', 0) for c in calls):>9}"
+                f"{sum(c.attrs.get('searches', 0) for c in calls):>8}"
+                f"{sum(c.attrs.get('retries', 0) for c in calls):>7}{flag}"
+            )
+        if agents:
+            lines.append(f"🐢 Slowest agent: {agents[0].agent} ({agents[0].duration:.1f}s)")
+        path = self.critical_path()
+        if path:
+            steps = " → ".join(f"{s.agent} ({s.duration:.1f}s)" for s in path)
+            lines.append(f"🧭 Critical path: {steps}")
+        lines.append(
+            f"🔢 Tokens: {totals['prompt_tokens']:,} prompt + "
+            f"{totals['output_tokens']:,} output = {totals['total_tokens']:,} total; "
+            f"{totals['searches']} searches, {totals['retries']} retries"
+        )
+        return "\n".join(lines)
+
+
+class TracingPlugin(BasePlugin):
+    """Records agent and model spans for every run of a runner.
+
+    Traces are keyed by session id and kept until ``pop_trace`` is called,
+    so a single plugin instance can serve many concurrent runs.
+    """
+
+    def __init__(self):
+        super().__init__(name="tracing")
+        self._traces: dict[str, RunTrace] = {}
+        self._by_session: dict[str, RunTrace] = {}
+        self._open: dict[tuple[str, str, str], Span] = {}
+        self._last_event: dict[tuple[str, str], float] = {}
+
+    def pop_trace(self, session_id: str) -> Optional[RunTrace]:
+        """Remove and return the trace for a session.
+
+        A run that failed never reaches ``after_run_callback``; its partial
+        trace is closed and returned here instead.
+        """
+        trace = self._by_session.pop(session_id, None)
+        if trace is not None:
+            return trace
+        for invocation_id, trace in list(self._traces.items()):
+            if trace.session_id == session_id:
+                for key in [k for k in self._open if k[0] == invocation_id]:
+                    self._open.pop(key).end = trace.now()
+                del self._traces[invocation_id]
+                trace.run_span.end = trace.now()
+                return trace
+        return None
+
+    def _open_span(self, invocation_id: str, kind: str, span: Span) -> None:
+        self._traces[invocation_id].spans.append(span)
+        self._open[(invocation_id, kind, span.agent)] = span
+
+    def _close_span(self, invocation_id: str, kind: str, agent: str) -> Optional[Span]:
+        span = self._open.pop((invocation_id, kind, agent), None)
+        if span is not None:
+            span.end = self._traces[invocation_id].now()
+        return span
+
+    async def before_run_callback(
+        self, *, invocation_context: InvocationContext
+    ) -> Optional[types.Content]:
+        session = invocation_context.session
+        trace = RunTrace(
+            session_id=session.id,
+            ticker=session.state.get("stock_query"),
+            started_at=time.time(),
+        )
+        root = invocation_context.agent.name
+        trace.spans.append(Span(name=root, kind="run", agent=root, start=0.0))
+        self._traces[invocation_context.invocation_id] = trace
+        return None
+
+    async def on_event_callback(
+        self, *, invocation_context: InvocationContext, event: Event
+    ) -> Optional[Event]:
+        invocation_id = invocation_context.invocation_id
+        trace = self._traces.get(invocation_id)
+        if trace is not None:
+            self._last_event[(invocation_id, event.author)] = trace.now()
+            # Agents cut off by a deadline never reach after_agent
+            for info in (event.actions.state_delta.get(UNAVAILABLE_KEY) or {}).values():
+                for kind in ("model", "agent"):
+                    span = self._close_span(invocation_id, kind, info["agent"])
+                    if span is not None:
+                        span.attrs["cut_off"] = info["reason"]
+        return None
+
+    async def after_run_callback(
+        self, *, invocation_context: InvocationContext
+    ) -> None:
+        invocation_id = invocation_context.invocation_id
+        trace = self._traces.pop(invocation_id, None)
+        if trace is None:
+            return
+        # Agents short-circuited by another plugin never reach after_agent
+        for key in [k for k in self._open if k[0] == invocation_id]:
+            span = self._open.pop(key)
+            span.end = self._last_event.get((invocation_id, span.agent), trace.now())
+            span.attrs["short_circuited"] = True
+        for key in [k for k in self._last_event if k[0] == invocation_id]:
+            del self._last_event[key]
+        trace.run_span.end = trace.now()
+        self._by_session[trace.session_id] = trace
+
+    async def before_agent_callback(
+        self, *, agent: BaseAgent, callback_context: CallbackContext
+    ) -> Optional[types.Content]:
+        invocation_id = callback_context.invocation_id
+        trace = self._traces.get(invocation_id)
+        if trace is not None:
+            self._open_span(invocation_id, "agent", Span(
+                name=agent.name,
+                kind="agent",
+                agent=agent.name,
+                start=trace.now(),
+                parent=agent.parent_agent.name if agent.parent_agent else None,
+                attrs={"leaf": isinstance(agent, LlmAgent)},
+            ))
+        return None
+
+    async def after_agent_callback(
+        self, *, agent: BaseAgent, callback_context: CallbackContext
+    ) -> Optional[types.Content]:
+        if callback_context.invocation_id in self._traces:
+            self._close_span(callback_context.invocation_id, "agent", agent.name)
+        return None
+
+    async def before_model_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        invocation_id = callback_context.invocation_id
+        trace = self._traces.get(invocation_id)
+        if trace is not None:
+            self._open_span(invocation_id, "model", Span(
+                name=f"{llm_request.model or 'model'} call",
+                kind="model",
+                agent=callback_context.agent_name,
+                start=trace.now(),
+                parent=callback_context.agent_name,
+                attrs={"model": llm_request.model},
+            ))
+        return None
+
+    async def after_model_callback(
+        self, *, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> Optional[LlmResponse]:
+        if llm_response.partial or callback_context.invocation_id not in self._traces:
+            return None
+        span = self._close_span(
+            callback_context.invocation_id, "model", callback_context.agent_name
+        )
+        if span is None:
+            return None
+        usage = llm_response.usage_metadata
+        if usage:
+            span.attrs["prompt_tokens"] = usage.prompt_token_count or 0
+            span.attrs["output_tokens"] = usage.candidates_token_count or 0
+            span.attrs["total_tokens"] = usage.total_token_count or 0
+        grounding = llm_response.grounding_metadata
+        if grounding and grounding.web_search_queries:
+            span.attrs["searches"] = len(grounding.web_search_queries)
+        metadata = llm_response.custom_metadata or {}
+        if metadata.get("throttle_retries"):
+            span.attrs["retries"] = metadata["throttle_retries"]
+        if metadata.get("tier"):
+            span.attrs["tier"] = metadata["tier"]
+        if metadata.get("escalated"):
+            span.attrs["escalated"] = metadata["escalated"]
+        return None
+
+    async def on_model_error_callback(
+        self,
+        *,
+        callback_context: CallbackContext,
+        llm_request: LlmRequest,
+        error: Exception,
+    ) -> Optional[LlmResponse]:
+        if callback_context.invocation_id in self._traces:
+            span = self._close_span(
+                callback_context.invocation_id, "model", callback_context.agent_name
+            )
+            if span is not None:
+                span.attrs["error"] = f"{type(error).__name__}: {error}"
+        return None
@@ -1,87 +1,111 @@
 """Workflow orchestration for the investment analysis agent system."""
-from google.adk.agents import SequentialAgent, ParallelAgent
-from agents import (
-    create_business_understanding_agent,
-    create_competitive_advantage_agent,
-    create_media_sentiment_agent,
-    create_ethics_agent,
-    create_investment_horizon_agent,
-    create_insider_trading_agent,
-    create_google_trends_agent,
-    create_share_dilution_agent,
-    create_short_interest_agent,
-    create_debt_analysis_agent,
-    create_infinite_game_agent,
-    create_ceo_analysis_agent,
-    create_analyst_ratings_agent,
-    create_technical_analysis_agent,
-    create_reverse_analysis_agent,
-    create_bond_correlation_agent,
-    create_investment_aggregator
-)
+import functools
+from typing import Optional
 
+from google.adk.agents import SequentialAgent
+from agents import create_agent, create_investment_aggregator
+from compaction import create_section_compactor
+from config import COMPACTION_ENABLED, RECORDS_ENABLED, RESEARCH_SCHEDULE, SEARCH_MODE
+from deadlines import DeadlineParallelAgent
+from registry import AGENT_SPECS, ALL_SECTIONS
+from scheduler import GatedSynthesis, ScheduledResearchTeam
+from scorecard import create_scorecard_agent
+from search import SearchPrefetchAgent
 
-def create_research_workflow(stock_query: str) -> SequentialAgent:
-    """Create the complete investment analysis workflow.
+
+def create_research_workflow(
+    sections: Optional[tuple[str, ...]] = None, schedule: str = RESEARCH_SCHEDULE
+) -> SequentialAgent:
+    """Create the investment analysis workflow for the selected sections.
+    
+    The workflow is ticker-agnostic: agents read the ticker from the
+    ``stock_query`` session state key, so one tree serves every analysis.
     
     Args:
-        stock_query: The stock ticker or company name to analyze.
+        sections: Output keys of the sections to research, in registry
+            order. Defaults to every section.
+        schedule: "gated" to run the research as a dependency graph that
+            stops at a hard AVOID (see scheduler.py), "eager" to start every
+            agent at once but still stop at a hard AVOID, "flat" to start
+            every agent at once; "auto" is eager.
     
     Returns:
         SequentialAgent: The root agent that orchestrates the entire workflow.
     """
-    print(f"🔧 Creating investment analysis agents for {stock_query}...")
+    sections = ALL_SECTIONS if sections is None else sections
+    schedule = resolve_schedule(schedule)
+    print("🔧 Creating investment analysis agents...")
     
-    # Create all analysis agents with stock_query
-    business_agent = create_business_understanding_agent(stock_query)
-    competitive_agent = create_competitive_advantage_agent(stock_query)
-    media_agent = create_media_sentiment_agent(stock_query)
-    ethics_agent = create_ethics_agent(stock_query)
-    horizon_agent = create_investment_horizon_agent(stock_query)
-    insider_agent = create_insider_trading_agent(stock_query)
-    trends_agent = create_google_trends_agent(stock_query)
-    dilution_agent = create_share_dilution_agent(stock_query)
-    short_agent = create_short_interest_agent(stock_query)
-    debt_agent = create_debt_analysis_agent(stock_query)
-    infinite_agent = create_infinite_game_agent(stock_query)
-    ceo_agent = create_ceo_analysis_agent(stock_query)
-    analyst_agent = create_analyst_ratings_agent(stock_query)
-    technical_agent = create_technical_analysis_agent(stock_query)
-    reverse_agent = create_reverse_analysis_agent(stock_query)
-    bond_agent = create_bond_correlation_agent(stock_query)
+    # Create the selected analysis agents from the registry
+    research_agents = [create_agent(AGENT_SPECS[key], schedule) for key in sections]
+    aggregator = create_investment_aggregator(sections, compacted=COMPACTION_ENABLED)
     
-    aggregator = create_investment_aggregator()
+    print(f"✅ Created {len(research_agents)} analysis agents")
     
-    print(f"✅ Created {16} analysis agents")
-    
-    # Create parallel research team - all agents run simultaneously
-    parallel_analysis_team = ParallelAgent(
-        name="ParallelAnalysisTeam",
-        sub_agents=[
-            business_agent,
-            competitive_agent,
-            media_agent,
-            ethics_agent,
-            horizon_agent,
-            insider_agent,
-            trends_agent,
-            dilution_agent,
-            short_agent,
-            debt_agent,
-            infinite_agent,
-            ceo_agent,
-            analyst_agent,
-            technical_agent,
-            reverse_agent,
-            bond_agent,
-        ],
-    )
+    # Create the research team - all agents run at once, or screens first
+    # and the rest by dependency and priority when gated, and any that run
+    # out of time are cut off so the aggregator still runs
+    if schedule in ("gated", "eager"):
+        parallel_analysis_team = ScheduledResearchTeam(
+            name="ParallelAnalysisTeam",
+            sub_agents=research_agents,
+            dependencies=schedule == "gated",
+        )
+    else:
+        parallel_analysis_team = DeadlineParallelAgent(
+            name="ParallelAnalysisTeam",
+            sub_agents=research_agents,
+        )
     
-    # Create sequential workflow: parallel analysis then aggregation
+    # Create sequential workflow: optional search prefetch, parallel
+    # analysis, compaction to the aggregator's token budget, aggregation,
+    # then the structured scorecard of the recommendation
+    stages = []
+    topics = sorted({topic for key in sections for topic in AGENT_SPECS[key].search_topics})
+    if SEARCH_MODE == "prefetch" and topics:
+        stages.append(SearchPrefetchAgent(name="SearchPrefetch", topics=tuple(topics)))
+    stages.append(parallel_analysis_team)
+    synthesis = []
+    if COMPACTION_ENABLED:
+        synthesis.append(create_section_compactor(sections))
+    synthesis.append(aggregator)
+    if RECORDS_ENABLED:
+        synthesis.append(create_scorecard_agent(sections, compacted=COMPACTION_ENABLED))
+    if schedule in ("gated", "eager"):
+        # Skipped when a screen rules the stock out
+        stages.append(GatedSynthesis(name="Synthesis", sub_agents=synthesis, record=RECORDS_ENABLED))
+    else:
+        stages.extend(synthesis)
     root_agent = SequentialAgent(
         name="InvestmentAnalysisSystem",
-        sub_agents=[parallel_analysis_team, aggregator],
+        sub_agents=stages,
     )
     
     print("✅ Investment analysis workflow created.")
     return root_agent
+
+
+def resolve_schedule(schedule: str = RESEARCH_SCHEDULE, batch: bool = False) -> str:
+    """The schedule to run; ``"auto"`` gates batches and is eager otherwise."""
+    if schedule == "auto":
+        return "gated" if batch else "eager"
+    return schedule
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_workflow(sections: tuple[str, ...], schedule: str) -> SequentialAgent:
+    return create_research_workflow(sections, schedule)
+
+
+def get_research_workflow(
+    sections: Optional[tuple[str, ...]] = None, batch: bool = False
+) -> SequentialAgent:
+    """Return the process-wide workflow for ``sections``, building it on first use.
+
+    Args:
+        sections: Output keys of the sections to research; defaults to all.
+        batch: The workflow serves a batch, which the ``"auto"`` schedule gates.
+    """
+    return _cached_workflow(
+        ALL_SECTIONS if sections is None else tuple(sections), resolve_schedule(batch=batch)
+    )